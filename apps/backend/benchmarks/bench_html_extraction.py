@@ -0,0 +1,113 @@
+"""Micro-benchmark: HTMLParser extraction vs the regex extraction engine.
+
+Usage:
+    uv run python -m benchmarks.bench_html_extraction [feed.xml ...] [--repeat 20]
+
+Without arguments it runs on the WordPress feed samples in benchmarks/data.
+Pass saved copies of the live vsd/public feeds to benchmark real content.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from src.html_text import extract_text, extract_texts
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+CONTENT_NS = {"content": "http://purl.org/rss/1.0/modules/content/"}
+
+
+def load_content_samples(feed_paths: list[Path]) -> list[str]:
+    samples: list[str] = []
+    for feed_path in feed_paths:
+        root = ET.parse(feed_path).getroot()
+        for item in root.findall(".//item"):
+            content = item.findtext("content:encoded", "", CONTENT_NS)
+            if content:
+                samples.append(content)
+    return samples
+
+
+class HTMLTextExtractor(HTMLParser):
+    # The HTMLParser extraction the regex engine replaced, kept as the baseline
+    def __init__(self):
+        super().__init__()
+        self.text_parts: list[str] = []
+
+    def handle_data(self, data: str) -> None:
+        self.text_parts.append(data)
+
+    def get_text(self) -> str:
+        return " ".join(self.text_parts)
+
+
+def legacy_strip_html_tags(html_content: str) -> str:
+    parser = HTMLTextExtractor()
+    parser.feed(html_content)
+    return parser.get_text().strip()
+
+
+def time_runs(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("feeds", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=50, help="Replicate samples N times")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    feed_paths = args.feeds or sorted(DATA_DIR.glob("*.xml"))
+    samples = load_content_samples(feed_paths) * args.scale
+    total_bytes = sum(len(sample) for sample in samples)
+
+    candidates = {
+        "htmlparser": lambda: [legacy_strip_html_tags(sample) for sample in samples],
+        "regex": lambda: [extract_text(sample) for sample in samples],
+        "regex_process_pool": lambda: extract_texts(samples, max_workers=args.workers),
+    }
+
+    # Warm the process pool so its startup cost is not attributed to one run
+    extract_texts(samples, max_workers=args.workers)
+
+    results = {}
+    for name, fn in candidates.items():
+        timings = time_runs(fn, args.repeat)
+        median = statistics.median(timings)
+        results[name] = median
+        logger.info(
+            "HTML extraction benchmark",
+            engine=name,
+            documents=len(samples),
+            median_ms=round(median * 1000, 2),
+            mb_per_s=round(total_bytes / median / 1_000_000, 2),
+        )
+
+    baseline_median = results["htmlparser"]
+    legacy_chars = sum(len(legacy_strip_html_tags(sample)) for sample in samples)
+    new_chars = sum(len(extract_text(sample)) for sample in samples)
+    logger.info(
+        "HTML extraction summary",
+        speedup_regex=round(baseline_median / results["regex"], 2),
+        speedup_process_pool=round(baseline_median / results["regex_process_pool"], 2),
+        embedded_chars_before=legacy_chars,
+        embedded_chars_after=new_chars,
+    )
+
+
+if __name__ == "__main__":
+    main()
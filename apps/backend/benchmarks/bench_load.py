@@ -0,0 +1,236 @@
+"""Load test for the FastAPI endpoints against local stand-ins for OpenAI.
+
+Usage:
+    uv run python -m benchmarks.bench_load [--endpoints query,search,articles]
+        [--concurrency 1,4,16] [--requests 50] [--first-token-latency 0.3]
+        [--output results.json] [--baseline baseline.json] [--threshold 0.15]
+        [--keep-query-limits] [--warm-cache]
+
+Drives the real ``main.app`` in process through an ASGI transport, at each
+concurrency level in turn, after seeding a temporary local Qdrant store with
+a synthetic corpus. The OpenAI embedding and chat APIs are replaced by the
+fakes in benchmarks.fake_openai, with configurable latency, so results only
+depend on the app. Reports throughput, p50/p95/p99 latency and error rate
+per endpoint and level, saved as JSON and comparable with a baseline run
+like benchmarks.bench_pipeline. All requests come from a single client, so the
+per-client /query rate limit is lifted and the admission queue sized to the
+highest level, unless --keep-query-limits is passed. The response cache is
+cleared before each level, so levels replaying the same queries still measure
+the app rather than cache hits, unless --warm-cache is passed; each level
+reports how many of its requests the cache answered.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_pipeline import compare_results, percentile, reset_collection
+from benchmarks.corpus import default_feed_paths, load_feed_articles, synthetic_corpus
+from benchmarks.fake_openai import FakeOpenAI, install_fake_openai
+from main import app
+from qdrant_client import QdrantClient
+from src.admission import query_admission, query_rate_limiter
+from src.article import Article
+from src.embed import process_article
+from src.http_cache import response_cache
+from src.logger import get_logger
+from src.metrics import RESPONSE_CACHE_REQUESTS
+from src.qdrant_client import set_qdrant_client
+
+logger = get_logger(__name__)
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "load.json"
+ENDPOINTS = ("query", "search", "articles")
+
+
+def lift_query_limits(levels: list[int]) -> None:
+    # One client's token bucket would reject most /query load, and levels past the
+    # admission queue would mostly measure 503s
+    query_rate_limiter.rate_per_minute = 0
+    query_admission.max_queue = max(query_admission.max_queue, max(levels))
+
+
+def response_cache_hits() -> float:
+    return sum(
+        sample.value
+        for metric in RESPONSE_CACHE_REQUESTS.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total") and sample.labels["result"] == "hit"
+    )
+
+
+def build_request(endpoint: str, article: Article) -> tuple[str, str, dict]:
+    if endpoint == "query":
+        return "POST", "/query", {"json": {"query": article.title, "top_k": 8}}
+    if endpoint == "search":
+        return "GET", "/search", {"params": {"q": article.title, "top_k": 8}}
+    return "GET", "/articles", {"params": {"limit": 100}}
+
+
+def is_error(response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return True
+    # Handlers report failures in the body with a 200
+    body = response.json()
+    return isinstance(body, dict) and body.get("status") == "error"
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    concurrency: int,
+    total_requests: int,
+    corpus: list[Article],
+    warm_cache: bool = False,
+) -> dict[str, float]:
+    if not warm_cache:
+        response_cache.clear()
+    hits_before = response_cache_hits()
+    latencies: list[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_request
+        while next_request < total_requests:
+            article = corpus[next_request % len(corpus)]
+            next_request += 1
+            method, url, kwargs = build_request(endpoint, article)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = is_error(response)
+            except Exception as e:
+                logger.warning("Load test request failed", endpoint=endpoint, error=str(e))
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "error_rate": round(errors / len(latencies), 4),
+        "cache_hits": int(response_cache_hits() - hits_before),
+    }
+
+
+async def run_load_test(
+    endpoints: list[str],
+    levels: list[int],
+    total_requests: int,
+    corpus: list[Article],
+    warm_cache: bool = False,
+) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        for endpoint in endpoints:
+            for concurrency in levels:
+                result = await run_level(
+                    client, endpoint, concurrency, total_requests, corpus, warm_cache
+                )
+                results[f"{endpoint}@c{concurrency}"] = result
+                logger.info("Load test level", endpoint=endpoint, concurrency=concurrency, **result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per level")
+    parser.add_argument("--corpus-size", type=int, default=200)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument(
+        "--keep-query-limits",
+        action="store_true",
+        help="Keep the per-client rate limit and admission queue on /query",
+    )
+    parser.add_argument(
+        "--warm-cache",
+        action="store_true",
+        help="Keep the response cache between levels instead of clearing it",
+    )
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(",")
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    if not args.keep_query_limits:
+        lift_query_limits(levels)
+
+    corpus = synthetic_corpus(load_feed_articles(default_feed_paths()), args.corpus_size)
+    with tempfile.TemporaryDirectory(prefix="gossip-load-") as qdrant_path:
+        set_qdrant_client(QdrantClient(path=qdrant_path))
+        try:
+            # Seed without latency, then switch to the configured stand-in
+            install_fake_openai(FakeOpenAI())
+            reset_collection()
+            for article in corpus:
+                process_article(article)
+
+            install_fake_openai(
+                FakeOpenAI(
+                    embedding_latency=args.embedding_latency,
+                    first_token_latency=args.first_token_latency,
+                    token_latency=args.token_latency,
+                )
+            )
+            benchmarks = asyncio.run(
+                run_load_test(endpoints, levels, args.requests, corpus, args.warm_cache)
+            )
+        finally:
+            set_qdrant_client(None)
+
+    results = {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus_size": args.corpus_size,
+            "requests_per_level": args.requests,
+            "embedding_latency": args.embedding_latency,
+            "first_token_latency": args.first_token_latency,
+            "token_latency": args.token_latency,
+            "query_limits": args.keep_query_limits,
+            "warm_cache": args.warm_cache,
+        },
+        "benchmarks": benchmarks,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    logger.info("Saved load test results", path=str(args.output))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        comparisons = compare_results(results, baseline, args.threshold)
+        for comparison in comparisons:
+            log = logger.warning if comparison["regressed"] else logger.info
+            log("Load test comparison", **comparison)
+        if any(comparison["regressed"] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
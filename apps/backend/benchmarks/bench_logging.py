@@ -0,0 +1,81 @@
+"""Micro-benchmark: logging overhead of the ingestion loops per logging mode.
+
+Usage:
+    uv run python -m benchmarks.bench_logging [--articles 5000] [--workers 8]
+
+Replays the log events an ingestion run emits per feed and per article from
+several worker threads, writing to a temporary file. ``emit_ms`` is the time
+the ingestion threads spend logging, ``drain_ms`` the extra time the JSON
+queue listener needs to flush what is left.
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.logger import get_logger, setup_logging, shutdown_logging
+
+ARTICLES_PER_FEED = 50
+
+
+def simulate_ingestion_logs(articles: int, workers: int) -> None:
+    # A fresh proxy picks up the current configuration
+    ingestion_logger = get_logger("benchmarks.ingestion")
+
+    def process_feed(feed_idx: int) -> None:
+        feed_url = f"https://example.com/feed/{feed_idx}"
+        ingestion_logger.info("Fetching RSS feed", feed_url=feed_url, source="example.com")
+        ingestion_logger.debug("Feed fetched over HTTP", feed_url=feed_url, status_code=200)
+        ingestion_logger.debug("Found items in RSS feed", feed_url=feed_url, item_count=50)
+        for article_idx in range(ARTICLES_PER_FEED):
+            article_url = f"{feed_url}/article-{article_idx}"
+            ingestion_logger.debug(
+                "Split article into chunks", article_url=article_url, chunk_count=4
+            )
+            ingestion_logger.info(
+                "Stored article chunks in Qdrant", article_url=article_url, chunks_stored=4
+            )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(process_feed, range(articles // ARTICLES_PER_FEED)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    results = []
+    for log_format in ("console", "json"):
+        for log_level in ("INFO", "DEBUG"):
+            with tempfile.TemporaryFile("w") as sink:
+                shutdown_logging()
+                setup_logging(log_level=log_level, log_format=log_format, stream=sink)
+
+                start = time.perf_counter()
+                simulate_ingestion_logs(args.articles, args.workers)
+                emitted = time.perf_counter()
+                shutdown_logging()
+                drained = time.perf_counter()
+
+            results.append(
+                {
+                    "log_format": log_format,
+                    "log_level": log_level,
+                    "articles": args.articles,
+                    "emit_ms": round((emitted - start) * 1000, 2),
+                    "drain_ms": round((drained - emitted) * 1000, 2),
+                    "us_per_article": round((emitted - start) / args.articles * 1_000_000, 2),
+                }
+            )
+
+    setup_logging()
+    logger = get_logger(__name__)
+    for result in results:
+        logger.info("Logging benchmark", **result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Benchmark suite for the ingestion and retrieval hot paths, fully offline.
+
+Usage:
+    uv run python -m benchmarks.bench_pipeline [feed.xml ...] [--sizes 100,1000]
+        [--output results.json] [--baseline baseline.json] [--threshold 0.15]
+
+Feeds are served from the XML files (the samples in benchmarks/data by
+default, pass saved copies of the live vsd/public feeds to use real content),
+embeddings come from the deterministic fake in benchmarks.fake_openai and
+vectors go to a temporary local Qdrant store, so no API key is needed.
+
+Results are written as JSON. With --baseline, every metric is compared with
+the baseline run and the command exits with status 1 when one regressed by
+more than the threshold: ``*_per_s`` metrics must not drop, ``*_ms`` ones
+must not grow.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from benchmarks.bench_html_extraction import load_content_samples
+from benchmarks.corpus import (
+    default_feed_paths,
+    load_feed_articles,
+    serve_feeds,
+    synthetic_corpus,
+)
+from benchmarks.fake_openai import FakeOpenAI, fake_embedding, install_fake_openai
+from qdrant_client import QdrantClient
+from src.embed import embed_texts, process_article, split_text_into_chunks
+from src.http_client import close_http_client
+from src.logger import get_logger
+from src.qdrant_client import (
+    COLLECTION_NAME,
+    EMBEDDING_DIM,
+    ensure_collection_exists,
+    get_qdrant_client,
+    set_qdrant_client,
+)
+from src.rag import search_similar_chunks
+from src.rss_collector import parse_rss_feed, strip_html_tags
+
+logger = get_logger(__name__)
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+UPSERT_COLLECTION_NAME = "bench_upsert"
+UPSERT_BATCH_SIZE = 256
+SEARCH_QUERIES = 200
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_runs(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def throughput(count: int, timings: list[float], unit: str) -> dict[str, float]:
+    median = statistics.median(timings)
+    return {f"{unit}_per_s": round(count / median, 2), "median_ms": round(median * 1000, 3)}
+
+
+def reset_collection() -> None:
+    qdrant = get_qdrant_client()
+    if qdrant.collection_exists(COLLECTION_NAME):
+        qdrant.delete_collection(COLLECTION_NAME)
+    ensure_collection_exists()
+
+
+def bench_parsing(feed_paths: list[Path], repeat: int) -> dict[str, dict[str, float]]:
+    feeds = serve_feeds(feed_paths)
+    items = sum(len(parse_rss_feed(url, source)) for url, source in feeds.items())
+    parse_timings = time_runs(
+        lambda: [parse_rss_feed(url, source) for url, source in feeds.items()], repeat
+    )
+
+    html_contents = load_content_samples(feed_paths)
+    strip_timings = time_runs(lambda: [strip_html_tags(html) for html in html_contents], repeat)
+
+    return {
+        "parse_rss_feed": throughput(items, parse_timings, "items"),
+        "strip_html_tags": throughput(len(html_contents), strip_timings, "docs"),
+    }
+
+
+def bench_chunking(corpus, repeat: int) -> dict[str, float]:
+    timings = time_runs(lambda: [split_text_into_chunks(a.content) for a in corpus], repeat)
+    return throughput(len(corpus), timings, "articles")
+
+
+def bench_corpus_size(corpus, repeat: int) -> dict[str, dict[str, float]]:
+    size = len(corpus)
+    reset_collection()
+
+    start = time.perf_counter()
+    chunks = sum(process_article(article) for article in corpus)
+    elapsed = time.perf_counter() - start
+    results = {
+        f"process_article@{size}": {
+            "articles_per_s": round(size / elapsed, 2),
+            "chunks_per_s": round(chunks / elapsed, 2),
+            "elapsed_ms": round(elapsed * 1000, 3),
+        }
+    }
+
+    # Upserts alone, into a scratch collection, with the vectors computed up front
+    texts = [chunk["text"] for a in corpus for chunk in split_text_into_chunks(a.content)]
+    vectors = embed_texts(texts)
+    points = [
+        PointStruct(id=idx, vector=vector, payload={"chunk_text": text})
+        for idx, (text, vector) in enumerate(zip(texts, vectors, strict=True))
+    ]
+    qdrant = get_qdrant_client()
+    qdrant.create_collection(
+        collection_name=UPSERT_COLLECTION_NAME,
+        vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE),
+    )
+
+    def upsert_all() -> None:
+        for batch_start in range(0, len(points), UPSERT_BATCH_SIZE):
+            qdrant.upsert(
+                collection_name=UPSERT_COLLECTION_NAME,
+                points=points[batch_start : batch_start + UPSERT_BATCH_SIZE],
+            )
+
+    upsert_timings = time_runs(upsert_all, repeat)
+    qdrant.delete_collection(UPSERT_COLLECTION_NAME)
+    results[f"upsert@{size}"] = throughput(len(points), upsert_timings, "points")
+
+    # Queries embedded up front so only the vector search is timed
+    queries = [fake_embedding(corpus[idx % size].title).tolist() for idx in range(SEARCH_QUERIES)]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search_similar_chunks(query, limit=8)
+        latencies.append((time.perf_counter() - start) * 1000)
+    results[f"search_similar_chunks@{size}"] = {
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+    return results
+
+
+def compare_results(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[dict[str, Any]]:
+    comparisons = []
+    for name, metrics in current["benchmarks"].items():
+        baseline_metrics = baseline["benchmarks"].get(name, {})
+        for metric, value in metrics.items():
+            previous = baseline_metrics.get(metric)
+            # Elapsed times and cache hit counts describe the run, they are not compared
+            if previous is None or metric.startswith(("elapsed", "cache_")):
+                continue
+            if metric == "error_rate":
+                # Rates are compared in absolute terms, their baseline is usually 0
+                change = value - previous
+                regressed = change > threshold
+            elif previous:
+                change = (value - previous) / previous
+                higher_is_better = metric.endswith("_per_s")
+                regressed = -change > threshold if higher_is_better else change > threshold
+            else:
+                continue
+            comparisons.append(
+                {
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": previous,
+                    "current": value,
+                    "change_pct": round(change * 100, 1),
+                    "regressed": regressed,
+                }
+            )
+    return comparisons
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("feeds", nargs="*", type=Path)
+    parser.add_argument("--sizes", default="100,1000", help="Comma separated corpus sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    feed_paths = args.feeds or default_feed_paths()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    install_fake_openai(FakeOpenAI())
+
+    seed_articles = load_feed_articles(feed_paths)
+    benchmarks: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="gossip-bench-") as qdrant_path:
+        set_qdrant_client(QdrantClient(path=qdrant_path))
+        try:
+            benchmarks.update(bench_parsing(feed_paths, args.repeat))
+            benchmarks[f"split_text_into_chunks@{max(sizes)}"] = bench_chunking(
+                synthetic_corpus(seed_articles, max(sizes)), args.repeat
+            )
+            for size in sizes:
+                benchmarks.update(bench_corpus_size(synthetic_corpus(seed_articles, size), 3))
+        finally:
+            set_qdrant_client(None)
+            close_http_client()
+
+    results = {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "feeds": [path.name for path in feed_paths],
+            "sizes": sizes,
+        },
+        "benchmarks": benchmarks,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    for name, metrics in benchmarks.items():
+        logger.info("Pipeline benchmark", benchmark=name, **metrics)
+    logger.info("Saved benchmark results", path=str(args.output))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        comparisons = compare_results(results, baseline, args.threshold)
+        for comparison in comparisons:
+            log = logger.warning if comparison["regressed"] else logger.info
+            log("Benchmark comparison", **comparison)
+        if any(comparison["regressed"] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
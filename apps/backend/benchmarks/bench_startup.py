@@ -0,0 +1,85 @@
+"""Micro-benchmark: API import and startup time.
+
+Usage:
+    uv run python -m benchmarks.bench_startup [--repeat 7]
+
+Each run imports ``main`` in a fresh interpreter, then enters the app lifespan
+through a TestClient. ``modules_ms`` is the self time of the ``src`` modules,
+where client construction used to happen, out of the whole import.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    client.get("/health")
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+}))
+"""
+
+
+def src_modules_self_ms(importtime_log: str) -> float:
+    total_us = 0
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, module = line.removeprefix("import time:").split("|")
+        if module.strip().startswith("src."):
+            total_us += int(self_us)
+    return total_us / 1000
+
+
+def run_probe() -> dict[str, float]:
+    # Dummy keys so clients can be built if something still does it at import
+    env = {"OPENAI_API_KEY": "x", "LINKUP_API_KEY": "x", **os.environ}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["modules_ms"] = src_modules_self_ms(completed.stderr)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    runs = [run_probe() for _ in range(args.repeat)]
+
+    from src.logger import get_logger
+
+    logger = get_logger(__name__)
+    logger.info(
+        "Startup benchmark",
+        runs=args.repeat,
+        **{
+            f"median_{metric}": round(statistics.median(run[metric] for run in runs), 1)
+            for metric in ("import_ms", "modules_ms", "startup_ms")
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Offline feed fixtures and synthetic corpora for the benchmarks."""
+
+import random
+from pathlib import Path
+
+import httpx
+
+from src.article import Article
+from src.http_client import create_http_client, set_http_client
+from src.rss_collector import parse_feed_document
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def default_feed_paths() -> list[Path]:
+    return sorted(DATA_DIR.glob("*.xml"))
+
+
+def feed_url_for(path: Path) -> str:
+    return f"https://feeds.bench.local/{path.stem}"
+
+
+def source_for(path: Path) -> str:
+    return "vsd.fr" if path.stem.startswith("vsd") else "public.fr"
+
+
+def serve_feeds(feed_paths: list[Path]) -> dict[str, str]:
+    """Route the pooled HTTP client to the feed files, returns feed URL -> source."""
+    documents = {feed_url_for(path): path.read_bytes() for path in feed_paths}
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        content = documents.get(str(request.url))
+        if content is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=content, headers={"Content-Type": "application/xml"})
+
+    set_http_client(create_http_client(transport=httpx.MockTransport(handle)))
+    return {feed_url_for(path): source_for(path) for path in feed_paths}
+
+
+def load_feed_articles(feed_paths: list[Path]) -> list[Article]:
+    articles: list[Article] = []
+    for path in feed_paths:
+        parsed = parse_feed_document(path.read_text(), feed_url_for(path), source_for(path))
+        articles.extend(item.article for item in parsed.items)
+    return articles
+
+
+def synthetic_corpus(seed_articles: list[Article], size: int, seed: int = 0) -> list[Article]:
+    """Grow a corpus from the seed articles, mixing in paragraphs from other articles.
+
+    The seed feeds hold short items, synthetic articles borrow paragraphs from two
+    to five others to reach the length of a full article page.
+    """
+    rng = random.Random(seed)
+    corpus: list[Article] = list(seed_articles[:size])
+    for idx in range(len(corpus), size):
+        article = seed_articles[idx % len(seed_articles)]
+        paragraphs = article.content.split("\n\n")
+        for donor in rng.sample(seed_articles, rng.randint(2, 5)):
+            paragraphs.extend(donor.content.split("\n\n"))
+        rng.shuffle(paragraphs)
+        corpus.append(
+            article.model_copy(
+                update={"url": f"{article.url}-{idx}", "content": "\n\n".join(paragraphs)}
+            )
+        )
+    return corpus
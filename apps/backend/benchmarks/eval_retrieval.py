@@ -0,0 +1,294 @@
+"""Retrieval quality and latency evaluation across retrieval configurations.
+
+Usage:
+    uv run python -m benchmarks.eval_retrieval [feed.xml ...]
+        [--queries benchmarks/data/retrieval_eval.json] [--configs configs.json]
+        [--k 1,3,5] [--qdrant-url http://localhost:6333] [--output results.json]
+
+Indexes the feed articles once per configuration (chunk size and overlap,
+embedding dimension, int8 scalar quantization, cross-encoder reranking), runs
+every labelled query through ``search_similar_chunks`` and reports recall@k,
+MRR and nDCG@k at the article level, with search latency and an estimate of
+the vector storage. Each configuration is also reported as a change against
+the first one, the baseline, e.g. what reranking adds to p95 latency and to
+recall.
+
+The labelled set is a JSON object with ``queries``, a list of
+``{"query": ..., "relevant_urls": [...]}``, and optional ``articles`` indexed
+along with the feeds: hard negatives sharing a name or a show with the
+relevant articles, and long articles whose answer sits far from their start.
+Embeddings come from the deterministic local backend in
+benchmarks.fake_openai, so runs are reproducible offline; it tracks lexical
+overlap, so absolute scores say more about chunking than about the real
+embedding model. Smaller dimensions are requested with ``dimensions``, as for
+text-embedding-3 models. ``vector_bytes_estimate`` is points x dimension x
+bytes per component, not measured storage. The local Qdrant mode searches
+exactly and ignores quantization, so int8 scores there are float32 scores;
+use --qdrant-url with a Qdrant server to measure it. Rerank configurations
+need the rerank extra (``uv sync --extra rerank``) and are skipped without it.
+"""
+
+import argparse
+import json
+import math
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel, Field
+from qdrant_client.models import (
+    Distance,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
+
+from benchmarks.bench_pipeline import percentile
+from benchmarks.corpus import DATA_DIR, default_feed_paths, load_feed_articles
+from benchmarks.fake_openai import FakeOpenAI, install_fake_openai
+from qdrant_client import QdrantClient
+from src.article import Article
+from src.embed import build_points, embed_text, embed_texts, split_text_into_chunks
+from src.logger import get_logger
+from src.qdrant_client import EMBEDDING_DIM, get_qdrant_client, set_qdrant_client
+from src.rag import search_similar_chunks
+from src.reranker import RERANK_TIMEOUT_MS, get_cross_encoder, rerank_chunks
+
+logger = get_logger(__name__)
+
+DEFAULT_QUERIES = DATA_DIR / "retrieval_eval.json"
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "retrieval.json"
+# Chunks fetched per article slot, several chunks of one article collapse into one result
+CHUNK_OVERSAMPLE = 4
+
+
+class RetrievalConfig(BaseModel):
+    name: str = Field(description="Configuration name used in the report")
+    chunk_size: int = Field(description="Characters per chunk", default=1500)
+    overlap: int = Field(description="Characters shared by consecutive chunks", default=200)
+    dim: int = Field(description="Embedding dimension", default=EMBEDDING_DIM)
+    quantization: Literal["int8"] | None = Field(
+        description="Scalar quantization of the stored vectors", default=None
+    )
+    rerank: bool = Field(description="Rerank candidates with the cross-encoder", default=False)
+    rerank_timeout_ms: float | None = Field(
+        description="Rerank latency budget, None to always wait for the scores",
+        default=RERANK_TIMEOUT_MS,
+    )
+
+
+class LabelledQuery(BaseModel):
+    query: str = Field(description="The query text")
+    relevant_urls: list[str] = Field(description="URLs of the articles that answer the query")
+
+
+class EvalSet(BaseModel):
+    queries: list[LabelledQuery] = Field(description="Labelled queries")
+    articles: list[Article] = Field(
+        description="Articles indexed along with the feeds, such as hard negatives",
+        default=[],
+    )
+
+
+DEFAULT_CONFIGS = [
+    RetrievalConfig(name="baseline"),
+    RetrievalConfig(name="chunks_800", chunk_size=800, overlap=150),
+    RetrievalConfig(name="chunks_400", chunk_size=400, overlap=80),
+    RetrievalConfig(name="dim_512", dim=512),
+    RetrievalConfig(name="dim_256", dim=256),
+    RetrievalConfig(name="int8", quantization="int8"),
+    RetrievalConfig(name="rerank", rerank=True),
+]
+
+
+def rank_articles(chunks: list[dict]) -> list[str]:
+    return list(dict.fromkeys(chunk["article_url"] for chunk in chunks))
+
+
+def recall_at_k(ranked: list[str], relevant: set[str], k: int) -> float:
+    return len(relevant.intersection(ranked[:k])) / len(relevant)
+
+
+def reciprocal_rank(ranked: list[str], relevant: set[str]) -> float:
+    for rank, url in enumerate(ranked, 1):
+        if url in relevant:
+            return 1 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: list[str], relevant: set[str], k: int) -> float:
+    dcg = sum(1 / math.log2(rank + 1) for rank, url in enumerate(ranked[:k], 1) if url in relevant)
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, min(k, len(relevant)) + 1))
+    return dcg / ideal
+
+
+def requested_dimensions(config: RetrievalConfig) -> int | None:
+    return config.dim if config.dim != EMBEDDING_DIM else None
+
+
+def build_index(config: RetrievalConfig, articles: list[Article], collection_name: str) -> int:
+    qdrant = get_qdrant_client()
+    qdrant.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=config.dim, distance=Distance.COSINE),
+        quantization_config=(
+            ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+            )
+            if config.quantization == "int8"
+            else None
+        ),
+    )
+
+    points = []
+    for article in articles:
+        chunks = split_text_into_chunks(article.content, config.chunk_size, config.overlap)
+        if chunks:
+            embeddings = embed_texts(
+                [chunk["text"] for chunk in chunks], dimensions=requested_dimensions(config)
+            )
+            points.extend(build_points(article, chunks, embeddings))
+    qdrant.upsert(collection_name=collection_name, points=points)
+    return len(points)
+
+
+def evaluate_config(
+    config: RetrievalConfig,
+    articles: list[Article],
+    queries: list[LabelledQuery],
+    ks: list[int],
+) -> dict[str, float]:
+    install_fake_openai(FakeOpenAI())
+    collection_name = f"eval_{config.name}"
+    qdrant = get_qdrant_client()
+    if qdrant.collection_exists(collection_name):
+        qdrant.delete_collection(collection_name)
+    points = build_index(config, articles, collection_name)
+
+    recalls: dict[int, list[float]] = {k: [] for k in ks}
+    ndcgs: dict[int, list[float]] = {k: [] for k in ks}
+    reciprocal_ranks: list[float] = []
+    latencies: list[float] = []
+    rerank_fallbacks = 0
+    for labelled in queries:
+        relevant = set(labelled.relevant_urls)
+        query_embedding = embed_text(labelled.query, dimensions=requested_dimensions(config))
+
+        start = time.perf_counter()
+        chunks = search_similar_chunks(
+            query_embedding, limit=max(ks) * CHUNK_OVERSAMPLE, collection_name=collection_name
+        )
+        if config.rerank:
+            chunks, reranked = rerank_chunks(
+                labelled.query, chunks, timeout_ms=config.rerank_timeout_ms
+            )
+            rerank_fallbacks += not reranked
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = rank_articles(chunks)
+        reciprocal_ranks.append(reciprocal_rank(ranked, relevant))
+        for k in ks:
+            recalls[k].append(recall_at_k(ranked, relevant, k))
+            ndcgs[k].append(ndcg_at_k(ranked, relevant, k))
+
+    bytes_per_dim = 1 if config.quantization == "int8" else 4
+    qdrant.delete_collection(collection_name)
+    metrics = {
+        **{f"recall@{k}": round(statistics.mean(recalls[k]), 4) for k in ks},
+        "mrr": round(statistics.mean(reciprocal_ranks), 4),
+        **{f"ndcg@{k}": round(statistics.mean(ndcgs[k]), 4) for k in ks},
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "points": points,
+        "vector_bytes_estimate": points * config.dim * bytes_per_dim,
+    }
+    if config.rerank:
+        metrics["rerank_fallbacks"] = rerank_fallbacks
+    return metrics
+
+
+def compare_to_baseline(
+    results: dict[str, dict[str, float]],
+) -> dict[str, dict[str, float]]:
+    baseline_name, baseline = next(iter(results.items()))
+    return {
+        name: {
+            metric: round(value - baseline[metric], 4)
+            for metric, value in metrics.items()
+            if metric in baseline
+        }
+        for name, metrics in results.items()
+        if name != baseline_name
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("feeds", nargs="*", type=Path)
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES)
+    parser.add_argument("--configs", type=Path, help="JSON list of retrieval configurations")
+    parser.add_argument("--k", default="1,3,5", help="Comma separated cutoffs")
+    parser.add_argument("--qdrant-url", help="Evaluate against a Qdrant server")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    eval_set = EvalSet.model_validate(json.loads(args.queries.read_text()))
+    articles = load_feed_articles(args.feeds or default_feed_paths()) + eval_set.articles
+    queries = eval_set.queries
+    configs = (
+        [RetrievalConfig.model_validate(c) for c in json.loads(args.configs.read_text())]
+        if args.configs
+        else DEFAULT_CONFIGS
+    )
+    ks = [int(k) for k in args.k.split(",")]
+    if any(config.rerank for config in configs) and get_cross_encoder() is None:
+        logger.warning("Skipping rerank configurations, the cross-encoder is not available")
+        configs = [config for config in configs if not config.rerank]
+
+    if not args.qdrant_url and any(config.quantization for config in configs):
+        logger.warning(
+            "The local Qdrant store ignores quantization, int8 configurations score as float32"
+        )
+
+    known_urls = {article.url for article in articles}
+    unlabelled = {url for q in queries for url in q.relevant_urls} - known_urls
+    if unlabelled:
+        logger.warning("Relevant URLs missing from the corpus", urls=sorted(unlabelled))
+
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="gossip-eval-") as qdrant_path:
+        client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else None
+        set_qdrant_client(client or QdrantClient(path=qdrant_path))
+        try:
+            for config in configs:
+                results[config.name] = evaluate_config(config, articles, queries, ks)
+                logger.info("Retrieval evaluation", config=config.name, **results[config.name])
+        finally:
+            set_qdrant_client(None)
+
+    changes = compare_to_baseline(results)
+    for name, change in changes.items():
+        logger.info("Change against baseline", config=name, **change)
+
+    report = {
+        "meta": {
+            "articles": len(articles),
+            "queries": len(queries),
+            "k": ks,
+            "qdrant": args.qdrant_url or "local",
+            "quantization_applied": args.qdrant_url is not None,
+            "configs": [config.model_dump() for config in configs],
+        },
+        "results": results,
+        "changes": changes,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    logger.info("Saved retrieval evaluation", path=str(args.output))
+
+
+if __name__ == "__main__":
+    main()
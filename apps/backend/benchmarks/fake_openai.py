@@ -0,0 +1,201 @@
+"""Deterministic local stand-ins for the OpenAI embeddings and chat APIs.
+
+Embeddings are hashed bags of accent-folded words, so texts sharing words get
+close vectors and retrieval results stay meaningful without network access.
+The same text always gets the same vector, across processes and machines, and
+requesting fewer ``dimensions`` keeps its leading components, as the
+text-embedding-3 models do.
+Chat completions echo a canned answer after a configurable time to first
+token and per-token delay, streamed or not.
+"""
+
+import hashlib
+import re
+import sys
+import time
+import unicodedata
+from collections.abc import Iterator
+from functools import lru_cache
+
+import numpy as np
+from openai.types import CompletionUsage, CreateEmbeddingResponse, Embedding
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+from openai.types.create_embedding_response import Usage
+
+from src.openai_client import set_openai_client
+from src.qdrant_client import EMBEDDING_DIM
+from src.rate_limiter import chat_rate_limiter, embedding_rate_limiter
+
+FAKE_ANSWER = (
+    "D'après les articles, les rumeurs vont bon train, mais rien n'est confirmé pour "
+    "l'instant. Restez connectés pour la suite de ce feuilleton !"
+)
+
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return WORD_RE.findall(folded)
+
+
+@lru_cache(maxsize=65536)
+def token_feature(token: str, dim: int) -> tuple[int, float]:
+    # blake2b rather than hash(), which is salted per process
+    value = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in tokenize(text):
+        idx, sign = token_feature(token, dim)
+        vector[idx] += sign
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        # Cosine distance is undefined for the zero vector
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+def shorten(vector: np.ndarray, dimensions: int | None) -> np.ndarray:
+    # Like text-embedding-3 with dimensions: keep the leading components, renormalized
+    if not dimensions or dimensions >= len(vector):
+        return vector
+    short = vector[:dimensions]
+    norm = np.linalg.norm(short)
+    if norm == 0:
+        short = np.zeros(dimensions, dtype=np.float32)
+        short[0] = 1.0
+        return short
+    return short / norm
+
+
+class FakeEmbeddings:
+    def __init__(self, dim: int = EMBEDDING_DIM, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def create(
+        self, input: str | list[str], model: str, dimensions: int | None = None, **kwargs
+    ) -> CreateEmbeddingResponse:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        texts = [input] if isinstance(input, str) else input
+        token_count = sum(len(tokenize(text)) for text in texts)
+        return CreateEmbeddingResponse.model_construct(
+            data=[
+                Embedding.model_construct(
+                    embedding=shorten(fake_embedding(text, self.dim), dimensions).tolist(),
+                    index=idx,
+                    object="embedding",
+                )
+                for idx, text in enumerate(texts)
+            ],
+            model=model,
+            object="list",
+            usage=Usage.model_construct(prompt_tokens=token_count, total_tokens=token_count),
+        )
+
+
+class FakeChatCompletions:
+    def __init__(
+        self,
+        first_token_latency: float = 0.0,
+        token_latency: float = 0.0,
+        answer: str = FAKE_ANSWER,
+    ):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.answer = answer
+        self.calls = 0
+
+    def create(
+        self, model: str, messages: list[dict], stream: bool = False, **kwargs
+    ) -> ChatCompletion | Iterator[ChatCompletionChunk]:
+        self.calls += 1
+        tokens = self.answer.split(" ")
+        prompt_tokens = sum(len(tokenize(message["content"])) for message in messages)
+        usage = CompletionUsage.model_construct(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(tokens),
+            total_tokens=prompt_tokens + len(tokens),
+        )
+        if stream:
+            return self._stream(model, tokens)
+
+        time.sleep(self.first_token_latency + self.token_latency * len(tokens))
+        return ChatCompletion.model_construct(
+            id=f"chatcmpl-fake-{self.calls}",
+            choices=[
+                Choice.model_construct(
+                    finish_reason="stop",
+                    index=0,
+                    message=ChatCompletionMessage.model_construct(
+                        role="assistant", content=self.answer
+                    ),
+                )
+            ],
+            created=int(time.time()),
+            model=model,
+            object="chat.completion",
+            usage=usage,
+        )
+
+    def _stream(self, model: str, tokens: list[str]) -> Iterator[ChatCompletionChunk]:
+        time.sleep(self.first_token_latency)
+        for idx, token in enumerate(tokens):
+            if idx:
+                time.sleep(self.token_latency)
+            yield ChatCompletionChunk.model_construct(
+                id=f"chatcmpl-fake-{self.calls}",
+                choices=[
+                    ChunkChoice.model_construct(
+                        delta=ChoiceDelta.model_construct(
+                            content=token if idx == 0 else f" {token}"
+                        ),
+                        index=0,
+                        finish_reason="stop" if idx == len(tokens) - 1 else None,
+                    )
+                ],
+                created=int(time.time()),
+                model=model,
+                object="chat.completion.chunk",
+            )
+
+
+class FakeChat:
+    def __init__(self, completions: FakeChatCompletions):
+        self.completions = completions
+
+
+class FakeOpenAI:
+    def __init__(
+        self,
+        dim: int = EMBEDDING_DIM,
+        embedding_latency: float = 0.0,
+        first_token_latency: float = 0.0,
+        token_latency: float = 0.0,
+    ):
+        self.embeddings = FakeEmbeddings(dim, embedding_latency)
+        self.chat = FakeChat(FakeChatCompletions(first_token_latency, token_latency))
+
+    def close(self) -> None:
+        pass
+
+
+def install_fake_openai(client: FakeOpenAI) -> None:
+    set_openai_client(client)
+    # The fake backend has no quota, do not pace it like the real API
+    for controller in (embedding_rate_limiter, chat_rate_limiter):
+        controller.requests_per_minute = sys.maxsize
+        controller.tokens_per_minute = sys.maxsize
@@ -1,15 +1,82 @@
-from fastapi import FastAPI
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from starlette.routing import Match
 
-from src.embed import get_recent_articles, process_all_articles
+from src.admission import (
+    QueryRejectedError,
+    admit_query,
+    degrade_to_search_enabled,
+    query_admission,
+)
+from src.embed import IngestionProgress, get_recent_articles, process_all_articles
+from src.facets import get_facet_index
+from src.html_text import close_process_pool
+from src.http_cache import cached_json_response
+from src.http_client import close_http_client
+from src.jobs import IngestionJobManager, JobAlreadyRunningError
 from src.logger import get_logger, setup_logging
-from src.rag import answer_query
+from src.metrics import HTTP_REQUEST_SECONDS, current_endpoint, render_metrics
+from src.openai_client import close_openai_client
+from src.qdrant_client import close_qdrant_client, get_qdrant_client
+from src.rag import (
+    MAX_BATCH_QUERIES,
+    RECENCY_HALF_LIFE_HOURS,
+    answer_queries,
+    answer_query,
+    search_articles,
+    search_articles_batch,
+)
+from src.related import ArticleNotFoundError, find_related_articles
+from src.reranker import close_rerank_executor, get_cross_encoder, rerank_enabled
+from src.scheduler import FeedScheduler, scheduler_enabled
+from src.suggest import get_suggest_index
+from src.tracing import DEBUG_TIMING_HEADER, TRACE_ID_HEADER, start_trace
+from src.trending import get_story_clusters
 
 setup_logging()
 logger = get_logger(__name__)
 
-app = FastAPI(title="Gossip API", version="1.0.0")
+TRACED_ENDPOINTS = {"/query", "/query/batch", "/search"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are built lazily on first use; open the local Qdrant store up front since
+    # every read endpoint needs it, OpenAI and Linkup clients wait for their first call
+    start = time.perf_counter()
+    get_qdrant_client()
+    logger.info("Opened Qdrant store", elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+    if rerank_enabled():
+        # Loading the model can take seconds, keep it out of the first request's budget
+        get_cross_encoder()
+
+    scheduler: FeedScheduler | None = None
+    if scheduler_enabled():
+        scheduler = FeedScheduler.from_feed_sources()
+        scheduler.start()
+
+    yield
+
+    if scheduler is not None:
+        await scheduler.stop()
+    query_admission.close()
+    close_openai_client()
+    close_rerank_executor()
+    close_process_pool()
+    close_http_client()
+    close_qdrant_client()
+
+
+app = FastAPI(title="Gossip API", version="1.0.0", lifespan=lifespan)
 
 logger.info("Starting Gossip API", version="1.0.0")
 
@@ -22,41 +89,277 @@ app.add_middleware(
 )
 
 
+def resolve_endpoint(request: Request) -> str:
+    # Route templates keep label cardinality bounded (/process-articles/{job_id})
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+def debug_timing_enabled(request: Request) -> bool:
+    if os.getenv("DEBUG_TIMING_HEADER", "false").lower() in ("1", "true", "yes"):
+        return True
+    return request.headers.get(DEBUG_TIMING_HEADER, "").lower() in ("1", "true", "yes")
+
+
+# Registered before the metrics middleware so it runs inside it, with the endpoint resolved
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    endpoint = current_endpoint.get()
+    if endpoint not in TRACED_ENDPOINTS:
+        return await call_next(request)
+
+    with start_trace(endpoint, method=request.method) as trace:
+        response = await call_next(request)
+
+    response.headers[TRACE_ID_HEADER] = trace.trace_id
+    if debug_timing_enabled(request):
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    endpoint = resolve_endpoint(request)
+    token = current_endpoint.set(endpoint)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(
+            endpoint=endpoint, method=request.method, status=str(status)
+        ).observe(time.perf_counter() - start)
+        current_endpoint.reset(token)
+
+
+@app.get("/metrics")
+async def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 
+def run_ingestion(progress: IngestionProgress):
+    return process_all_articles(progress=progress)
+
+
+ingestion_jobs = IngestionJobManager(run_fn=run_ingestion)
+
+
 @app.post("/process-articles")
 async def process_articles():
     try:
-        articles = process_all_articles()
-        return {"status": "success", "articles": articles}
+        job = ingestion_jobs.submit()
+        return {"status": "success", "job_id": job.id, "job": job.model_dump()}
+    except JobAlreadyRunningError as e:
+        return {"status": "error", "message": str(e), "job_id": e.job_id}
     except Exception as e:
-        logger.error("Error processing articles", error=str(e), exc_info=True)
+        logger.error("Error starting ingestion job", error=str(e), exc_info=True)
         return {"status": "error", "message": str(e)}
 
 
+@app.get("/process-articles/{job_id}")
+async def get_ingestion_job(job_id: str):
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Ingestion job {job_id} not found"}
+    return {"status": "success", "job": job.model_dump()}
+
+
 @app.get("/articles")
-async def get_articles(limit: int = 100):
+async def get_articles(request: Request, limit: int = 100):
+    def build() -> dict:
+        try:
+            articles = get_recent_articles(limit=limit)
+            return {"status": "success", "articles": articles}
+        except Exception as e:
+            logger.error("Error fetching articles", error=str(e), exc_info=True)
+            return {"status": "error", "message": str(e), "articles": []}
+
+    return await cached_json_response(request, ("articles", limit), build)
+
+
+@app.get("/articles/related")
+async def related_articles(url: str | None = None, id: str | None = None, limit: int = 5):
+    if not url and not id:
+        return {"status": "error", "message": "Either url or id is required", "articles": []}
     try:
-        articles = get_recent_articles(limit=limit)
+        articles = await run_in_threadpool(find_related_articles, url=url, point_id=id, limit=limit)
         return {"status": "success", "articles": articles}
+    except ArticleNotFoundError as e:
+        return {"status": "error", "message": str(e), "articles": []}
     except Exception as e:
-        logger.error("Error fetching articles", error=str(e), exc_info=True)
+        logger.error("Error finding related articles", error=str(e), exc_info=True)
         return {"status": "error", "message": str(e), "articles": []}
 
 
+@app.get("/facets")
+async def facets():
+    try:
+        # Reloading an index saved by another process reads it from disk
+        index = await run_in_threadpool(get_facet_index)
+        return {"status": "success", **index.facets()}
+    except Exception as e:
+        logger.error("Error fetching facets", error=str(e), exc_info=True)
+        return {"status": "error", "message": str(e), "sources": {}, "categories": {}}
+
+
+@app.get("/suggest")
+async def suggest(q: str = "", limit: int = Query(default=10, ge=1, le=50)):
+    try:
+        index = await run_in_threadpool(get_suggest_index)
+        return {"status": "success", "suggestions": index.suggest(q, limit=limit)}
+    except Exception as e:
+        logger.error("Error fetching suggestions", error=str(e), exc_info=True)
+        return {"status": "error", "message": str(e), "suggestions": []}
+
+
+@app.get("/trending")
+async def trending(
+    window_hours: float = Query(default=24, gt=0), limit: int = Query(default=10, ge=1, le=50)
+):
+    try:
+        # Loads the saved clusters from disk on first use or once another process saved them
+        clusters = await run_in_threadpool(
+            lambda: get_story_clusters().trending(window_hours=window_hours, limit=limit)
+        )
+        return {"status": "success", "clusters": clusters}
+    except Exception as e:
+        logger.error("Error listing trending stories", error=str(e), exc_info=True)
+        return {"status": "error", "message": str(e), "clusters": []}
+
+
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 8
+    # Favor recent articles, the score weight halves every half_life_hours of age
+    recency: bool = False
+    half_life_hours: float = Field(default=RECENCY_HALF_LIFE_HOURS, gt=0)
+
+    def recency_half_life(self) -> float | None:
+        return self.half_life_hours if self.recency else None
+
+
+def client_id(request: Request) -> str:
+    # The peer address, behind a proxy run uvicorn with --proxy-headers so it is the client's
+    return request.client.host if request.client else "unknown"
+
+
+def rejected_response(error: QueryRejectedError, **content: Any) -> JSONResponse:
+    return JSONResponse(
+        status_code=429 if error.reason == "rate_limited" else 503,
+        content={"status": "error", "message": str(error), **content},
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
 
 
 @app.post("/query")
-async def query(request: QueryRequest):
+async def query(request: QueryRequest, http_request: Request):
     try:
-        answer = answer_query(request.query, top_k=request.top_k)
+        admitted = admit_query(client_id(http_request), degrade=degrade_to_search_enabled())
+    except QueryRejectedError as e:
+        return rejected_response(e)
+
+    half_life_hours = request.recency_half_life()
+    try:
+        if not admitted:
+            # Saturated LLM path: still answer with the matching articles, without a summary
+            results = await run_in_threadpool(
+                search_articles, request.query, top_k=request.top_k, half_life_hours=half_life_hours
+            )
+            return {
+                "status": "degraded",
+                "message": "Server is busy, returning search results without an answer",
+                "answer": None,
+                "results": results,
+            }
+
+        answer = await query_admission.run(
+            answer_query, request.query, top_k=request.top_k, half_life_hours=half_life_hours
+        )
         return {"answer": answer}
     except Exception as e:
         logger.error("Error answering query", error=str(e), exc_info=True)
         return {"status": "error", "message": str(e)}
+
+
+class BatchQueryRequest(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+    top_k: int = 8
+    answer: bool = False
+    recency: bool = False
+    half_life_hours: float = Field(default=RECENCY_HALF_LIFE_HOURS, gt=0)
+
+    def recency_half_life(self) -> float | None:
+        return self.half_life_hours if self.recency else None
+
+
+def search_and_answer_batch(request: BatchQueryRequest) -> tuple[list, list]:
+    results = search_articles_batch(
+        request.queries, top_k=request.top_k, half_life_hours=request.recency_half_life()
+    )
+    return results, answer_queries(request.queries, results)
+
+
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest, http_request: Request):
+    if request.answer:
+        try:
+            # Every answer is an LLM call, charged to the client like a /query
+            admit_query(client_id(http_request), cost=len(request.queries))
+        except QueryRejectedError as e:
+            return rejected_response(e, results=[])
+
+    try:
+        # Embedding, search and answers all block, keep them off the event loop
+        if request.answer:
+            results, answers = await query_admission.run(search_and_answer_batch, request)
+        else:
+            results = await run_in_threadpool(
+                search_articles_batch,
+                request.queries,
+                top_k=request.top_k,
+                half_life_hours=request.recency_half_life(),
+            )
+            answers = [None] * len(request.queries)
+        return {
+            "status": "success",
+            "results": [
+                {"query": query, "results": chunks, "answer": answer}
+                for query, chunks, answer in zip(request.queries, results, answers, strict=True)
+            ],
+        }
+    except Exception as e:
+        logger.error("Error answering batch query", error=str(e), exc_info=True)
+        return {"status": "error", "message": str(e), "results": []}
+
+
+@app.get("/search")
+async def search(
+    request: Request,
+    q: str,
+    top_k: int = 8,
+    recency: bool = False,
+    half_life_hours: float = Query(default=RECENCY_HALF_LIFE_HOURS, gt=0),
+):
+    def build() -> dict:
+        try:
+            results = search_articles(
+                q, top_k=top_k, half_life_hours=half_life_hours if recency else None
+            )
+            return {"status": "success", "results": results}
+        except Exception as e:
+            logger.error("Error searching articles", error=str(e), exc_info=True)
+            return {"status": "error", "message": str(e), "results": []}
+
+    # Recency scores move with the clock, those results are not reused
+    return await cached_json_response(request, None if recency else ("search", q, top_k), build)
@@ -0,0 +1,189 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from .logger import get_logger
+from .metrics import QUERY_IN_FLIGHT, QUERY_QUEUE_DEPTH, QUERY_REJECTIONS, current_endpoint
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Queries answered at once, each one holds a worker thread for its LLM call
+QUERY_MAX_IN_FLIGHT = int(os.getenv("QUERY_MAX_IN_FLIGHT", "8"))
+# Admitted queries waiting for a worker, past this new queries are rejected at once
+QUERY_MAX_QUEUE = int(os.getenv("QUERY_MAX_QUEUE", "16"))
+# Sustained queries per minute and burst size allowed to each client
+QUERY_RATE_PER_MINUTE = float(os.getenv("QUERY_RATE_PER_MINUTE", "30"))
+QUERY_BURST = float(os.getenv("QUERY_BURST", "10"))
+# Client buckets kept in memory, the least recently seen are dropped first
+QUERY_MAX_CLIENTS = int(os.getenv("QUERY_MAX_CLIENTS", "10000"))
+# Sent as Retry-After when the server is saturated
+QUERY_RETRY_AFTER_SECONDS = 1
+
+
+def degrade_to_search_enabled() -> bool:
+    return os.getenv("QUERY_DEGRADE_TO_SEARCH", "false").lower() in ("1", "true", "yes")
+
+
+class QueryRejectedError(Exception):
+    def __init__(self, reason: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# One token bucket per client, refilled continuously at rate_per_minute up to burst
+class ClientRateLimiter:
+    def __init__(
+        self,
+        rate_per_minute: float = QUERY_RATE_PER_MINUTE,
+        burst: float = QUERY_BURST,
+        max_clients: int = QUERY_MAX_CLIENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str, cost: float = 1) -> float:
+        # Returns 0 when the queries may run, otherwise the seconds until enough tokens are
+        # available; a cost above the burst drains a full bucket rather than never passing
+        if self.rate_per_minute <= 0:
+            return 0.0
+
+        rate = self.rate_per_minute / 60
+        cost = min(cost, self.burst)
+        with self._lock:
+            now = self.clock()
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * rate)
+            wait_time = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait_time = (cost - tokens) / rate
+
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait_time
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Bounded admission for LLM-backed queries: up to max_in_flight run on dedicated worker
+# threads, up to max_queue more wait for one, anything past that is rejected
+class QueryAdmission:
+    def __init__(self, max_in_flight: int = QUERY_MAX_IN_FLIGHT, max_queue: int = QUERY_MAX_QUEUE):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.admitted = 0
+        self.running = 0
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def queued(self) -> int:
+        return self.admitted - self.running
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight, thread_name_prefix="query"
+                )
+            return self._executor
+
+    def try_admit(self) -> bool:
+        with self._lock:
+            if self.admitted >= self.max_in_flight + self.max_queue:
+                return False
+            self.admitted += 1
+            QUERY_QUEUE_DEPTH.set(self.queued)
+            return True
+
+    def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            self.running += 1
+            QUERY_IN_FLIGHT.set(self.running)
+            QUERY_QUEUE_DEPTH.set(self.queued)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                QUERY_IN_FLIGHT.set(self.running)
+
+    def _release(self, _future: Future | None) -> None:
+        # Runs once the query finished or was cancelled before reaching a worker
+        with self._lock:
+            self.admitted -= 1
+            QUERY_QUEUE_DEPTH.set(self.queued)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # The caller must have been admitted; keeps the event loop free while the
+        # query waits for a worker and runs
+        context = contextvars.copy_context()
+        try:
+            future = self._get_executor().submit(context.run, self._run, fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self.running,
+                "queued": self.queued,
+            }
+
+
+query_rate_limiter = ClientRateLimiter()
+query_admission = QueryAdmission()
+
+
+def admit_query(client: str, degrade: bool = False, cost: int = 1) -> bool:
+    # Returns False when the query should be degraded to a search, raises when rejected.
+    # cost is the number of answers requested, an admitted batch takes a single slot
+    endpoint = current_endpoint.get()
+    retry_after = query_rate_limiter.acquire(client, cost)
+    if retry_after > 0:
+        QUERY_REJECTIONS.labels(endpoint=endpoint, reason="rate_limited").inc()
+        logger.warning("Query rate limited", client=client, retry_after=round(retry_after, 2))
+        raise QueryRejectedError("rate_limited", "Too many queries, slow down", retry_after)
+
+    if query_admission.try_admit():
+        return True
+
+    if degrade:
+        QUERY_REJECTIONS.labels(endpoint=endpoint, reason="degraded").inc()
+        logger.warning("Query degraded to search, server saturated", **query_admission.snapshot())
+        return False
+
+    QUERY_REJECTIONS.labels(endpoint=endpoint, reason="saturated").inc()
+    logger.warning("Query rejected, server saturated", **query_admission.snapshot())
+    raise QueryRejectedError(
+        "saturated", "Server is busy, try again shortly", QUERY_RETRY_AFTER_SECONDS
+    )
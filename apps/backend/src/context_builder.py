@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+
+from .logger import get_logger
+from .rate_limiter import CHARS_PER_TOKEN, estimate_tokens
+
+logger = get_logger(__name__)
+
+# Tokens of article context allowed in one prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Candidates fetched per requested chunk, for diversification to choose from
+CONTEXT_OVERFETCH = int(os.getenv("CONTEXT_OVERFETCH", "3"))
+# Weight of query relevance against novelty in MMR, 1 keeps the plain ranking
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+# Longest overlap between consecutive chunks, see split_text_into_chunks
+MAX_CHUNK_OVERLAP = 200
+
+
+def mmr_select(
+    relevance_scores: list[float], candidate_vectors: list[list[float]], k: int, lambda_: float
+) -> list[int]:
+    # Relevance is the search score, cosine similarity or its recency-weighted variant
+    relevance = np.asarray(relevance_scores, dtype=np.float32)
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+
+    similarity = candidates @ candidates.T
+    # Highest similarity of each candidate to the selection so far
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+
+    selected: list[int] = []
+    for _ in range(min(k, len(candidates))):
+        scores = lambda_ * relevance - (1 - lambda_) * np.maximum(redundancy, 0)
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+def join_overlapping(left: str, right: str, max_overlap: int = MAX_CHUNK_OVERLAP) -> str:
+    for size in range(min(max_overlap, len(left), len(right)), 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left}\n{right}"
+
+
+def merge_adjacent_chunks(chunks: list[dict]) -> list[dict]:
+    # A run of consecutive chunks from one article becomes a single passage, ranked
+    # like its best chunk
+    def position(idx: int) -> tuple[str, int]:
+        chunk_index = chunks[idx].get("chunk_index")
+        return chunks[idx]["article_url"], -1 if chunk_index is None else chunk_index
+
+    order = sorted(range(len(chunks)), key=position)
+    passages: list[tuple[int, dict, int | None]] = []
+    for idx in order:
+        chunk = chunks[idx]
+        chunk_index = chunk.get("chunk_index")
+        if passages and chunk_index is not None:
+            rank, passage, last_index = passages[-1]
+            if (
+                last_index is not None
+                and passage["article_url"] == chunk["article_url"]
+                and chunk_index == last_index + 1
+            ):
+                passage["text"] = join_overlapping(passage["text"], chunk["text"])
+                passage["score"] = max(passage["score"], chunk["score"])
+                passages[-1] = (min(rank, idx), passage, chunk_index)
+                continue
+        passage = {key: value for key, value in chunk.items() if key != "vector"}
+        passages.append((idx, passage, chunk_index))
+
+    return [passage for _, passage, _ in sorted(passages, key=lambda item: item[0])]
+
+
+def pack_context(passages: list[dict], token_budget: int) -> list[dict]:
+    packed: list[dict] = []
+    used = 0
+    for passage in passages:
+        tokens = estimate_tokens(passage["text"])
+        if used + tokens > token_budget:
+            # Smaller passages further down may still fit
+            continue
+        packed.append(passage)
+        used += tokens
+
+    if not packed and passages:
+        # Always keep the best passage, cut to the budget
+        best = dict(passages[0])
+        best["text"] = best["text"][: token_budget * CHARS_PER_TOKEN]
+        packed.append(best)
+    return packed
+
+
+def build_context(
+    candidates: list[dict],
+    top_k: int,
+    diversify: bool = True,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    lambda_: float = MMR_LAMBDA,
+) -> list[dict]:
+    selected = candidates[:top_k]
+    if diversify and len(candidates) > top_k and "vector" in candidates[0]:
+        order = mmr_select(
+            [chunk["score"] for chunk in candidates],
+            [chunk["vector"] for chunk in candidates],
+            top_k,
+            lambda_,
+        )
+        selected = [candidates[idx] for idx in order]
+
+    context = pack_context(merge_adjacent_chunks(selected), token_budget)
+
+    # Measured against the plain top_k ranking pasted verbatim
+    baseline_tokens = sum(estimate_tokens(chunk["text"]) for chunk in candidates[:top_k])
+    context_tokens = sum(estimate_tokens(passage["text"]) for passage in context)
+    logger.info(
+        "Built query context",
+        candidates=len(candidates),
+        selected=len(selected),
+        passages=len(context),
+        context_tokens=context_tokens,
+        baseline_tokens=baseline_tokens,
+        tokens_saved=baseline_tokens - context_tokens,
+    )
+    return context
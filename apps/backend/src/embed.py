@@ -1,17 +1,81 @@
+import argparse
+import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from openai import OpenAI
-from qdrant_client.models import PointStruct
+from pydantic import BaseModel, Field
+from qdrant_client.models import FieldCondition, Filter, MatchAny, PointStruct
 
+from .facets import get_facet_index
+from .feed_cache import FeedCache
+from .index_cache import index_version
+from .linkup_collector import LinkupQuery, collect_articles_from_fanout, normalize_url
 from .logger import get_logger
+from .metrics import (
+    CHUNKING_SECONDS,
+    EMBEDDING_BATCH_INPUTS,
+    EMBEDDING_REQUEST_SECONDS,
+    QDRANT_OPERATION_SECONDS,
+    current_endpoint,
+    record_tokens,
+)
+from .openai_client import get_openai_client
 from .qdrant_client import COLLECTION_NAME, ensure_collection_exists, get_qdrant_client
-from .rss_collector import Article, collect_articles_from_feeds
+from .rate_limiter import embedding_rate_limiter, estimate_tokens
+from .rss_collector import (
+    DEFAULT_FEED_FETCHER,
+    Article,
+    FeedFetcher,
+    FeedItem,
+    FeedResult,
+    collect_feed,
+    collect_feeds,
+    feed_sources,
+    update_feed_cache,
+)
+from .run_journal import RunJournal
+from .suggest import get_suggest_index
+from .trending import get_story_clusters
 
 logger = get_logger(__name__)
 
-openai_client = OpenAI()
-qdrant = get_qdrant_client()
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Inputs per embeddings request; OpenAI accepts up to 2048
+EMBEDDING_BATCH_SIZE = 64
+# Articles embedded concurrently; the rate limit controller decides how many calls are in flight
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "8"))
+
+# Pseudo feed the Linkup fan-out results are ingested under
+LINKUP_FEED_URL = "linkup:fanout"
+
+# Serializes ingestion runs so they never race on the feed cache
+ingestion_lock = threading.Lock()
+# The local Qdrant store is not safe for concurrent writers
+qdrant_write_lock = threading.Lock()
+
+
+class IngestionProgress(BaseModel):
+    feeds_total: int = Field(description="Feeds to fetch in this run", default=0)
+    feeds_fetched: int = Field(description="Feeds fetched so far", default=0)
+    feeds_failed: int = Field(description="Feeds that could not be fetched", default=0)
+    articles_total: int = Field(description="New articles to embed", default=0)
+    articles_embedded: int = Field(description="Articles embedded and stored", default=0)
+    articles_failed: int = Field(description="Articles that could not be stored", default=0)
+    articles_skipped: int = Field(description="Articles with no text to embed", default=0)
+    chunks_embedded: int = Field(description="Chunks embedded and stored", default=0)
+    articles_resumed: int = Field(
+        description="Articles already stored by the interrupted run being resumed", default=0
+    )
+    articles_redone: int = Field(
+        description="Articles the interrupted run was midway through, embedded again", default=0
+    )
+
+    def record_feed(self, result: FeedResult) -> None:
+        self.feeds_fetched += 1
+        self.feeds_failed += int(result.failed)
+        self.articles_total += result.new_items
 
 
 def split_text_into_chunks(text: str, chunk_size: int = 1500, overlap: int = 200) -> list[dict]:
@@ -30,15 +94,72 @@ def split_text_into_chunks(text: str, chunk_size: int = 1500, overlap: int = 200
     return chunks
 
 
-def embed_text(text: str) -> list[float]:
-    response = openai_client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small",
-    )
+def _create_embeddings(inputs: str | list[str], dimensions: int | None = None) -> Any:
+    batch = [inputs] if isinstance(inputs, str) else inputs
+    endpoint = current_endpoint.get()
+    EMBEDDING_BATCH_INPUTS.labels(endpoint=endpoint).observe(len(batch))
+
+    with EMBEDDING_REQUEST_SECONDS.labels(endpoint=endpoint).time():
+        response = embedding_rate_limiter.call(
+            lambda: get_openai_client().embeddings.create(
+                input=inputs,
+                model=EMBEDDING_MODEL,
+                # Shortened vectors, only supported by the text-embedding-3 models
+                **({"dimensions": dimensions} if dimensions else {}),
+            ),
+            tokens=sum(estimate_tokens(text) for text in batch),
+        )
+
+    usage = getattr(response, "usage", None)
+    record_tokens(EMBEDDING_MODEL, "embedding", getattr(usage, "total_tokens", None))
+    return response
+
+
+def embed_texts(texts: list[str], dimensions: int | None = None) -> list[list[float]]:
+    embeddings: list[list[float]] = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        response = _create_embeddings(texts[start : start + EMBEDDING_BATCH_SIZE], dimensions)
+        embeddings.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+    return embeddings
+
+
+def embed_text(text: str, dimensions: int | None = None) -> list[float]:
+    response = _create_embeddings(text, dimensions)
 
     return response.data[0].embedding
 
 
+def build_points(
+    article: Article, chunks: list[dict], embeddings: list[list[float]]
+) -> list[PointStruct]:
+    points: list[PointStruct] = []
+    for chunk_idx, (chunk, embedding) in enumerate(zip(chunks, embeddings, strict=True)):
+        # Deterministic ids make re-embedding an article overwrite its chunks
+        chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{article.url}#{chunk_idx}"))
+
+        metadata = {
+            "article_title": article.title,
+            "article_url": article.url,
+            "source": article.source,
+            "chunk_index": chunk_idx,
+            "chunk_text": chunk["text"],
+            "categories": article.categories,
+            "image_url": article.image_url,
+        }
+
+        if article.publication_date:
+            metadata["publication_date"] = article.publication_date.isoformat()
+
+        point = PointStruct(
+            id=chunk_id,
+            vector=embedding,
+            payload=metadata,
+        )
+        points.append(point)
+
+    return points
+
+
 def process_article(article: Article) -> int:
     text_to_chunk = article.content if article.content else article.description
 
@@ -50,7 +171,8 @@ def process_article(article: Article) -> int:
         )
         return 0
 
-    chunks = split_text_into_chunks(text_to_chunk)
+    with CHUNKING_SECONDS.labels(source=article.source).time():
+        chunks = split_text_into_chunks(text_to_chunk)
     logger.debug(
         "Split article into chunks",
         article_url=article.url,
@@ -60,153 +182,385 @@ def process_article(article: Article) -> int:
     if not chunks:
         return 0
 
-    points: list[PointStruct] = []
-    for chunk_idx, chunk in enumerate(chunks):
-        try:
-            chunk_id = str(uuid.uuid4())
-            embedding = embed_text(chunk["text"])
-
-            metadata = {
-                "article_title": article.title,
-                "article_url": article.url,
-                "source": article.source,
-                "chunk_index": chunk_idx,
-                "chunk_text": chunk["text"],
-                "categories": article.categories,
-                "image_url": article.image_url,
-            }
+    # Raises once retries are exhausted so the article is retried instead of losing chunks
+    embeddings = embed_texts([chunk["text"] for chunk in chunks])
+    points = build_points(article, chunks, embeddings)
 
-            if article.publication_date:
-                metadata["publication_date"] = article.publication_date.isoformat()
+    try:
+        with (
+            qdrant_write_lock,
+            QDRANT_OPERATION_SECONDS.labels(
+                operation="upsert", endpoint=current_endpoint.get()
+            ).time(),
+        ):
+            get_qdrant_client().upsert(collection_name=COLLECTION_NAME, points=points)
+        index_version.bump()
+        logger.info(
+            "Stored article chunks in Qdrant",
+            article_url=article.url,
+            chunks_stored=len(points),
+        )
+    except Exception as e:
+        logger.error(
+            "Error storing chunks in Qdrant",
+            article_url=article.url,
+            error=str(e),
+            exc_info=True,
+        )
+        raise
 
-            point = PointStruct(
-                id=chunk_id,
-                vector=embedding,
-                payload=metadata,
-            )
-            points.append(point)
+    get_facet_index().add_article(article)
+    get_suggest_index().add_article(article)
+    try:
+        get_story_clusters().add_article(article, embeddings)
+    except Exception as e:
+        # Trending stories are a derived view, never fail ingestion over them
+        logger.error(
+            "Error clustering article", article_url=article.url, error=str(e), exc_info=True
+        )
 
-        except Exception as e:
-            logger.warning(
-                "Error processing chunk",
-                article_url=article.url,
-                chunk_index=chunk_idx,
-                error=str(e),
-                exc_info=True,
-            )
-            continue
+    return len(points)
 
-    if points:
-        try:
-            qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
-            logger.info(
-                "Stored article chunks in Qdrant",
-                article_url=article.url,
-                chunks_stored=len(points),
-            )
-        except Exception as e:
-            logger.error(
-                "Error storing chunks in Qdrant",
-                article_url=article.url,
-                error=str(e),
-                exc_info=True,
-            )
-            raise
 
-    return len(points)
+def article_summary(payload: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "title": payload.get("article_title", ""),
+        "url": payload.get("article_url", ""),
+        "source": payload.get("source", ""),
+        "description": payload.get("chunk_text", "")[:200] + "...",
+        "categories": payload.get("categories", []),
+        "image_url": payload.get("image_url"),
+        "publication_date": payload.get("publication_date"),
+    }
 
 
 def get_recent_articles(limit: int = 100) -> list[dict[str, Any]]:
-    try:
-        scroll_result = qdrant.scroll(
+    # Errors are raised so callers never mistake a failed scan for an empty collection
+    with QDRANT_OPERATION_SECONDS.labels(
+        operation="scroll", endpoint=current_endpoint.get()
+    ).time():
+        scroll_result = get_qdrant_client().scroll(
             collection_name=COLLECTION_NAME,
             limit=limit * 5,  # Fetch more to account for duplicates
             with_payload=True,
             with_vectors=False,
         )
 
-        points = scroll_result[0] if scroll_result else []
+    points = scroll_result[0] if scroll_result else []
 
-        seen_urls: set[str] = set()
-        articles: list[dict[str, Any]] = []
+    seen_urls: set[str] = set()
+    articles: list[dict[str, Any]] = []
 
-        for point in points:
-            if not point.payload:
-                continue
+    for point in points:
+        if not point.payload:
+            continue
 
-            article_url = point.payload.get("article_url", "")
-            if article_url and article_url not in seen_urls:
-                seen_urls.add(article_url)
+        article_url = point.payload.get("article_url", "")
+        if article_url and article_url not in seen_urls:
+            seen_urls.add(article_url)
 
-                article_data = {
-                    "title": point.payload.get("article_title", ""),
-                    "url": article_url,
-                    "source": point.payload.get("source", ""),
-                    "description": point.payload.get("chunk_text", "")[:200] + "...",
-                    "categories": point.payload.get("categories", []),
-                    "image_url": point.payload.get("image_url"),
-                    "publication_date": point.payload.get("publication_date"),
-                }
+            # Any chunk id identifies the article, e.g. for /articles/related
+            articles.append({"id": str(point.id), **article_summary(point.payload)})
 
-                articles.append(article_data)
+            if len(articles) >= limit:
+                break
 
-                if len(articles) >= limit:
-                    break
+    logger.info("Fetched recent articles", count=len(articles))
+    return articles
 
-        logger.info("Fetched recent articles", count=len(articles))
-        return articles
 
-    except Exception as e:
-        logger.error(
-            "Error fetching recent articles",
-            error=str(e),
-            exc_info=True,
-        )
-        return []
+def stored_article_vectors(urls: list[str]) -> dict[str, list[list[float]]]:
+    # Chunk vectors already in the collection, per article, so nothing is re-embedded
+    vectors: dict[str, list[list[float]]] = {}
+    if not urls:
+        return vectors
 
+    offset = None
+    while True:
+        points, offset = get_qdrant_client().scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=Filter(
+                must=[FieldCondition(key="article_url", match=MatchAny(any=urls))]
+            ),
+            limit=1000,
+            offset=offset,
+            with_payload=["article_url"],
+            with_vectors=True,
+        )
+        for point in points:
+            if point.payload and point.vector is not None:
+                vectors.setdefault(point.payload["article_url"], []).append(point.vector)
+        if offset is None:
+            return vectors
 
-def process_all_articles() -> list[Article]:
-    ensure_collection_exists()
 
-    logger.info("Starting article collection and processing")
-    articles = collect_articles_from_feeds()
+def restore_resumed_articles(articles: list[Article]) -> None:
+    # Articles stored before an interrupted run never reach process_article again, re-add
+    # them to the indexes that are only saved once a run completes
+    for article in articles:
+        get_facet_index().add_article(article)
+        get_suggest_index().add_article(article)
 
-    if not articles:
-        logger.warning("No articles collected from RSS feeds")
-        return []
+    try:
+        clusters = get_story_clusters()
+        missing = [article for article in articles if article.url not in clusters]
+        vectors = stored_article_vectors([article.url for article in missing])
+        for article in missing:
+            clusters.add_article(article, vectors.get(article.url, []))
+    except Exception as e:
+        logger.error("Error clustering resumed articles", error=str(e), exc_info=True)
+
+
+def unique_articles(feed_results: list[FeedResult]) -> list[Article]:
+    # An item listed by several feeds is embedded and counted once, under the first feed
+    articles: dict[str, Article] = {}
+    for result in feed_results:
+        for article in result.articles:
+            articles.setdefault(article.url, article)
+    return list(articles.values())
+
+
+def process_feed_results(
+    feed_results: list[FeedResult],
+    feed_cache: FeedCache,
+    progress: IngestionProgress | None = None,
+    journal: RunJournal | None = None,
+) -> dict[str, Any]:
+    articles = unique_articles(feed_results)
+    duplicate_articles = sum(result.new_items for result in feed_results) - len(articles)
+    if progress is not None:
+        progress.articles_total -= duplicate_articles
+
+    feed_stats = [
+        {
+            "feed_url": result.feed_url,
+            "unchanged": result.unchanged,
+            "new_items": result.new_items,
+            "failed": result.failed,
+        }
+        for result in feed_results
+    ]
 
     total_chunks = 0
     articles_processed = 0
     articles_failed = 0
+    # Articles without text are seen like any other, they are not retried
+    articles_skipped = 0
+    failed_urls: set[str] = set()
 
+    pending: list[Article] = []
+    resumed: list[Article] = []
     for article in articles:
-        try:
-            chunks_count = process_article(article)
-            if chunks_count > 0:
-                total_chunks += chunks_count
+        if journal is not None and article.url in journal.stored:
+            total_chunks += journal.stored[article.url]
+            if journal.stored[article.url] > 0:
                 articles_processed += 1
+                resumed.append(article)
             else:
-                articles_failed += 1
+                articles_skipped += 1
+        else:
+            pending.append(article)
+    restore_resumed_articles(resumed)
+
+    def process_journaled(article: Article) -> int:
+        if journal is not None:
+            journal.article_started(article.url)
+        chunks_count = process_article(article)
+        if journal is not None:
+            journal.article_stored(article.url, chunks_count)
+        return chunks_count
+
+    # Counters and progress are only updated from this thread
+    with ThreadPoolExecutor(max_workers=INGESTION_WORKERS) as executor:
+        futures = [(article, executor.submit(process_journaled, article)) for article in pending]
+        try:
+            for article, future in futures:
+                try:
+                    chunks_count = future.result()
+                    if chunks_count > 0:
+                        total_chunks += chunks_count
+                        articles_processed += 1
+                        if progress is not None:
+                            progress.articles_embedded += 1
+                            progress.chunks_embedded += chunks_count
+                    else:
+                        articles_skipped += 1
+                        if progress is not None:
+                            progress.articles_skipped += 1
+                except Exception as e:
+                    logger.error(
+                        "Error processing article",
+                        article_url=article.url,
+                        error=str(e),
+                        exc_info=True,
+                    )
+                    articles_failed += 1
+                    failed_urls.add(article.url)
+                    if journal is not None:
+                        journal.article_failed(article.url)
+                    if progress is not None:
+                        progress.articles_failed += 1
+        except BaseException:
+            # Stop picking up new articles on interrupts; the journal lets the next run resume
+            for _, future in futures:
+                future.cancel()
+            raise
+
+    for result in feed_results:
+        update_feed_cache(feed_cache, result, failed_urls)
+    feed_cache.save()
+
+    if articles_processed:
+        get_facet_index().save()
+        get_suggest_index().save()
+        try:
+            get_story_clusters().end_run()
         except Exception as e:
-            logger.error(
-                "Error processing article",
-                article_url=article.url,
-                error=str(e),
-                exc_info=True,
-            )
-            articles_failed += 1
-            continue
+            logger.error("Error updating trending stories", error=str(e), exc_info=True)
 
-    stats = {
+    return {
         "articles_processed": articles_processed,
         "total_chunks": total_chunks,
         "articles_failed": articles_failed,
+        "articles_skipped": articles_skipped,
         "total_articles": len(articles),
+        "duplicate_articles": duplicate_articles,
+        "feeds_unchanged": sum(result.unchanged for result in feed_results),
+        "feeds_failed": sum(result.failed for result in feed_results),
+        "new_items": sum(result.new_items for result in feed_results),
+        "feed_stats": feed_stats,
     }
 
+
+def ingest_feed(
+    feed_url: str, source: str, fetcher: FeedFetcher = DEFAULT_FEED_FETCHER
+) -> dict[str, Any]:
+    ensure_collection_exists()
+
+    # A poll never waits behind another run, so it can't hold up the scheduler's shutdown
+    if not ingestion_lock.acquire(blocking=False):
+        logger.info("Skipping feed, an ingestion run is in progress", feed_url=feed_url)
+        return {"skipped": True}
+    try:
+        feed_cache = FeedCache.load()
+        result = collect_feed(feed_url, source, feed_cache.get(feed_url), fetcher)
+        stats = process_feed_results([result], feed_cache)
+    finally:
+        ingestion_lock.release()
+
+    logger.info("Finished ingesting feed", feed_url=feed_url, **stats)
+    return stats
+
+
+def stored_article_urls(urls: list[str]) -> set[str]:
+    if not urls:
+        return set()
+
+    stored: set[str] = set()
+    offset = None
+    while True:
+        points, offset = get_qdrant_client().scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=Filter(
+                must=[FieldCondition(key="article_url", match=MatchAny(any=urls))]
+            ),
+            limit=1000,
+            offset=offset,
+            with_payload=["article_url"],
+            with_vectors=False,
+        )
+        stored.update(point.payload["article_url"] for point in points if point.payload)
+        if offset is None:
+            return stored
+
+
+def ingest_linkup_fanout(queries: list[LinkupQuery] | None = None) -> dict[str, Any]:
+    ensure_collection_exists()
+
+    # Merged and deduped across queries, then against the collection, before anything is embedded.
+    # Fan-out articles are stored under their normalized URL; feed articles keep the URL they
+    # were stored under, so both spellings are looked up and compared normalized.
+    collected, report = collect_articles_from_fanout(queries)
+    articles = [
+        article.model_copy(update={"url": normalize_url(article.url)}) for article in collected
+    ]
+    candidates = {article.url for article in articles} | {article.url for article in collected}
+    stored = {normalize_url(url) for url in stored_article_urls(sorted(candidates))}
+    result = FeedResult(
+        feed_url=LINKUP_FEED_URL,
+        source="linkup",
+        items=[
+            FeedItem(guid=article.url, article=article)
+            for article in articles
+            if article.url not in stored
+        ],
+        total_items=len(articles),
+    )
+
+    with ingestion_lock:
+        stats = process_feed_results([result], FeedCache.load())
+
+    stats.update(
+        already_stored=len(stored),
+        search_wall_time_ms=report["wall_time_ms"],
+        search_queries=report["queries"],
+    )
+    logger.info(
+        "Finished ingesting linkup fan-out",
+        articles_processed=stats["articles_processed"],
+        already_stored=len(stored),
+        unique_articles=report["unique_articles"],
+        search_wall_time_ms=report["wall_time_ms"],
+    )
+    return stats
+
+
+def process_all_articles(progress: IngestionProgress | None = None) -> list[Article]:
+    ensure_collection_exists()
+
+    logger.info("Starting article collection and processing")
+    progress = progress or IngestionProgress()
+    progress.feeds_total = sum(len(config["sources"]) for config in feed_sources.values())
+
+    with ingestion_lock:
+        journal = RunJournal.load()
+        journal.start()
+        progress.articles_resumed = journal.resume_stats["articles_already_stored"]
+        progress.articles_redone = journal.resume_stats["articles_redone"]
+
+        def on_feed_collected(result: FeedResult) -> None:
+            journal.record_feed(result)
+            progress.record_feed(result)
+
+        for result in journal.feeds.values():
+            progress.record_feed(result)
+
+        feed_cache = FeedCache.load()
+        feed_results = collect_feeds(
+            feed_cache, on_feed_collected=on_feed_collected, collected=journal.feeds
+        )
+        stats = process_feed_results(feed_results, feed_cache, progress, journal)
+        journal.complete()
+        stats.update(journal.summary())
+
+    if not stats["total_articles"]:
+        logger.warning("No new articles collected from RSS feeds", **stats)
+        return []
+
     logger.info("Finished processing articles", **stats)
-    return articles
+    return unique_articles(feed_results)
 
 
 if __name__ == "__main__":
-    process_all_articles()
+    parser = argparse.ArgumentParser(description="Collect and embed articles")
+    parser.add_argument(
+        "--linkup-fanout",
+        action="store_true",
+        help="Ingest the Linkup fan-out search results instead of the RSS feeds",
+    )
+    args = parser.parse_args()
+
+    if args.linkup_fanout:
+        ingest_linkup_fanout()
+    else:
+        process_all_articles()
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from .article import Article
+from .index_cache import file_version
+from .logger import get_logger
+from .qdrant_client import COLLECTION_NAME, get_qdrant_client
+
+logger = get_logger(__name__)
+
+DEFAULT_FACET_INDEX_PATH = "facet_index.json"
+REBUILD_SCROLL_SIZE = 1000
+
+_facet_index: "FacetIndex | None" = None
+_facet_index_lock = threading.Lock()
+
+
+# Article counts per source and per category, kept up to date by ingestion so
+# reads never touch the collection
+class FacetIndex:
+    def __init__(self, path: str | Path, articles: dict[str, dict[str, Any]] | None = None):
+        self.path = Path(path)
+        self.articles: dict[str, dict[str, Any]] = {}
+        self.sources: Counter[str] = Counter()
+        self.categories: Counter[str] = Counter()
+        # Articles are added from the ingestion worker threads
+        self._lock = threading.Lock()
+        # Version of the file this index was loaded from or last saved to
+        self.loaded_version: tuple[int, int] | None = None
+        self._snapshot: dict[str, Any] | None = None
+        for url, facets in (articles or {}).items():
+            self._add(url, facets["source"], facets["categories"])
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "FacetIndex":
+        path = Path(path or os.getenv("FACET_INDEX_PATH", DEFAULT_FACET_INDEX_PATH))
+        version = file_version(path)
+        if version is None:
+            return cls(path)
+
+        try:
+            articles = json.loads(path.read_text())
+        except Exception as e:
+            logger.warning("Ignoring unreadable facet index", path=str(path), error=str(e))
+            articles = {}
+
+        index = cls(path, articles)
+        index.loaded_version = version
+        return index
+
+    def is_stale(self) -> bool:
+        # Saved by another process since it was loaded, e.g. a `python -m src.embed` run
+        return file_version(self.path) not in (None, self.loaded_version)
+
+    def _add(self, url: str, source: str, categories: list[str]) -> None:
+        previous = self.articles.get(url)
+        if previous is not None:
+            # Re-ingested articles replace their previous facets
+            self.sources.subtract([previous["source"]])
+            self.categories.subtract(previous["categories"])
+        categories = sorted(set(categories))
+        self.articles[url] = {"source": source, "categories": categories}
+        self.sources[source] += 1
+        self.categories.update(categories)
+        self._snapshot = None
+
+    def add_article(self, article: Article) -> None:
+        with self._lock:
+            self._add(article.url, article.source, article.categories or [])
+
+    def facets(self) -> dict[str, Any]:
+        # Rebuilt at most once per ingestion change, then served as is
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = {
+                    "total_articles": len(self.articles),
+                    "sources": {
+                        value: count for value, count in self.sources.most_common() if count > 0
+                    },
+                    "categories": {
+                        value: count for value, count in self.categories.most_common() if count > 0
+                    },
+                }
+            return self._snapshot
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(json.dumps(self.articles, ensure_ascii=False))
+            os.replace(tmp_path, self.path)
+            self.loaded_version = file_version(self.path)
+        logger.debug("Saved facet index", path=str(self.path), article_count=len(self.articles))
+
+
+def get_facet_index() -> FacetIndex:
+    global _facet_index
+    if _facet_index is None or _facet_index.is_stale():
+        with _facet_index_lock:
+            if _facet_index is None or _facet_index.is_stale():
+                _facet_index = FacetIndex.load(
+                    _facet_index.path if _facet_index is not None else None
+                )
+    return _facet_index
+
+
+def set_facet_index(index: FacetIndex | None) -> None:
+    global _facet_index
+    _facet_index = index
+
+
+def rebuild_facet_index() -> FacetIndex:
+    # One-off backfill for articles stored before the index existed
+    articles: dict[str, dict[str, Any]] = {}
+    offset = None
+    while True:
+        points, offset = get_qdrant_client().scroll(
+            collection_name=COLLECTION_NAME,
+            limit=REBUILD_SCROLL_SIZE,
+            offset=offset,
+            with_payload=["article_url", "source", "categories"],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            url = payload.get("article_url")
+            if url:
+                articles[url] = {
+                    "source": payload.get("source", ""),
+                    "categories": payload.get("categories") or [],
+                }
+        if offset is None:
+            break
+
+    index = FacetIndex(get_facet_index().path, articles)
+    index.save()
+    set_facet_index(index)
+    logger.info("Rebuilt facet index", article_count=len(articles))
+    return index
+
+
+if __name__ == "__main__":
+    rebuild_facet_index()
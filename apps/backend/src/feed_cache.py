@@ -0,0 +1,73 @@
+import json
+import os
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_FEED_CACHE_PATH = "feed_cache.json"
+# Feeds only expose their latest items, so older GUIDs can be forgotten
+MAX_GUIDS_PER_FEED = 1000
+
+
+class FeedCacheEntry(BaseModel):
+    etag: str | None = Field(description="ETag header of the last response", default=None)
+    last_modified: str | None = Field(
+        description="Last-Modified header of the last response", default=None
+    )
+    last_build_date: str | None = Field(
+        description="Channel lastBuildDate of the last processed feed", default=None
+    )
+    item_guids: list[str] = Field(
+        description="GUIDs of the items already processed", default_factory=list
+    )
+
+
+class FeedCache:
+    def __init__(self, path: str | Path, entries: dict[str, FeedCacheEntry] | None = None):
+        self.path = Path(path)
+        self.entries: dict[str, FeedCacheEntry] = entries or {}
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "FeedCache":
+        path = Path(path or os.getenv("FEED_CACHE_PATH", DEFAULT_FEED_CACHE_PATH))
+        if not path.exists():
+            return cls(path)
+
+        try:
+            raw_entries = json.loads(path.read_text())
+            entries = {
+                feed_url: FeedCacheEntry.model_validate(entry)
+                for feed_url, entry in raw_entries.items()
+            }
+        except Exception as e:
+            logger.warning(
+                "Ignoring unreadable feed cache",
+                path=str(path),
+                error=str(e),
+            )
+            entries = {}
+
+        return cls(path, entries)
+
+    def get(self, feed_url: str) -> FeedCacheEntry | None:
+        return self.entries.get(feed_url)
+
+    def update(self, feed_url: str, entry: FeedCacheEntry) -> None:
+        entry.item_guids = entry.item_guids[-MAX_GUIDS_PER_FEED:]
+        self.entries[feed_url] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {feed_url: entry.model_dump() for feed_url, entry in self.entries.items()},
+                ensure_ascii=False,
+            )
+        )
+        os.replace(tmp_path, self.path)
+        logger.debug("Saved feed cache", path=str(self.path), feed_count=len(self.entries))
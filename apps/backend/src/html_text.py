@@ -0,0 +1,113 @@
+import html
+import re
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+# Elements whose text is never article content (embeds, captions, widgets)
+SKIPPED_ELEMENTS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "iframe",
+    "svg",
+    "figure",
+    "figcaption",
+    "form",
+    "button",
+)
+
+# Elements that start a new paragraph for the chunker
+BLOCK_ELEMENTS = (
+    "p",
+    "div",
+    "section",
+    "article",
+    "header",
+    "footer",
+    "aside",
+    "blockquote",
+    "pre",
+    "ul",
+    "ol",
+    "li",
+    "dl",
+    "dt",
+    "dd",
+    "table",
+    "tr",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+)
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# Below this many documents a process pool costs more than it saves
+PARALLEL_MIN_ITEMS = 8
+
+_PARAGRAPH_MARK = "\x00"
+_LINE_MARK = "\x01"
+
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_SKIPPED_RE = re.compile(
+    rf"<({'|'.join(SKIPPED_ELEMENTS)})\b[^>]*?(?:/>|>.*?</\1\s*>)",
+    re.S | re.I,
+)
+_LINE_BREAK_RE = re.compile(r"<br\b[^>]*>", re.I)
+_BLOCK_RE = re.compile(rf"</?(?:{'|'.join(BLOCK_ELEMENTS)})\b[^>]*>", re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_workers = 0
+
+
+def extract_text(html_content: str | None) -> str:
+    if not html_content:
+        return ""
+
+    text = _COMMENT_RE.sub("", html_content)
+    text = _SKIPPED_RE.sub("", text)
+    text = _LINE_BREAK_RE.sub(_LINE_MARK, text)
+    text = _BLOCK_RE.sub(_PARAGRAPH_MARK, text)
+    text = html.unescape(_TAG_RE.sub("", text))
+
+    paragraphs: list[str] = []
+    for block in text.split(_PARAGRAPH_MARK):
+        lines = [" ".join(line.split()) for line in block.split(_LINE_MARK)]
+        paragraph = "\n".join(line for line in lines if line)
+        if paragraph:
+            paragraphs.append(paragraph)
+
+    return PARAGRAPH_SEPARATOR.join(paragraphs)
+
+
+def _get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _process_pool, _process_pool_workers
+    if _process_pool is None or _process_pool_workers != max_workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+        _process_pool_workers = max_workers
+    return _process_pool
+
+
+def close_process_pool() -> None:
+    global _process_pool, _process_pool_workers
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+        _process_pool_workers = 0
+
+
+def extract_texts(html_contents: Sequence[str | None], max_workers: int = 0) -> list[str]:
+    if max_workers < 2 or len(html_contents) < PARALLEL_MIN_ITEMS:
+        return [extract_text(content) for content in html_contents]
+
+    chunksize = max(1, len(html_contents) // (max_workers * 4))
+    pool = _get_process_pool(max_workers)
+    return list(pool.map(extract_text, html_contents, chunksize=chunksize))
@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections.abc import Callable, Hashable
+from functools import cache
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from .index_cache import VersionedCache
+from .logger import get_logger
+from .metrics import RESPONSE_CACHE_REQUESTS, current_endpoint
+
+logger = get_logger(__name__)
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+# Smaller bodies are sent as is, compressing them costs more than it saves
+MIN_COMPRESS_BYTES = int(os.getenv("MIN_COMPRESS_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+response_cache = VersionedCache(maxsize=RESPONSE_CACHE_SIZE)
+
+
+@cache
+def get_brotli() -> Any | None:
+    try:
+        import brotli
+    except ImportError:
+        logger.info("brotli is not installed, responses are compressed with gzip only")
+        return None
+    return brotli
+
+
+# A serialized JSON body and its digest, compressed variants are built on first use
+class EncodedResponse:
+    def __init__(self, payload: dict[str, Any]):
+        self.body = orjson.dumps(payload)
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self._encoded: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> bytes:
+        with self._lock:
+            if encoding not in self._encoded:
+                if encoding == "br":
+                    self._encoded[encoding] = get_brotli().compress(
+                        self.body, quality=BROTLI_QUALITY
+                    )
+                else:
+                    self._encoded[encoding] = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+            return self._encoded[encoding]
+
+    def etag(self, encoding: str | None) -> str:
+        # Strong ETags differ per content coding, any of them revalidates the same body
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def accepted_encoding(request: Request) -> str | None:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    if "br" in accepted and get_brotli() is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def etag_matches(request: Request, digest: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/").strip('"').split("-")[0] == digest
+        for tag in if_none_match.split(",")
+    )
+
+
+def json_response(request: Request, encoded: EncodedResponse) -> Response:
+    encoding = accepted_encoding(request) if len(encoded.body) >= MIN_COMPRESS_BYTES else None
+    # Revalidated on every use, the ETag changes as soon as the data does
+    headers = {
+        "ETag": encoded.etag(encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request, encoded.digest):
+        RESPONSE_CACHE_REQUESTS.labels(endpoint=current_endpoint.get(), result="not_modified").inc()
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(content=encoded.body, media_type="application/json", headers=headers)
+    return Response(
+        content=encoded.encoded(encoding),
+        media_type="application/json",
+        headers={**headers, "Content-Encoding": encoding},
+    )
+
+
+async def cached_json_response(
+    request: Request,
+    key: Hashable | None,
+    build: Callable[[], dict[str, Any]],
+) -> Response:
+    # Successful payloads are cached until the next ingestion bumps the index version,
+    # a key of None still gets an ETag and compression but is rebuilt every time.
+    # build embeds and queries Qdrant, so it runs on a worker thread, off the event loop
+    endpoint = current_endpoint.get()
+    encoded = response_cache.get(key) if key is not None else None
+    if encoded is not None:
+        RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="hit").inc()
+        return json_response(request, encoded)
+
+    version = response_cache.version.value
+    payload = await run_in_threadpool(build)
+    encoded = EncodedResponse(payload)
+    if key is not None and payload.get("status") == "success":
+        response_cache.set(key, encoded, version)
+        RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="miss").inc()
+    return json_response(request, encoded)
@@ -0,0 +1,52 @@
+import threading
+
+import httpx
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+USER_AGENT = "GossipBot/1.0"
+
+_http_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def create_http_client(transport: httpx.BaseTransport | None = None) -> httpx.Client:
+    return httpx.Client(
+        http2=transport is None,
+        transport=transport,
+        timeout=httpx.Timeout(15.0, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=20,
+            max_keepalive_connections=10,
+            keepalive_expiry=60.0,
+        ),
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/rss+xml, application/xml;q=0.9, */*;q=0.8",
+            "Accept-Encoding": "gzip, deflate",
+        },
+        follow_redirects=True,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        with _client_lock:
+            if _http_client is None:
+                _http_client = create_http_client()
+    return _http_client
+
+
+def set_http_client(client: httpx.Client | None) -> None:
+    global _http_client
+    if _http_client is not None and _http_client is not client:
+        _http_client.close()
+    _http_client = client
+
+
+def close_http_client() -> None:
+    set_http_client(None)
+    logger.debug("Closed HTTP client")
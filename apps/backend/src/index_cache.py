@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from pathlib import Path
+from typing import Any
+
+
+# Bumped whenever the article index changes, caches derived from it compare versions
+class IndexVersion:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+index_version = IndexVersion()
+
+
+# LRU cache whose entries are only valid at the index version they were computed at
+class VersionedCache:
+    def __init__(self, maxsize: int, version: IndexVersion = index_version):
+        self.maxsize = maxsize
+        self.version = version
+        self._entries: OrderedDict[Hashable, tuple[int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != self.version.value:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        # Callers pass the version read before computing the value, so a result
+        # computed across an index change is never served as current
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Identifies one save of a file written with os.replace, which always creates a new
+# inode, so an index loaded in memory can tell that another process saved over it
+def file_version(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
@@ -0,0 +1,139 @@
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field, computed_field
+
+from .article import Article
+from .embed import IngestionProgress
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Finished jobs kept around for status lookups
+MAX_JOB_HISTORY = 20
+
+JobStatus = Literal["running", "succeeded", "failed"]
+IngestionRunFn = Callable[[IngestionProgress], list[Article]]
+
+
+class JobAlreadyRunningError(Exception):
+    def __init__(self, job_id: str):
+        super().__init__(f"Ingestion job {job_id} is already running")
+        self.job_id = job_id
+
+
+class ArticleSummary(BaseModel):
+    title: str = Field(description="The title of the article")
+    url: str = Field(description="The URL of the article")
+    source: str = Field(description="The source of the article")
+    publication_date: datetime | None = Field(description="The published date of the article")
+
+    @classmethod
+    def from_article(cls, article: Article) -> "ArticleSummary":
+        return cls(
+            title=article.title,
+            url=article.url,
+            source=article.source,
+            publication_date=article.publication_date,
+        )
+
+
+class IngestionJob(BaseModel):
+    id: str = Field(description="The job id")
+    status: JobStatus = Field(description="The job status", default="running")
+    started_at: datetime = Field(description="When the job started")
+    finished_at: datetime | None = Field(description="When the job finished", default=None)
+    progress: IngestionProgress = Field(
+        description="Live ingestion counters", default_factory=IngestionProgress
+    )
+    articles: list[ArticleSummary] = Field(
+        description="The articles ingested by the job", default_factory=list
+    )
+    error: str | None = Field(description="The error message of a failed job", default=None)
+
+    @computed_field
+    @property
+    def elapsed_seconds(self) -> float:
+        end = self.finished_at or datetime.now(UTC)
+        return round((end - self.started_at).total_seconds(), 3)
+
+    @computed_field
+    @property
+    def articles_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return round(self.progress.articles_embedded / elapsed, 3) if elapsed else 0.0
+
+    @computed_field
+    @property
+    def chunks_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return round(self.progress.chunks_embedded / elapsed, 3) if elapsed else 0.0
+
+
+class IngestionJobManager:
+    def __init__(self, run_fn: IngestionRunFn):
+        self.run_fn = run_fn
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self._threads: dict[str, threading.Thread] = {}
+        self._running_job_id: str | None = None
+
+    def submit(self) -> IngestionJob:
+        with self._lock:
+            if self._running_job_id is not None:
+                raise JobAlreadyRunningError(self._running_job_id)
+
+            job = IngestionJob(id=uuid.uuid4().hex, started_at=datetime.now(UTC))
+            self._jobs[job.id] = job
+            self._running_job_id = job.id
+            while len(self._jobs) > MAX_JOB_HISTORY:
+                old_job_id, _ = self._jobs.popitem(last=False)
+                self._threads.pop(old_job_id, None)
+
+            thread = threading.Thread(
+                target=self._run, args=(job,), name=f"ingestion-{job.id}", daemon=True
+            )
+            self._threads[job.id] = thread
+            thread.start()
+
+        logger.info("Started ingestion job", job_id=job.id)
+        return job
+
+    def _run(self, job: IngestionJob) -> None:
+        try:
+            articles = self.run_fn(job.progress)
+            job.articles = [ArticleSummary.from_article(article) for article in articles]
+            job.status = "succeeded"
+        except Exception as e:
+            logger.error("Ingestion job failed", job_id=job.id, error=str(e), exc_info=True)
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now(UTC)
+            with self._lock:
+                self._running_job_id = None
+
+        logger.info(
+            "Finished ingestion job",
+            job_id=job.id,
+            status=job.status,
+            elapsed_seconds=job.elapsed_seconds,
+            **job.progress.model_dump(),
+        )
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        return self._jobs.get(job_id)
+
+    def running_job(self) -> IngestionJob | None:
+        job_id = self._running_job_id
+        return self._jobs.get(job_id) if job_id else None
+
+    def wait(self, job_id: str, timeout: float | None = None) -> IngestionJob | None:
+        thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+        return self.get(job_id)
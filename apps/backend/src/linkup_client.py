@@ -0,0 +1,21 @@
+import os
+import threading
+
+from linkup import LinkupClient
+
+_linkup_client: LinkupClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_linkup_client() -> LinkupClient:
+    global _linkup_client
+    if _linkup_client is None:
+        with _client_lock:
+            if _linkup_client is None:
+                _linkup_client = LinkupClient(api_key=os.getenv("LINKUP_API_KEY"))
+    return _linkup_client
+
+
+def set_linkup_client(client: LinkupClient | None) -> None:
+    global _linkup_client
+    _linkup_client = client
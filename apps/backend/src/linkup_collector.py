@@ -1,65 +1,252 @@
+import contextvars
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import urlsplit, urlunsplit
 
 from dotenv import load_dotenv
-from linkup import LinkupClient, LinkupSearchStructuredResponse
-from pydantic import BaseModel
+from linkup import LinkupSearchStructuredResponse
+from pydantic import BaseModel, Field
 
 from .article import Article
+from .linkup_client import get_linkup_client
 from .logger import get_logger
+from .suggest import get_suggest_index
 
 load_dotenv()
 
 logger = get_logger(__name__)
 
-linkup_client = LinkupClient(api_key=os.getenv("LINKUP_API_KEY"))
+LINKUP_DOMAINS = ["vsd.fr", "public.fr"]
+# Concurrent Linkup searches during a fan-out
+LINKUP_FANOUT_CONCURRENCY = int(os.getenv("LINKUP_FANOUT_CONCURRENCY", "4"))
+# Narrow queries do well with a standard search, deep ones take much longer
+LINKUP_FANOUT_DEPTH = os.getenv("LINKUP_FANOUT_DEPTH", "standard")
+# Days covered by the fan-out, searched one day at a time
+LINKUP_FANOUT_DAYS = int(os.getenv("LINKUP_FANOUT_DAYS", "7"))
+# Most covered names in the suggest index searched on their own
+LINKUP_FANOUT_CELEBRITIES = int(os.getenv("LINKUP_FANOUT_CELEBRITIES", "10"))
+# Upper bound on searches per fan-out, each one is a paid call
+LINKUP_FANOUT_MAX_QUERIES = int(os.getenv("LINKUP_FANOUT_MAX_QUERIES", "40"))
+SITE_SECTIONS = {
+    "public.fr": ["people", "couples", "royauté", "télé-réalité", "mode"],
+    "vsd.fr": ["people", "actualité", "société", "culture"],
+}
+ARTICLE_FIELDS = (
+    "Include the title, source, url, publication date, description, and content of the article."
+)
 
 
 class LinkupSearchStructuredResponseSchema(BaseModel):
     results: list[Article]
 
 
+class LinkupQuery(BaseModel):
+    label: str = Field(description="Short name of the query in reports")
+    query: str = Field(description="The search query sent to Linkup")
+    include_domains: list[str] = Field(description="Domains the search is restricted to")
+    from_date: date | None = Field(description="Earliest publication date", default=None)
+    to_date: date | None = Field(description="Latest publication date", default=None)
+
+
+def run_linkup_search(query: LinkupQuery, depth: str = LINKUP_FANOUT_DEPTH) -> list[Article]:
+    response: LinkupSearchStructuredResponse = get_linkup_client().search(
+        query=query.query,
+        depth=depth,
+        output_type="structured",
+        include_images=False,
+        include_domains=query.include_domains,
+        include_sources=True,
+        structured_output_schema=LinkupSearchStructuredResponseSchema,
+        from_date=query.from_date,
+        to_date=query.to_date,
+    )
+    return response.data.results
+
+
 def collect_articles_from_search(
     max_results: int = 100,
 ) -> list[Article]:
-    query = "You are a web scraper. Crawl and extract the most crispy celebrity gossip articles from public.fr and vsd.fr. Prioritize breaking stories, gossips, exclusives, controversies, scandals, relationship reveals, legal issues, and viral social media moments. Include the title, source, url, publication date, description, and content of the article."
-    include_domains = ["vsd.fr", "public.fr"]
+    query = LinkupQuery(
+        label="deep",
+        query="You are a web scraper. Crawl and extract the most crispy celebrity gossip articles from public.fr and vsd.fr. Prioritize breaking stories, gossips, exclusives, controversies, scandals, relationship reveals, legal issues, and viral social media moments. Include the title, source, url, publication date, description, and content of the article.",
+        include_domains=LINKUP_DOMAINS,
+    )
 
     logger.info(
         "Collecting articles from linkup search",
-        query=query,
+        query=query.query,
         max_results=max_results,
-        include_domains=include_domains,
+        include_domains=query.include_domains,
     )
 
     try:
-        response: LinkupSearchStructuredResponse = linkup_client.search(
-            query=query,
-            depth="deep",
-            output_type="structured",
-            include_images=False,
-            include_domains=include_domains,
-            include_sources=True,
-            structured_output_schema=LinkupSearchStructuredResponseSchema,
-            # from_date=(datetime.datetime.now() - timedelta(days=90)),
-        )
-
-        logger.info("Linkup search response", response=response.data.results)
-
-        articles: list[Article] = response.data.results
-
+        articles = run_linkup_search(query, depth="deep")
+        logger.info("Linkup search response", response=articles)
         return articles
 
     except Exception as e:
         logger.error(
             "Error collecting articles from linkup search",
-            query=query,
+            query=query.query,
             error=str(e),
             exc_info=True,
         )
         return []
 
 
+def build_fanout_queries(
+    celebrities: list[str] | None = None,
+    days: int = LINKUP_FANOUT_DAYS,
+    max_queries: int = LINKUP_FANOUT_MAX_QUERIES,
+    today: date | None = None,
+) -> list[LinkupQuery]:
+    # Many narrow searches instead of one broad one: per celebrity, per site section
+    # and per day, each returning its own handful of articles
+    today = today or date.today()
+    since = today - timedelta(days=days)
+    if celebrities is None:
+        celebrities = get_suggest_index().top_entities(LINKUP_FANOUT_CELEBRITIES)
+
+    queries = [
+        LinkupQuery(
+            label=f"celebrity:{name}",
+            query=f"Latest celebrity gossip articles about {name}. {ARTICLE_FIELDS}",
+            include_domains=LINKUP_DOMAINS,
+            from_date=since,
+        )
+        for name in celebrities
+    ]
+    queries += [
+        LinkupQuery(
+            label=f"section:{site}/{section}",
+            query=f"Latest articles from the {section} section of {site}. {ARTICLE_FIELDS}",
+            include_domains=[site],
+            from_date=since,
+        )
+        for site, sections in SITE_SECTIONS.items()
+        for section in sections
+    ]
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        queries.append(
+            LinkupQuery(
+                label=f"date:{day.isoformat()}",
+                query=(
+                    f"Celebrity gossip articles published on {day.isoformat()}: breaking "
+                    f"stories, exclusives, relationship reveals and scandals. {ARTICLE_FIELDS}"
+                ),
+                include_domains=LINKUP_DOMAINS,
+                from_date=day,
+                to_date=day,
+            )
+        )
+    return queries[:max_queries]
+
+
+def normalize_url(url: str) -> str:
+    # Same article whatever the fragment, trailing slash or host case
+    parts = urlsplit(url.strip())
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, "")
+    )
+
+
+def merge_articles(results: list[list[Article]]) -> tuple[list[Article], list[int]]:
+    # Dedups by URL in query order, keeping the most complete copy of each article;
+    # also returns how many articles each query added that earlier ones had not found
+    merged: dict[str, Article] = {}
+    new_counts = []
+    for articles in results:
+        new = 0
+        for article in articles:
+            key = normalize_url(article.url)
+            previous = merged.get(key)
+            if previous is None:
+                merged[key] = article
+                new += 1
+            elif len(article.content or "") > len(previous.content or ""):
+                merged[key] = article
+        new_counts.append(new)
+    return list(merged.values()), new_counts
+
+
+def collect_articles_from_fanout(
+    queries: list[LinkupQuery] | None = None,
+    max_concurrency: int = LINKUP_FANOUT_CONCURRENCY,
+    depth: str = LINKUP_FANOUT_DEPTH,
+) -> tuple[list[Article], dict]:
+    queries = queries if queries is not None else build_fanout_queries()
+    if not queries:
+        return [], {
+            "queries": [],
+            "unique_articles": 0,
+            "total_results": 0,
+            "failed_queries": 0,
+            "wall_time_ms": 0.0,
+        }
+
+    def timed_search(query: LinkupQuery) -> tuple[list[Article], float, str | None]:
+        start = time.perf_counter()
+        try:
+            articles = run_linkup_search(query, depth=depth)
+            error = None
+        except Exception as e:
+            logger.error(
+                "Error in linkup fan-out search", label=query.label, error=str(e), exc_info=True
+            )
+            articles, error = [], str(e)
+        return articles, round((time.perf_counter() - start) * 1000, 2), error
+
+    logger.info(
+        "Starting linkup fan-out", query_count=len(queries), max_concurrency=max_concurrency
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(queries))) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, timed_search, query)
+            for query in queries
+        ]
+        outcomes = [future.result() for future in futures]
+    wall_time_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    results = [articles for articles, _, _ in outcomes]
+    articles, new_counts = merge_articles(results)
+    query_stats = [
+        {
+            "label": query.label,
+            "articles": len({normalize_url(article.url) for article in query_articles}),
+            "new_articles": new,
+            "elapsed_ms": elapsed_ms,
+            "error": error,
+        }
+        for query, (query_articles, elapsed_ms, error), new in zip(
+            queries, outcomes, new_counts, strict=True
+        )
+    ]
+    report = {
+        "queries": query_stats,
+        "unique_articles": len(articles),
+        "total_results": sum(len(query_articles) for query_articles in results),
+        "failed_queries": sum(stat["error"] is not None for stat in query_stats),
+        "wall_time_ms": wall_time_ms,
+    }
+    logger.info(
+        "Finished linkup fan-out",
+        query_count=len(queries),
+        unique_articles=report["unique_articles"],
+        total_results=report["total_results"],
+        failed_queries=report["failed_queries"],
+        wall_time_ms=wall_time_ms,
+    )
+    return articles, report
+
+
 if __name__ == "__main__":
-    articles = collect_articles_from_search()
-    logger.info("Articles collected", article_count=len(articles))
-    logger.info("Articles", articles=articles)
+    articles, report = collect_articles_from_fanout()
+    for stat in report["queries"]:
+        logger.info("Fan-out query", **stat)
+    logger.info(
+        "Articles collected", article_count=len(articles), wall_time_ms=report["wall_time_ms"]
+    )
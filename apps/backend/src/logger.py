@@ -1,34 +1,222 @@
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TextIO
 
 import structlog
 
+LOG_FORMATS = ("console", "json")
+SAMPLED_LEVELS = frozenset({"debug"})
+# Lines written to the stream per flush by the JSON writer thread
+WRITE_BATCH_SIZE = 512
 
-def setup_logging(log_level: str = "INFO") -> None:
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, log_level.upper()),
-    )
-
-    structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.dev.set_exc_info,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.dev.ConsoleRenderer(),
-        ],
-        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, log_level.upper())),
-        context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
-        cache_logger_on_first_use=False,
-    )
+_configured: tuple[str, str, int, TextIO | None] | None = None
+_writer: "QueueWriter | None" = None
+_foreign_handler: logging.Handler | None = None
+
+
+# Caps how often each debug event is emitted, the per-item ones fire for every chunk and feed item
+class EventRateLimiter:
+    def __init__(
+        self,
+        max_per_second: int,
+        levels: frozenset[str] = SAMPLED_LEVELS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_per_second = max_per_second
+        self.levels = levels
+        self.clock = clock
+        self._windows: dict[str, tuple[float, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+        if self.max_per_second <= 0 or method_name not in self.levels:
+            return event_dict
+
+        event = str(event_dict.get("event"))
+        now = self.clock()
+        with self._lock:
+            window_start, emitted, suppressed = self._windows.get(event, (now, 0, 0))
+            if now - window_start >= 1.0:
+                window_start, emitted = now, 0
+            if emitted >= self.max_per_second:
+                self._windows[event] = (window_start, emitted, suppressed + 1)
+                raise structlog.DropEvent
+            self._windows[event] = (window_start, emitted + 1, 0)
+
+        if suppressed:
+            event_dict["suppressed"] = suppressed
+        return event_dict
+
+
+# Writes rendered lines from a background thread so logging never blocks on the stream
+class QueueWriter:
+    _STOP = object()
+
+    def __init__(self, stream: TextIO | None = None):
+        self.stream = stream
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        # Drains the queue before returning
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            lines = [self.queue.get()]
+            while len(lines) < WRITE_BATCH_SIZE:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if lines[-1] is self._STOP:
+                lines.pop()
+                stopping = True
+            if lines:
+                stream = self.stream or sys.stdout
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+
+
+class QueueLogger:
+    def __init__(self, writer: QueueWriter, name: str | None = None):
+        self.name = name
+        self._put = writer.queue.put
+
+    def msg(self, message: str) -> None:
+        self._put(message)
+
+    log = debug = info = warning = warn = error = critical = exception = fatal = msg
+
+
+class QueueWriterHandler(logging.Handler):
+    def __init__(self, writer: QueueWriter):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.writer.queue.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def _stop_writer() -> None:
+    global _writer, _foreign_handler
+    if _foreign_handler is not None:
+        logging.getLogger().removeHandler(_foreign_handler)
+        _foreign_handler = None
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def shutdown_logging() -> None:
+    global _configured
+    _stop_writer()
+    _configured = None
+
+
+def setup_logging(
+    log_level: str | None = None,
+    log_format: str | None = None,
+    stream: TextIO | None = None,
+) -> None:
+    global _configured, _writer, _foreign_handler
+
+    log_level = (log_level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "console")).lower()
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format {log_format!r}, expected one of {LOG_FORMATS}")
+    debug_events_per_second = int(os.getenv("LOG_DEBUG_EVENTS_PER_SECOND", "20"))
+
+    # Called both on import and by the app, only reconfigure when something changed
+    config = (log_level, log_format, debug_events_per_second, stream)
+    if config == _configured:
+        return
+    _stop_writer()
+
+    level = getattr(logging, log_level)
+    shared_processors = [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        EventRateLimiter(debug_events_per_second),
+    ]
+
+    if log_format == "console":
+        logging.basicConfig(format="%(message)s", stream=stream or sys.stdout, level=level)
+        structlog.configure(
+            processors=[
+                *shared_processors,
+                structlog.processors.StackInfoRenderer(),
+                structlog.dev.set_exc_info,
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.dev.ConsoleRenderer(),
+            ],
+            wrapper_class=structlog.make_filtering_bound_logger(level),
+            context_class=dict,
+            logger_factory=structlog.PrintLoggerFactory(stream),
+            cache_logger_on_first_use=False,
+        )
+    else:
+        writer = QueueWriter(stream)
+        writer.start()
+        timestamper = structlog.processors.TimeStamper(fmt="iso", utc=True)
+        renderers = [
+            # Frame locals can hold article content and API payloads
+            structlog.processors.ExceptionRenderer(
+                structlog.tracebacks.ExceptionDictTransformer(show_locals=False)
+            ),
+            structlog.processors.JSONRenderer(),
+        ]
+
+        # Logs from libraries such as httpx and uvicorn go through the same writer
+        foreign_handler = QueueWriterHandler(writer)
+        foreign_handler.setFormatter(
+            structlog.stdlib.ProcessorFormatter(
+                processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, *renderers],
+                foreign_pre_chain=[
+                    structlog.stdlib.add_logger_name,
+                    structlog.processors.add_log_level,
+                    timestamper,
+                ],
+            )
+        )
+        logging.basicConfig(handlers=[foreign_handler], level=level, force=True)
+
+        structlog.configure(
+            processors=[
+                *shared_processors,
+                structlog.stdlib.add_logger_name,
+                timestamper,
+                *renderers,
+            ],
+            wrapper_class=structlog.make_filtering_bound_logger(level),
+            context_class=dict,
+            logger_factory=lambda name=None, *args: QueueLogger(writer, name),
+            # Loggers bound before a reconfiguration keep the old one
+            cache_logger_on_first_use=True,
+        )
+        _writer, _foreign_handler = writer, foreign_handler
+
+    _configured = config
 
 
 def get_logger(name: str | None = None) -> structlog.BoundLogger:
     return structlog.get_logger(name)
 
 
+atexit.register(_stop_writer)
+
 setup_logging()
@@ -0,0 +1,101 @@
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Route template of the request being served, "ingestion" for background work
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="ingestion")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "gossip_http_request_seconds",
+    "HTTP request latency",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+FEED_FETCH_SECONDS = Histogram(
+    "gossip_feed_fetch_seconds",
+    "Time to fetch a feed",
+    ["source", "fetcher"],
+    buckets=LATENCY_BUCKETS,
+)
+FEED_PARSE_SECONDS = Histogram(
+    "gossip_feed_parse_seconds",
+    "Time to parse a feed document, including HTML extraction",
+    ["source"],
+    buckets=LATENCY_BUCKETS,
+)
+FEED_ITEMS = Counter(
+    "gossip_feed_items_total",
+    "Feed items seen, by whether they were new",
+    ["source", "status"],
+)
+CHUNKING_SECONDS = Histogram(
+    "gossip_chunking_seconds",
+    "Time to split an article into chunks",
+    ["source"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_REQUEST_SECONDS = Histogram(
+    "gossip_embedding_request_seconds",
+    "Latency of an embeddings request, including rate limit waits",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_BATCH_INPUTS = Histogram(
+    "gossip_embedding_batch_size",
+    "Inputs per embeddings request",
+    ["endpoint"],
+    buckets=BATCH_SIZE_BUCKETS,
+)
+QDRANT_OPERATION_SECONDS = Histogram(
+    "gossip_qdrant_operation_seconds",
+    "Latency of Qdrant operations",
+    ["operation", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_GENERATION_SECONDS = Histogram(
+    "gossip_llm_generation_seconds",
+    "Latency of chat completion requests, including rate limit waits",
+    ["endpoint", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+RERANK_SECONDS = Histogram(
+    "gossip_rerank_seconds",
+    "Latency of the cross-encoder rerank stage, by outcome",
+    ["endpoint", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "gossip_response_cache_requests_total",
+    "Cacheable read responses, by cache hit, miss or conditional request match",
+    ["endpoint", "result"],
+)
+QUERY_IN_FLIGHT = Gauge(
+    "gossip_query_in_flight",
+    "LLM-backed queries currently being answered",
+)
+QUERY_QUEUE_DEPTH = Gauge(
+    "gossip_query_queue_depth",
+    "Admitted queries waiting for a worker",
+)
+QUERY_REJECTIONS = Counter(
+    "gossip_query_rejections_total",
+    "Queries turned away by admission control, by reason",
+    ["endpoint", "reason"],
+)
+OPENAI_TOKENS = Counter(
+    "gossip_openai_tokens_total",
+    "Tokens reported by the OpenAI API",
+    ["endpoint", "model", "kind"],
+)
+
+
+def record_tokens(model: str, kind: str, count: object) -> None:
+    if isinstance(count, int) and count > 0:
+        OPENAI_TOKENS.labels(endpoint=current_endpoint.get(), model=model, kind=kind).inc(count)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
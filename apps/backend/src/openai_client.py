@@ -0,0 +1,37 @@
+import threading
+
+from openai import OpenAI
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_openai_client: OpenAI | None = None
+_client_lock = threading.Lock()
+
+
+def create_openai_client() -> OpenAI:
+    # Retries are handled by the rate limit controllers so they see every 429
+    return OpenAI(max_retries=0)
+
+
+# Shared by embeddings and chat so both use a single connection pool
+def get_openai_client() -> OpenAI:
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                _openai_client = create_openai_client()
+    return _openai_client
+
+
+def set_openai_client(client: OpenAI | None) -> None:
+    global _openai_client
+    if _openai_client is not None and _openai_client is not client:
+        _openai_client.close()
+    _openai_client = client
+
+
+def close_openai_client() -> None:
+    set_openai_client(None)
+    logger.debug("Closed OpenAI client")
@@ -1,3 +1,5 @@
+import threading
+
 from qdrant_client.models import Distance, VectorParams
 
 from qdrant_client import QdrantClient as QdrantClientBase
@@ -7,15 +9,31 @@ from .logger import get_logger
 logger = get_logger(__name__)
 
 _qdrant_client: QdrantClientBase | None = None
+# Ingestion workers can race on first use
+_client_lock = threading.Lock()
 
 
 def get_qdrant_client(path: str = "qdrant.db") -> QdrantClientBase:
     global _qdrant_client
     if _qdrant_client is None:
-        _qdrant_client = QdrantClientBase(path=path)
+        with _client_lock:
+            if _qdrant_client is None:
+                _qdrant_client = QdrantClientBase(path=path)
     return _qdrant_client
 
 
+def set_qdrant_client(client: QdrantClientBase | None) -> None:
+    global _qdrant_client
+    if _qdrant_client is not None and _qdrant_client is not client:
+        _qdrant_client.close()
+    _qdrant_client = client
+
+
+def close_qdrant_client() -> None:
+    set_qdrant_client(None)
+    logger.debug("Closed Qdrant client")
+
+
 COLLECTION_NAME = "gossip_articles"
 # text-embedding-3-small dimension
 EMBEDDING_DIM = 1536
@@ -1,37 +1,128 @@
-from openai import OpenAI
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import Any
 
-from .embed import embed_text
+from qdrant_client.models import (
+    DatetimeExpression,
+    DatetimeKeyExpression,
+    DecayParamsExpression,
+    ExpDecayExpression,
+    FormulaQuery,
+    MultExpression,
+    Prefetch,
+    QueryRequest,
+    ScoredPoint,
+    SumExpression,
+)
+
+from .context_builder import CONTEXT_OVERFETCH, build_context
+from .embed import EMBEDDING_BATCH_SIZE, embed_text, embed_texts
 from .logger import get_logger
+from .metrics import (
+    LLM_GENERATION_SECONDS,
+    QDRANT_OPERATION_SECONDS,
+    current_endpoint,
+    record_tokens,
+)
+from .openai_client import get_openai_client
 from .qdrant_client import COLLECTION_NAME, get_qdrant_client
+from .rate_limiter import chat_rate_limiter, estimate_tokens
+from .reranker import RERANK_CANDIDATES, rerank_chunks, rerank_enabled
+from .tracing import span
 
 logger = get_logger(__name__)
 
-openai_client = OpenAI()
-qdrant = get_qdrant_client()
+CHAT_MODEL = "gpt-5-mini"
+# Budget reserved for the generated answer when pacing against the TPM quota
+EXPECTED_COMPLETION_TOKENS = 800
+# Queries per batch request, all embedded in a single embeddings call
+MAX_BATCH_QUERIES = EMBEDDING_BATCH_SIZE
+# Chat completions in flight for one batch request
+BATCH_ANSWER_CONCURRENCY = int(os.getenv("BATCH_ANSWER_CONCURRENCY", "4"))
+# Recency-aware scoring, applied per request with a half-life
+RECENCY_HALF_LIFE_HOURS = float(os.getenv("RECENCY_HALF_LIFE_HOURS", "72"))
+# Share of the vector score that decays with age, the rest is kept whatever the age
+RECENCY_WEIGHT = float(os.getenv("RECENCY_WEIGHT", "0.5"))
+# Vector candidates rescored by the decay formula per requested result
+RECENCY_PREFETCH = int(os.getenv("RECENCY_PREFETCH", "4"))
+# Articles without a publication date score like very old ones
+UNDATED_PUBLICATION_DATE = "1970-01-01T00:00:00Z"
+NO_RESULTS_ANSWER = "I couldn't find any relevant articles to answer your question."
 
 
-def search_similar_chunks(query_embedding: list[float], limit: int = 8) -> list[dict]:
-    try:
-        query_response = qdrant.query_points(
-            collection_name=COLLECTION_NAME,
-            query=query_embedding,
-            limit=limit,
+def points_to_chunks(points: list[ScoredPoint]) -> list[dict]:
+    chunks = []
+    for point in points:
+        payload = point.payload or {}
+        chunks.append(
+            {
+                "text": payload.get("chunk_text", ""),
+                "article_title": payload.get("article_title", ""),
+                "article_url": payload.get("article_url", ""),
+                "source": payload.get("source", ""),
+                "chunk_index": payload.get("chunk_index"),
+                "score": point.score,
+            }
         )
+        if point.vector is not None:
+            chunks[-1]["vector"] = point.vector
+    return chunks
+
 
-        chunks = []
-        for point in query_response.points:
-            payload = point.payload or {}
-            score = point.score
-            chunks.append(
-                {
-                    "text": payload.get("chunk_text", ""),
-                    "article_title": payload.get("article_title", ""),
-                    "article_url": payload.get("article_url", ""),
-                    "source": payload.get("source", ""),
-                    "score": score,
-                }
+def vector_query(
+    query_embedding: list[float], limit: int, half_life_hours: float | None = None
+) -> dict[str, Any]:
+    if half_life_hours is None:
+        return {"query": query_embedding}
+
+    # Qdrant rescores the vector candidates with
+    # score * (1 - weight + weight * 0.5 ** (age / half_life)),
+    # "now" is sent explicitly since the local store cannot resolve it
+    decay = ExpDecayExpression(
+        exp_decay=DecayParamsExpression(
+            x=DatetimeKeyExpression(datetime_key="publication_date"),
+            target=DatetimeExpression(datetime=datetime.now(UTC).isoformat()),
+            scale=half_life_hours * 3600,
+            midpoint=0.5,
+        )
+    )
+    return {
+        "prefetch": Prefetch(query=query_embedding, limit=limit * RECENCY_PREFETCH),
+        "query": FormulaQuery(
+            formula=MultExpression(
+                mult=[
+                    "$score",
+                    SumExpression(
+                        sum=[1 - RECENCY_WEIGHT, MultExpression(mult=[RECENCY_WEIGHT, decay])]
+                    ),
+                ]
+            ),
+            defaults={"publication_date": UNDATED_PUBLICATION_DATE},
+        ),
+    }
+
+
+def search_similar_chunks(
+    query_embedding: list[float],
+    limit: int = 8,
+    collection_name: str = COLLECTION_NAME,
+    with_vectors: bool = False,
+    half_life_hours: float | None = None,
+) -> list[dict]:
+    try:
+        with QDRANT_OPERATION_SECONDS.labels(
+            operation="query_points", endpoint=current_endpoint.get()
+        ).time():
+            query_response = get_qdrant_client().query_points(
+                collection_name=collection_name,
+                **vector_query(query_embedding, limit, half_life_hours),
+                limit=limit,
+                with_vectors=with_vectors,
             )
 
+        chunks = points_to_chunks(query_response.points)
         logger.debug("Found similar chunks", count=len(chunks))
         return chunks
 
@@ -40,17 +131,73 @@ def search_similar_chunks(query_embedding: list[float], limit: int = 8) -> list[
         raise
 
 
-def answer_query(query: str, top_k: int = 8):
+def search_articles(query: str, top_k: int = 8, half_life_hours: float | None = None) -> list[dict]:
     logger.info("Embedding query", query=query)
-    query_embedding = embed_text(query)
+    with span("embedding"):
+        query_embedding = embed_text(query)
 
-    logger.info("Searching for similar chunks", top_k=top_k)
-    chunks = search_similar_chunks(query_embedding, limit=top_k)
+    rerank = rerank_enabled()
+    limit = max(top_k, RERANK_CANDIDATES) if rerank else top_k
+    logger.info(
+        "Searching for similar chunks", top_k=top_k, limit=limit, half_life_hours=half_life_hours
+    )
+    with span("vector_search", top_k=top_k):
+        chunks = search_similar_chunks(
+            query_embedding, limit=limit, half_life_hours=half_life_hours
+        )
+
+    if rerank:
+        with span("rerank", candidates=len(chunks)):
+            chunks, _ = rerank_chunks(query, chunks)
+    return chunks[:top_k]
+
+
+def search_similar_chunks_batch(
+    query_embeddings: list[list[float]],
+    limit: int = 8,
+    collection_name: str = COLLECTION_NAME,
+    half_life_hours: float | None = None,
+) -> list[list[dict]]:
+    try:
+        with QDRANT_OPERATION_SECONDS.labels(
+            operation="query_batch_points", endpoint=current_endpoint.get()
+        ).time():
+            responses = get_qdrant_client().query_batch_points(
+                collection_name=collection_name,
+                requests=[
+                    QueryRequest(
+                        **vector_query(embedding, limit, half_life_hours),
+                        limit=limit,
+                        with_payload=True,
+                    )
+                    for embedding in query_embeddings
+                ],
+            )
+
+        results = [points_to_chunks(response.points) for response in responses]
+        logger.debug("Found similar chunks for batch", queries=len(results))
+        return results
+
+    except Exception as e:
+        logger.error("Error searching similar chunks in batch", error=str(e), exc_info=True)
+        raise
+
+
+def search_articles_batch(
+    queries: list[str], top_k: int = 8, half_life_hours: float | None = None
+) -> list[list[dict]]:
+    logger.info("Embedding queries", count=len(queries))
+    with span("embedding", queries=len(queries)):
+        query_embeddings = embed_texts(queries)
+
+    logger.info("Searching for similar chunks in batch", count=len(queries), top_k=top_k)
+    with span("vector_search", top_k=top_k, queries=len(queries)):
+        return search_similar_chunks_batch(
+            query_embeddings, limit=top_k, half_life_hours=half_life_hours
+        )
 
-    if not chunks:
-        logger.warning("No similar chunks found for query", query=query)
-        return "I couldn't find any relevant articles to answer your question."
 
+def build_messages(query: str, chunks: list[dict]) -> list[dict]:
     context_parts = []
     for i, chunk in enumerate(chunks, 1):
         context_parts.append(
@@ -60,34 +207,114 @@ def answer_query(query: str, top_k: int = 8):
         )
 
     context = "\n".join(context_parts)
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a friendly gossip assistant with a cheeky sense of humor. "
+                "Answer questions based on provided article in a warm, "
+                "conversational tone. You can be playful and a bit cheeky, but always "
+                "remain respectful about the people mentioned. Bring in some light gossip "
+                "humor while staying accurate to the information in the articles. "
+                "Always mention the source of information (the article source) "
+                "If the articles don't contain enough information, say so in a friendly way."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"Question: {query}\n\nRelevant articles:\n{context}\n\nAnswer:",
+        },
+    ]
+
+
+def generate_answer(messages: list[dict]) -> str:
+    request_tokens = (
+        sum(estimate_tokens(message["content"]) for message in messages)
+        + EXPECTED_COMPLETION_TOKENS
+    )
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-5-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a friendly gossip assistant with a cheeky sense of humor. "
-                        "Answer questions based on provided article in a warm, "
-                        "conversational tone. You can be playful and a bit cheeky, but always "
-                        "remain respectful about the people mentioned. Bring in some light gossip "
-                        "humor while staying accurate to the information in the articles. "
-                        "Always mention the source of information (the article source) "
-                        "If the articles don't contain enough information, say so in a friendly way."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": f"Question: {query}\n\nRelevant articles:\n{context}\n\nAnswer:",
-                },
-            ],
-            temperature=1,
-            stream=False,
-        )
+        with LLM_GENERATION_SECONDS.labels(
+            endpoint=current_endpoint.get(), model=CHAT_MODEL
+        ).time():
+            response = chat_rate_limiter.call(
+                lambda: get_openai_client().chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    temperature=1,
+                    stream=False,
+                ),
+                tokens=request_tokens,
+            )
+
+        usage = getattr(response, "usage", None)
+        record_tokens(CHAT_MODEL, "prompt", getattr(usage, "prompt_tokens", None))
+        record_tokens(CHAT_MODEL, "completion", getattr(usage, "completion_tokens", None))
 
         return response.choices[0].message.content
 
     except Exception as e:
         logger.error("Error generating answer", error=str(e), exc_info=True)
         return "I encountered an error while generating the answer."
+
+
+def answer_query(query: str, top_k: int = 8, half_life_hours: float | None = None):
+    logger.info("Embedding query", query=query)
+    with span("embedding"):
+        query_embedding = embed_text(query)
+
+    # Over-fetch with vectors so the context builder can trade near-duplicates for coverage
+    limit = top_k * CONTEXT_OVERFETCH
+    logger.info(
+        "Searching for similar chunks", top_k=top_k, limit=limit, half_life_hours=half_life_hours
+    )
+    with span("vector_search", top_k=top_k):
+        candidates = search_similar_chunks(
+            query_embedding, limit=limit, with_vectors=True, half_life_hours=half_life_hours
+        )
+
+    if not candidates:
+        logger.warning("No similar chunks found for query", query=query)
+        return NO_RESULTS_ANSWER
+
+    reranked = False
+    if rerank_enabled():
+        with span("rerank", candidates=len(candidates)):
+            candidates, reranked = rerank_chunks(query, candidates)
+
+    with span("context_assembly", chunks=len(candidates)):
+        # MMR would re-rank by vector relevance, the cross-encoder order takes precedence
+        chunks = build_context(candidates, top_k, diversify=not reranked)
+        messages = build_messages(query, chunks)
+
+    with span("generation", model=CHAT_MODEL):
+        return generate_answer(messages)
+
+
+def answer_queries(
+    queries: list[str],
+    results: list[list[dict]],
+    max_concurrency: int = BATCH_ANSWER_CONCURRENCY,
+) -> list[str]:
+    with span("context_assembly", chunks=sum(len(chunks) for chunks in results)):
+        batch_messages = [
+            build_messages(query, build_context(chunks, len(chunks))) if chunks else None
+            for query, chunks in zip(queries, results, strict=True)
+        ]
+
+    pending = [messages for messages in batch_messages if messages is not None]
+    if not pending:
+        return [NO_RESULTS_ANSWER] * len(queries)
+
+    with (
+        span("generation", model=CHAT_MODEL, queries=len(pending)),
+        ThreadPoolExecutor(max_workers=min(max_concurrency, len(pending))) as executor,
+    ):
+        # Each worker gets a copy of the request context so metrics keep the endpoint label
+        futures = [
+            executor.submit(contextvars.copy_context().run, generate_answer, messages)
+            if messages is not None
+            else None
+            for messages in batch_messages
+        ]
+        return [future.result() if future is not None else NO_RESULTS_ANSWER for future in futures]
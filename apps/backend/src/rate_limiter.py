@@ -0,0 +1,217 @@
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+import openai
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+WINDOW_SECONDS = 60.0
+# Rough OpenAI tokenizer ratio, good enough to pace requests against a TPM quota
+CHARS_PER_TOKEN = 4
+DEFAULT_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def parse_retry_after(headers: Any) -> float | None:
+    if headers is None:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # OpenAI reports the time until each quota resets as durations like "6m0s" or "120ms"
+    resets = []
+    for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(header)
+        if value:
+            parts = _DURATION_PART_RE.findall(value)
+            if parts:
+                resets.append(sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts))
+    return max(resets) if resets else None
+
+
+class RateLimitController:
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        max_retries: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.clock = clock
+
+        self.concurrency_limit = min_concurrency
+        self.in_flight = 0
+        self.rate_limited_count = 0
+        self._successes_since_increase = 0
+        self._paused_until = 0.0
+        self._window: deque[tuple[float, int]] = deque()
+        self._window_tokens = 0
+        self._condition = threading.Condition()
+
+    def _evict(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - WINDOW_SECONDS:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _wait_time(self, tokens: int, now: float) -> float | None:
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= self.concurrency_limit:
+            return None
+
+        over_requests = len(self._window) >= self.requests_per_minute
+        # A single request larger than the whole quota is let through on an empty window
+        over_tokens = bool(self._window) and self._window_tokens + tokens > self.tokens_per_minute
+        if over_requests or over_tokens:
+            return self._window[0][0] + WINDOW_SECONDS - now
+        return 0.0
+
+    def acquire(self, tokens: int) -> None:
+        with self._condition:
+            while True:
+                now = self.clock()
+                self._evict(now)
+                wait_time = self._wait_time(tokens, now)
+                if wait_time == 0.0:
+                    break
+                self._condition.wait(timeout=wait_time)
+
+            self.in_flight += 1
+            self._window.append((now, tokens))
+            self._window_tokens += tokens
+
+    def release(self, succeeded: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if succeeded:
+                # Additive increase: one more slot per full window of successful requests
+                self._successes_since_increase += 1
+                if self._successes_since_increase >= self.concurrency_limit:
+                    self._successes_since_increase = 0
+                    self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1)
+            self._condition.notify_all()
+
+    def on_rate_limited(self, retry_after: float | None, attempt: int) -> float:
+        delay = retry_after if retry_after is not None else DEFAULT_RETRY_DELAY * 2**attempt
+        delay = min(MAX_RETRY_DELAY, delay) * random.uniform(1.0, 1.2)
+
+        with self._condition:
+            # Multiplicative decrease, and pause every caller until the quota resets
+            self.rate_limited_count += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit // 2)
+            self._successes_since_increase = 0
+            self._paused_until = max(self._paused_until, self.clock() + delay)
+            self._condition.notify_all()
+
+        logger.warning(
+            "OpenAI rate limit hit, backing off",
+            controller=self.name,
+            delay=round(delay, 3),
+            attempt=attempt,
+            concurrency_limit=self.concurrency_limit,
+        )
+        return delay
+
+    # Blocks while waiting for capacity and backing off, never call it on the event loop
+    def call(self, fn: Callable[[], T], tokens: int = 1) -> T:
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            try:
+                result = fn()
+            except openai.RateLimitError as e:
+                self.release(succeeded=False)
+                if e.code == "insufficient_quota" or attempt == self.max_retries:
+                    raise
+                self.on_rate_limited(parse_retry_after(e.response.headers), attempt)
+            except TRANSIENT_ERRORS as e:
+                self.release(succeeded=False)
+                if attempt == self.max_retries:
+                    raise
+                delay = min(MAX_RETRY_DELAY, DEFAULT_RETRY_DELAY * 2**attempt)
+                logger.warning(
+                    "Transient OpenAI error, retrying",
+                    controller=self.name,
+                    error=str(e),
+                    attempt=attempt,
+                    delay=delay,
+                )
+                time.sleep(delay * random.uniform(1.0, 1.2))
+            except Exception:
+                self.release(succeeded=False)
+                raise
+            else:
+                self.release(succeeded=True)
+                return result
+            attempt += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._condition:
+            self._evict(self.clock())
+            return {
+                "controller": self.name,
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self.in_flight,
+                "requests_last_minute": len(self._window),
+                "tokens_last_minute": self._window_tokens,
+                "rate_limited_count": self.rate_limited_count,
+            }
+
+
+embedding_rate_limiter = RateLimitController(
+    name="embeddings",
+    requests_per_minute=int(os.getenv("OPENAI_EMBEDDING_RPM", "3000")),
+    tokens_per_minute=int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000")),
+    max_concurrency=int(os.getenv("OPENAI_EMBEDDING_MAX_CONCURRENCY", "16")),
+)
+
+chat_rate_limiter = RateLimitController(
+    name="chat",
+    requests_per_minute=int(os.getenv("OPENAI_CHAT_RPM", "500")),
+    tokens_per_minute=int(os.getenv("OPENAI_CHAT_TPM", "200000")),
+    max_concurrency=int(os.getenv("OPENAI_CHAT_MAX_CONCURRENCY", "8")),
+)
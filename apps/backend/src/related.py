@@ -0,0 +1,96 @@
+import os
+from typing import Any
+
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    RecommendInput,
+    RecommendQuery,
+    RecommendStrategy,
+)
+
+from .embed import article_summary
+from .index_cache import VersionedCache
+from .logger import get_logger
+from .metrics import QDRANT_OPERATION_SECONDS, current_endpoint
+from .qdrant_client import COLLECTION_NAME, get_qdrant_client
+
+logger = get_logger(__name__)
+
+RELATED_CACHE_SIZE = int(os.getenv("RELATED_CACHE_SIZE", "1024"))
+# Upper bound on the chunks of one article used as recommendation examples
+MAX_ARTICLE_CHUNKS = 64
+
+related_cache = VersionedCache(maxsize=RELATED_CACHE_SIZE)
+
+
+class ArticleNotFoundError(Exception):
+    pass
+
+
+def same_article(url: str) -> Filter:
+    return Filter(must=[FieldCondition(key="article_url", match=MatchValue(value=url))])
+
+
+def resolve_article_url(url: str | None = None, point_id: str | None = None) -> str:
+    if url:
+        return url
+    points = get_qdrant_client().retrieve(
+        collection_name=COLLECTION_NAME, ids=[point_id], with_payload=["article_url"]
+    )
+    if points and points[0].payload and points[0].payload.get("article_url"):
+        return points[0].payload["article_url"]
+    raise ArticleNotFoundError(f"Article {point_id} not found")
+
+
+def find_related_articles(
+    url: str | None = None, point_id: str | None = None, limit: int = 5
+) -> list[dict[str, Any]]:
+    article_url = resolve_article_url(url, point_id)
+    cache_key = (article_url, limit)
+    cached = related_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Related articles cache hit", article_url=article_url)
+        return cached
+
+    version = related_cache.version.value
+    qdrant = get_qdrant_client()
+    endpoint = current_endpoint.get()
+    with QDRANT_OPERATION_SECONDS.labels(operation="scroll", endpoint=endpoint).time():
+        points, _ = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=same_article(article_url),
+            limit=MAX_ARTICLE_CHUNKS,
+            with_payload=False,
+            with_vectors=False,
+        )
+    if not points:
+        raise ArticleNotFoundError(f"Article {article_url} not found")
+
+    # The average of the article's chunk vectors stands in for the whole article,
+    # stored vectors are reused so nothing is re-embedded
+    with QDRANT_OPERATION_SECONDS.labels(operation="query_points_groups", endpoint=endpoint).time():
+        response = qdrant.query_points_groups(
+            collection_name=COLLECTION_NAME,
+            query=RecommendQuery(
+                recommend=RecommendInput(
+                    positive=[point.id for point in points],
+                    strategy=RecommendStrategy.AVERAGE_VECTOR,
+                )
+            ),
+            query_filter=Filter(must_not=same_article(article_url).must),
+            group_by="article_url",
+            group_size=1,
+            limit=limit,
+            with_payload=True,
+        )
+
+    articles = []
+    for group in response.groups:
+        best = group.hits[0]
+        articles.append({**article_summary(best.payload or {}), "score": best.score})
+
+    related_cache.set(cache_key, articles, version)
+    logger.info("Found related articles", article_url=article_url, count=len(articles))
+    return articles
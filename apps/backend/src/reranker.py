@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import cache
+from typing import Any
+
+from .logger import get_logger
+from .metrics import RERANK_SECONDS, current_endpoint
+
+logger = get_logger(__name__)
+
+RERANK_MODEL = os.getenv("RERANK_MODEL", "Xenova/ms-marco-MiniLM-L-6-v2")
+# Candidates scored by the cross-encoder, the rest keep their vector order behind them
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "8"))
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "2"))
+# Past this budget the request falls back to the vector order
+RERANK_TIMEOUT_MS = float(os.getenv("RERANK_TIMEOUT_MS", "150"))
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+# Experimental: latency and quality gains are unmeasured, so it stays off by default
+def rerank_enabled() -> bool:
+    return os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+@cache
+def get_cross_encoder() -> Any | None:
+    try:
+        from fastembed.rerank.cross_encoder import TextCrossEncoder
+    except ImportError:
+        logger.warning("fastembed is not installed, results keep their vector order")
+        return None
+
+    start = time.perf_counter()
+    model = TextCrossEncoder(model_name=RERANK_MODEL)
+    logger.info(
+        "Loaded cross-encoder",
+        model=RERANK_MODEL,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+    return model
+
+
+def get_rerank_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=RERANK_WORKERS, thread_name_prefix="rerank"
+                )
+    return _executor
+
+
+def close_rerank_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def score_batch(model: Any, query: str, texts: list[str]) -> list[float]:
+    return list(model.rerank(query, texts, batch_size=len(texts)))
+
+
+def rerank_chunks(
+    query: str,
+    chunks: list[dict],
+    timeout_ms: float | None = RERANK_TIMEOUT_MS,
+    top_n: int = RERANK_CANDIDATES,
+) -> tuple[list[dict], bool]:
+    model = get_cross_encoder()
+    if model is None or len(chunks) < 2:
+        return chunks, False
+
+    endpoint = current_endpoint.get()
+    start = time.perf_counter()
+    candidates, rest = chunks[:top_n], chunks[top_n:]
+    executor = get_rerank_executor()
+    futures = [
+        executor.submit(
+            score_batch,
+            model,
+            query,
+            [chunk["text"] for chunk in candidates[batch_start : batch_start + RERANK_BATCH_SIZE]],
+        )
+        for batch_start in range(0, len(candidates), RERANK_BATCH_SIZE)
+    ]
+    done, pending = wait(
+        futures,
+        timeout=timeout_ms / 1000 if timeout_ms is not None else None,
+        return_when=FIRST_EXCEPTION,
+    )
+    elapsed = time.perf_counter() - start
+
+    if pending or any(future.exception() for future in done):
+        # Batches already running finish in the background, their scores are dropped
+        for future in pending:
+            future.cancel()
+        errors = [str(future.exception()) for future in done if future.exception()]
+        outcome = "error" if errors else "timeout"
+        RERANK_SECONDS.labels(endpoint=endpoint, outcome=outcome).observe(elapsed)
+        logger.warning(
+            "Rerank fell back to vector order",
+            reason=outcome,
+            errors=errors,
+            candidates=len(candidates),
+            elapsed_ms=round(elapsed * 1000, 2),
+        )
+        return chunks, False
+
+    scores = [score for future in futures for score in future.result()]
+    reranked = [
+        {**chunk, "rerank_score": float(score)}
+        for score, chunk in sorted(
+            zip(scores, candidates, strict=True), key=lambda item: item[0], reverse=True
+        )
+    ]
+    RERANK_SECONDS.labels(endpoint=endpoint, outcome="success").observe(elapsed)
+    logger.debug("Reranked chunks", candidates=len(candidates), elapsed_ms=round(elapsed * 1000, 2))
+    return reranked + rest, True
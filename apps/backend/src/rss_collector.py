@@ -1,51 +1,49 @@
 import os
+from collections.abc import Callable
 from email.utils import parsedate_to_datetime
-from html.parser import HTMLParser
-from typing import TypedDict
+from typing import Literal, NotRequired, TypedDict
 from xml.etree import ElementTree as ET
 
+import httpx
 from dotenv import load_dotenv
-from linkup import LinkupClient
+from pydantic import BaseModel, Field
 
 from .article import Article
+from .feed_cache import FeedCache, FeedCacheEntry
+from .html_text import extract_text, extract_texts
+from .http_client import get_http_client
+from .linkup_client import get_linkup_client
 from .logger import get_logger
+from .metrics import FEED_FETCH_SECONDS, FEED_ITEMS, FEED_PARSE_SECONDS
 
 load_dotenv()
 
 logger = get_logger(__name__)
 
-linkup_client = LinkupClient(api_key=os.getenv("LINKUP_API_KEY"))
+# 0 keeps HTML extraction inline; >= 2 spreads feed items over a process pool
+HTML_EXTRACT_WORKERS = int(os.getenv("HTML_EXTRACT_WORKERS", "0"))
 
 
-class HTMLTextExtractor(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.text_parts: list[str] = []
-
-    def handle_data(self, data: str) -> None:
-        self.text_parts.append(data)
-
-    def get_text(self) -> str:
-        return " ".join(self.text_parts)
+def strip_html_tags(html_content: str) -> str:
+    return extract_text(html_content)
 
 
-def strip_html_tags(html_content: str) -> str:
-    if not html_content:
-        return ""
+FeedFetcher = Literal["http", "linkup"]
 
-    parser = HTMLTextExtractor()
-    parser.feed(html_content)
-    return parser.get_text().strip()
+DEFAULT_FEED_FETCHER: FeedFetcher = "http"
 
 
 class FeedSourceConfig(TypedDict):
     base_url: str
     sources: list[str]
+    # "http" fetches the XML directly and falls back to Linkup on failure
+    fetcher: NotRequired[FeedFetcher]
 
 
 feed_sources: dict[str, FeedSourceConfig] = {
     "public": {
         "base_url": "public.fr",
+        "fetcher": "http",
         "sources": [
             "https://www.public.fr/dernieres-actualites/feed",
             "https://www.public.fr/people/feed",
@@ -56,6 +54,7 @@ feed_sources: dict[str, FeedSourceConfig] = {
     },
     "vsd": {
         "base_url": "vsd.fr",
+        "fetcher": "http",
         "sources": [
             "https://vsd.fr/actu-people/feed",
             "https://vsd.fr/tele/feed",
@@ -67,100 +66,234 @@ feed_sources: dict[str, FeedSourceConfig] = {
 }
 
 
-def parse_rss_feed(feed_url: str, source: str) -> list[Article]:
-    articles: list[Article] = []
+class FeedResponse(BaseModel):
+    content: str = Field(description="The raw feed XML", default="")
+    etag: str | None = Field(description="The ETag response header", default=None)
+    last_modified: str | None = Field(description="The Last-Modified response header", default=None)
+    not_modified: bool = Field(description="Whether the server answered 304", default=False)
+
+
+class FeedItem(BaseModel):
+    guid: str = Field(description="The item GUID, or its URL when the feed has none")
+    article: Article = Field(description="The article parsed from the item")
+
+
+class ParsedFeed(BaseModel):
+    last_build_date: str | None = Field(description="The channel lastBuildDate", default=None)
+    items: list[FeedItem] = Field(description="The parsed feed items", default_factory=list)
+
+
+class FeedResult(BaseModel):
+    feed_url: str = Field(description="The URL of the feed")
+    source: str = Field(description="The source the feed belongs to")
+    items: list[FeedItem] = Field(description="The new items of the feed", default_factory=list)
+    total_items: int = Field(description="The number of items in the feed", default=0)
+    unchanged: bool = Field(description="Whether the feed had nothing new", default=False)
+    failed: bool = Field(description="Whether fetching or parsing failed", default=False)
+    response: FeedResponse | None = Field(description="The fetch response", default=None)
+    last_build_date: str | None = Field(description="The channel lastBuildDate", default=None)
+
+    @property
+    def articles(self) -> list[Article]:
+        return [item.article for item in self.items]
+
+    @property
+    def new_items(self) -> int:
+        return len(self.items)
+
+
+def fetch_feed_http(feed_url: str, cache_entry: FeedCacheEntry | None = None) -> FeedResponse:
+    headers: dict[str, str] = {}
+    if cache_entry is not None:
+        if cache_entry.etag:
+            headers["If-None-Match"] = cache_entry.etag
+        if cache_entry.last_modified:
+            headers["If-Modified-Since"] = cache_entry.last_modified
+
+    response = get_http_client().get(feed_url, headers=headers)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+
+    if response.status_code == httpx.codes.NOT_MODIFIED:
+        return FeedResponse(etag=etag, last_modified=last_modified, not_modified=True)
+
+    response.raise_for_status()
+
+    logger.debug(
+        "Feed fetched over HTTP",
+        feed_url=feed_url,
+        http_version=response.http_version,
+        status_code=response.status_code,
+    )
+    return FeedResponse(content=response.text, etag=etag, last_modified=last_modified)
+
+
+def fetch_feed_linkup(feed_url: str) -> FeedResponse:
+    # Linkup does not expose response headers, so conditional requests are not possible here
+    feed_response = get_linkup_client().fetch(feed_url, include_raw_html=True, render_js=False)
+    return FeedResponse(content=feed_response.raw_html or "")
+
+
+def fetch_feed(
+    feed_url: str,
+    cache_entry: FeedCacheEntry | None = None,
+    fetcher: FeedFetcher = DEFAULT_FEED_FETCHER,
+) -> FeedResponse:
+    if fetcher == "http":
+        try:
+            return fetch_feed_http(feed_url, cache_entry)
+        except httpx.HTTPError as e:
+            logger.warning(
+                "Direct feed fetch failed, falling back to Linkup",
+                feed_url=feed_url,
+                error=str(e),
+            )
+
+    return fetch_feed_linkup(feed_url)
+
+
+def parse_feed_document(raw_xml: str, feed_url: str, source: str) -> ParsedFeed:
+    root = ET.fromstring(raw_xml)
+
+    namespaces = {
+        "content": "http://purl.org/rss/1.0/modules/content/",
+        "media": "http://search.yahoo.com/mrss/",
+        "dc": "http://purl.org/dc/elements/1.1/",
+    }
+
+    last_build_date = root.findtext("./channel/lastBuildDate")
+    parsed = ParsedFeed(last_build_date=last_build_date.strip() if last_build_date else None)
+
+    items = root.findall(".//item")
+    logger.debug("Found items in RSS feed", feed_url=feed_url, item_count=len(items))
+
+    contents = extract_texts(
+        [item.findtext("content:encoded", None, namespaces) for item in items],
+        max_workers=HTML_EXTRACT_WORKERS,
+    )
+
+    for item, content in zip(items, contents, strict=True):
+        try:
+            title_elem = item.find("title")
+            title = title_elem.text if title_elem is not None and title_elem.text else ""
+
+            url = ""
+            guid = ""
+            guid_elem = item.find("guid")
+            if guid_elem is not None and guid_elem.text:
+                guid = guid_elem.text.strip()
+
+            link_elem = item.find("link")
+            if link_elem is not None and link_elem.text:
+                url = link_elem.text
+            elif guid_elem is not None:
+                url = guid_elem.text if guid_elem.text else guid_elem.get("isPermaLink", "")
+
+            desc_elem = item.find("description")
+            description = desc_elem.text if desc_elem is not None and desc_elem.text else ""
+
+            categories: list[str] = []
+            for cat_elem in item.findall("category"):
+                if cat_elem.text:
+                    cat_text = cat_elem.text.strip()
+                    categories.append(cat_text)
+
+            image_url = ""
+            thumbnail_elem = item.find("media:thumbnail", namespaces)
+            if thumbnail_elem is not None:
+                image_url = thumbnail_elem.get("url", "")
+
+            publication_date = None
+            pub_date_elem = item.find("pubDate")
+            if pub_date_elem is not None and pub_date_elem.text:
+                try:
+                    publication_date = parsedate_to_datetime(pub_date_elem.text)
+                except (ValueError, TypeError):
+                    pass
+
+            article = Article(
+                title=title,
+                url=url,
+                publication_date=publication_date,
+                source=source,
+                content=content,
+                description=description,
+                categories=categories,
+                image_url=image_url,
+            )
+            parsed.items.append(FeedItem(guid=guid or url, article=article))
+
+        except Exception as e:
+            logger.warning(
+                "Error parsing RSS item",
+                feed_url=feed_url,
+                error=str(e),
+                exc_info=True,
+            )
+            continue
+
+    return parsed
+
+
+def collect_feed(
+    feed_url: str,
+    source: str,
+    cache_entry: FeedCacheEntry | None = None,
+    fetcher: FeedFetcher = DEFAULT_FEED_FETCHER,
+) -> FeedResult:
+    result = FeedResult(feed_url=feed_url, source=source)
     try:
-        feed_response = linkup_client.fetch(feed_url, include_raw_html=True, render_js=False)
+        with FEED_FETCH_SECONDS.labels(source=source, fetcher=fetcher).time():
+            feed_response = fetch_feed(feed_url, cache_entry, fetcher)
+        result.response = feed_response
 
-        raw_html = feed_response.raw_html or ""
+        if feed_response.not_modified:
+            logger.info("Feed not modified since last fetch", feed_url=feed_url)
+            result.unchanged = True
+            return result
+
+        raw_html = feed_response.content
 
         logger.debug("Feed fetched successfully", feed_url=feed_url, html_length=len(raw_html))
 
         if not raw_html:
             logger.warning("No raw HTML content in feed response", feed_url=feed_url)
-            return articles
-
-        root = ET.fromstring(raw_html)
-
-        namespaces = {
-            "content": "http://purl.org/rss/1.0/modules/content/",
-            "media": "http://search.yahoo.com/mrss/",
-            "dc": "http://purl.org/dc/elements/1.1/",
-        }
-
-        items = root.findall(".//item")
-        logger.debug("Found items in RSS feed", feed_url=feed_url, item_count=len(items))
-
-        for item in items:
-            try:
-                title_elem = item.find("title")
-                title = title_elem.text if title_elem is not None and title_elem.text else ""
-
-                url = ""
-                link_elem = item.find("link")
-                if link_elem is not None and link_elem.text:
-                    url = link_elem.text
-                else:
-                    guid_elem = item.find("guid")
-                    if guid_elem is not None:
-                        url = guid_elem.text if guid_elem.text else guid_elem.get("isPermaLink", "")
-
-                desc_elem = item.find("description")
-                description = desc_elem.text if desc_elem is not None and desc_elem.text else ""
-
-                content = ""
-                content_elem = item.find("content:encoded", namespaces)
-                if content_elem is not None and content_elem.text:
-                    content = strip_html_tags(content_elem.text)
-
-                categories: list[str] = []
-                for cat_elem in item.findall("category"):
-                    if cat_elem.text:
-                        cat_text = cat_elem.text.strip()
-                        categories.append(cat_text)
-
-                image_url = ""
-                thumbnail_elem = item.find("media:thumbnail", namespaces)
-                if thumbnail_elem is not None:
-                    image_url = thumbnail_elem.get("url", "")
-
-                publication_date = None
-                pub_date_elem = item.find("pubDate")
-                if pub_date_elem is not None and pub_date_elem.text:
-                    try:
-                        publication_date = parsedate_to_datetime(pub_date_elem.text)
-                    except (ValueError, TypeError):
-                        pass
-
-                article = Article(
-                    title=title,
-                    url=url,
-                    publication_date=publication_date,
-                    source=source,
-                    content=content,
-                    description=description,
-                    categories=categories,
-                    image_url=image_url,
-                )
-                articles.append(article)
-
-            except Exception as e:
-                logger.warning(
-                    "Error parsing RSS item",
-                    feed_url=feed_url,
-                    error=str(e),
-                    exc_info=True,
-                )
-                continue
+            return result
+
+        with FEED_PARSE_SECONDS.labels(source=source).time():
+            parsed = parse_feed_document(raw_html, feed_url, source)
+        result.total_items = len(parsed.items)
+        result.last_build_date = parsed.last_build_date
+
+        if (
+            cache_entry is not None
+            and parsed.last_build_date
+            and parsed.last_build_date == cache_entry.last_build_date
+        ):
+            logger.info(
+                "Feed lastBuildDate unchanged",
+                feed_url=feed_url,
+                last_build_date=parsed.last_build_date,
+            )
+            result.unchanged = True
+            return result
+
+        seen_guids = set(cache_entry.item_guids) if cache_entry is not None else set()
+        result.items = [item for item in parsed.items if item.guid not in seen_guids]
+        FEED_ITEMS.labels(source=source, status="new").inc(result.new_items)
+        FEED_ITEMS.labels(source=source, status="seen").inc(result.total_items - result.new_items)
+        result.unchanged = cache_entry is not None and not result.items
 
         logger.info(
             "Parsed RSS feed",
             feed_url=feed_url,
             source=source,
-            article_count=len(articles),
+            article_count=result.total_items,
+            new_items=result.new_items,
         )
 
     except ET.ParseError as e:
+        result.failed = True
         logger.error(
             "XML parsing error",
             feed_url=feed_url,
@@ -169,6 +302,7 @@ def parse_rss_feed(feed_url: str, source: str) -> list[Article]:
             exc_info=True,
         )
     except Exception as e:
+        result.failed = True
         logger.error(
             "Error fetching RSS feed",
             feed_url=feed_url,
@@ -177,15 +311,47 @@ def parse_rss_feed(feed_url: str, source: str) -> list[Article]:
             exc_info=True,
         )
 
-    return articles
+    return result
+
+
+def parse_rss_feed(
+    feed_url: str, source: str, fetcher: FeedFetcher = DEFAULT_FEED_FETCHER
+) -> list[Article]:
+    return collect_feed(feed_url, source, fetcher=fetcher).articles
+
+
+def update_feed_cache(
+    feed_cache: FeedCache, result: FeedResult, failed_urls: set[str] | None = None
+) -> None:
+    if result.failed or result.response is None:
+        return
 
+    failed_urls = failed_urls or set()
+    previous = feed_cache.get(result.feed_url) or FeedCacheEntry()
+    processed_guids = [item.guid for item in result.items if item.article.url not in failed_urls]
+    # Validators and lastBuildDate are only advanced once every new item made it,
+    # otherwise the next run would skip the feed and never retry the failed items
+    fully_processed = len(processed_guids) == len(result.items)
 
-def collect_articles_from_feeds() -> list[Article]:
-    all_articles = []
+    entry = previous.model_copy(update={"item_guids": previous.item_guids + processed_guids})
+    if fully_processed and not result.unchanged:
+        entry.etag = result.response.etag
+        entry.last_modified = result.response.last_modified
+        entry.last_build_date = result.last_build_date or previous.last_build_date
+    feed_cache.update(result.feed_url, entry)
+
+
+def collect_feeds(
+    feed_cache: FeedCache | None = None,
+    on_feed_collected: Callable[[FeedResult], None] | None = None,
+    collected: dict[str, FeedResult] | None = None,
+) -> list[FeedResult]:
+    results: list[FeedResult] = []
 
     for source_key, source_config in feed_sources.items():
         base_url = source_config["base_url"]
         feed_urls = source_config["sources"]
+        fetcher = source_config.get("fetcher", DEFAULT_FEED_FETCHER)
 
         logger.info(
             "Collecting articles from RSS feeds",
@@ -194,22 +360,36 @@ def collect_articles_from_feeds() -> list[Article]:
         )
 
         for feed_url in feed_urls:
+            if collected is not None and feed_url in collected:
+                logger.info("Reusing feed fetched by an interrupted run", feed_url=feed_url)
+                results.append(collected[feed_url])
+                continue
+
             logger.info("Fetching RSS feed", feed_url=feed_url, source=base_url)
-            articles = parse_rss_feed(feed_url, base_url)
-            all_articles.extend(articles)
+            cache_entry = feed_cache.get(feed_url) if feed_cache is not None else None
+            result = collect_feed(feed_url, base_url, cache_entry, fetcher)
+            results.append(result)
+            if on_feed_collected is not None:
+                on_feed_collected(result)
             logger.info(
                 "Fetched articles from feed",
                 feed_url=feed_url,
-                article_count=len(articles),
+                article_count=result.new_items,
+                unchanged=result.unchanged,
                 source=base_url,
             )
 
     logger.info(
         "Finished collecting articles from RSS feeds",
-        total_articles=len(all_articles),
+        total_articles=sum(result.new_items for result in results),
+        feeds_unchanged=sum(result.unchanged for result in results),
     )
 
-    return all_articles
+    return results
+
+
+def collect_articles_from_feeds(feed_cache: FeedCache | None = None) -> list[Article]:
+    return [article for result in collect_feeds(feed_cache) for article in result.articles]
 
 
 if __name__ == "__main__":
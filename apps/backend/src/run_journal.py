@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .logger import get_logger
+from .rss_collector import FeedResult
+
+logger = get_logger(__name__)
+
+DEFAULT_JOURNAL_PATH = "ingestion_journal.jsonl"
+
+
+# Append-only log of an ingestion run, replayed to resume an interrupted run
+class RunJournal:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.run_id: str | None = None
+        self.resumed = False
+        self.completed = True
+        self.feeds: dict[str, FeedResult] = {}
+        self.stored: dict[str, int] = {}
+        self.failed: set[str] = set()
+        self.started: set[str] = set()
+        # Articles are journaled from the ingestion worker threads
+        self._lock = threading.Lock()
+        self.resume_stats = {
+            "feeds_reused": 0,
+            "articles_already_stored": 0,
+            "articles_redone": 0,
+        }
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "RunJournal":
+        journal = cls(path or os.getenv("INGESTION_JOURNAL_PATH", DEFAULT_JOURNAL_PATH))
+        if not journal.path.exists():
+            return journal
+
+        with journal.path.open() as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line behind
+                    logger.warning("Skipping corrupt run journal entry", path=str(journal.path))
+                    continue
+                journal._replay(entry)
+
+        return journal
+
+    def _replay(self, entry: dict[str, Any]) -> None:
+        event = entry.get("event")
+        if event == "run_started":
+            self.run_id = entry["run_id"]
+            self.completed = False
+            self.feeds.clear()
+            self.stored.clear()
+            self.failed.clear()
+            self.started.clear()
+        elif event == "feed_fetched":
+            result = FeedResult.model_validate(entry["result"])
+            self.feeds[result.feed_url] = result
+        elif event == "article_started":
+            self.started.add(entry["url"])
+        elif event == "article_stored":
+            self.stored[entry["url"]] = entry["chunks"]
+            self.failed.discard(entry["url"])
+        elif event == "article_failed":
+            self.failed.add(entry["url"])
+        elif event == "run_completed":
+            self.completed = True
+
+    @property
+    def interrupted_articles(self) -> set[str]:
+        return self.started - self.stored.keys() - self.failed
+
+    def start(self) -> None:
+        if not self.completed and self.run_id is not None:
+            self.resumed = True
+            self.resume_stats = {
+                "feeds_reused": len(self.feeds),
+                "articles_already_stored": len(self.stored),
+                "articles_redone": len(self.interrupted_articles),
+            }
+            logger.info("Resuming interrupted ingestion run", **self.summary())
+            return
+
+        self.run_id = uuid.uuid4().hex
+        self.resumed = False
+        self.completed = False
+        self.feeds.clear()
+        self.stored.clear()
+        self.failed.clear()
+        self.started.clear()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("")
+        self._append({"event": "run_started"})
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        entry = {**entry, "run_id": self.run_id, "at": datetime.now(UTC).isoformat()}
+        with self._lock, self.path.open("a") as journal_file:
+            journal_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def record_feed(self, result: FeedResult) -> None:
+        self.feeds[result.feed_url] = result
+        # The raw XML is not needed to resume, only the parsed items and validators
+        payload = result.model_dump(mode="json", exclude={"response": {"content"}})
+        self._append({"event": "feed_fetched", "result": payload})
+
+    def article_started(self, url: str) -> None:
+        self.started.add(url)
+        self._append({"event": "article_started", "url": url})
+
+    def article_stored(self, url: str, chunks: int) -> None:
+        self.stored[url] = chunks
+        self._append({"event": "article_stored", "url": url, "chunks": chunks})
+
+    def article_failed(self, url: str) -> None:
+        self.failed.add(url)
+        self._append({"event": "article_failed", "url": url})
+
+    def complete(self) -> None:
+        self._append({"event": "run_completed"})
+        self.completed = True
+
+    def summary(self) -> dict[str, Any]:
+        return {"run_id": self.run_id, "resumed": self.resumed, **self.resume_stats}
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from .embed import ingest_feed
+from .logger import get_logger
+from .rss_collector import DEFAULT_FEED_FETCHER, FeedFetcher, feed_sources
+
+logger = get_logger(__name__)
+
+MIN_POLL_INTERVAL = float(os.getenv("FEED_MIN_POLL_INTERVAL", "120"))
+MAX_POLL_INTERVAL = float(os.getenv("FEED_MAX_POLL_INTERVAL", "3600"))
+INITIAL_POLL_INTERVAL = float(os.getenv("FEED_INITIAL_POLL_INTERVAL", "600"))
+
+# Aim for about one new item per poll
+TARGET_ITEMS_PER_POLL = 1.0
+# Weight of the latest observation in the interval moving average
+INTERVAL_SMOOTHING = 0.5
+# Growth factor applied after a poll without new items
+QUIET_BACKOFF = 1.5
+JITTER_RATIO = 0.1
+
+PollFn = Callable[[str, str, FeedFetcher], dict[str, Any]]
+
+
+class FeedSchedule(BaseModel):
+    feed_url: str = Field(description="The URL of the feed")
+    source: str = Field(description="The source the feed belongs to")
+    fetcher: FeedFetcher = Field(description="The fetch backend", default=DEFAULT_FEED_FETCHER)
+    interval: float = Field(description="Current polling interval in seconds")
+    next_poll_at: float = Field(description="Monotonic time of the next poll", default=0.0)
+    last_poll_at: float | None = Field(description="Monotonic time of the last poll", default=None)
+    consecutive_errors: int = Field(description="Failed polls in a row", default=0)
+
+
+class FeedScheduler:
+    def __init__(
+        self,
+        feeds: list[FeedSchedule],
+        poll_fn: PollFn = ingest_feed,
+        min_interval: float = MIN_POLL_INTERVAL,
+        max_interval: float = MAX_POLL_INTERVAL,
+        jitter_ratio: float = JITTER_RATIO,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ):
+        self.feeds = feeds
+        self.poll_fn = poll_fn
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter_ratio = jitter_ratio
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._stop_event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        # Spread the first polls so all feeds are not fetched at once
+        now = self.clock()
+        for schedule in self.feeds:
+            schedule.next_poll_at = now + self.rng.uniform(0, self.min_interval)
+
+    @classmethod
+    def from_feed_sources(cls, **kwargs: Any) -> "FeedScheduler":
+        initial_interval = kwargs.pop("initial_interval", INITIAL_POLL_INTERVAL)
+        feeds = [
+            FeedSchedule(
+                feed_url=feed_url,
+                source=source_config["base_url"],
+                fetcher=source_config.get("fetcher", DEFAULT_FEED_FETCHER),
+                interval=initial_interval,
+            )
+            for source_config in feed_sources.values()
+            for feed_url in source_config["sources"]
+        ]
+        return cls(feeds, **kwargs)
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1 + self.rng.uniform(-self.jitter_ratio, self.jitter_ratio))
+
+    def record_success(self, schedule: FeedSchedule, new_items: int, now: float) -> None:
+        # The first poll drains the backlog, so it says nothing about the publishing rate
+        if schedule.last_poll_at is not None:
+            elapsed = now - schedule.last_poll_at
+            if new_items > 0:
+                target = elapsed / new_items * TARGET_ITEMS_PER_POLL
+                interval = (
+                    INTERVAL_SMOOTHING * target + (1 - INTERVAL_SMOOTHING) * schedule.interval
+                )
+            else:
+                interval = schedule.interval * QUIET_BACKOFF
+            schedule.interval = self._clamp(interval)
+
+        schedule.last_poll_at = now
+        schedule.consecutive_errors = 0
+        schedule.next_poll_at = now + self._jittered(schedule.interval)
+
+    def record_error(self, schedule: FeedSchedule, now: float) -> None:
+        schedule.consecutive_errors += 1
+        delay = min(self.max_interval, schedule.interval * 2**schedule.consecutive_errors)
+        schedule.next_poll_at = now + self._jittered(delay)
+
+    def due_feeds(self, now: float) -> list[FeedSchedule]:
+        return sorted(
+            (schedule for schedule in self.feeds if schedule.next_poll_at <= now),
+            key=lambda schedule: schedule.next_poll_at,
+        )
+
+    async def poll(self, schedule: FeedSchedule) -> None:
+        try:
+            stats = await asyncio.to_thread(
+                self.poll_fn, schedule.feed_url, schedule.source, schedule.fetcher
+            )
+        except Exception as e:
+            logger.error(
+                "Scheduled feed poll failed",
+                feed_url=schedule.feed_url,
+                error=str(e),
+                exc_info=True,
+            )
+            self.record_error(schedule, self.clock())
+            return
+
+        if stats.get("skipped"):
+            # Another ingestion run holds the lock; retry soon without touching the interval
+            schedule.next_poll_at = self.clock() + self._jittered(self.min_interval)
+            logger.info("Scheduled feed poll skipped", feed_url=schedule.feed_url)
+            return
+
+        if stats.get("feeds_failed"):
+            self.record_error(schedule, self.clock())
+        else:
+            self.record_success(schedule, stats.get("new_items", 0), self.clock())
+
+        logger.info(
+            "Scheduled feed poll",
+            feed_url=schedule.feed_url,
+            new_items=stats.get("new_items", 0),
+            interval=round(schedule.interval),
+            next_poll_in=round(schedule.next_poll_at - self.clock()),
+            consecutive_errors=schedule.consecutive_errors,
+        )
+
+    async def run_forever(self) -> None:
+        logger.info("Starting feed scheduler", feed_count=len(self.feeds))
+        while not self._stop_event.is_set():
+            for schedule in self.due_feeds(self.clock()):
+                if self._stop_event.is_set():
+                    break
+                await self.poll(schedule)
+
+            next_poll_at = min(schedule.next_poll_at for schedule in self.feeds)
+            timeout = max(0.0, next_poll_at - self.clock())
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
+        logger.info("Stopped feed scheduler")
+
+    def start(self) -> asyncio.Task:
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self.run_forever())
+        return self._task
+
+    async def stop(self) -> None:
+        self._stop_event.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+def scheduler_enabled() -> bool:
+    return os.getenv("FEED_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+if __name__ == "__main__":
+    asyncio.run(FeedScheduler.from_feed_sources().run_forever())
@@ -0,0 +1,272 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from .article import Article
+from .index_cache import file_version
+from .logger import get_logger
+from .qdrant_client import COLLECTION_NAME, get_qdrant_client
+
+logger = get_logger(__name__)
+
+DEFAULT_SUGGEST_INDEX_PATH = "suggest_index.json"
+# Matching entities ranked by article count, looked at before cutting to the limit
+SUGGEST_SCAN_LIMIT = int(os.getenv("SUGGEST_SCAN_LIMIT", "200"))
+REBUILD_SCROLL_SIZE = 1000
+
+# Runs of capitalized words, e.g. "Brad Pitt" or "Léa Seydoux"
+CAPITALIZED_RUN = re.compile(r"[A-ZÀ-ÖØ-Þ][\w'’-]*(?:[ -][A-ZÀ-ÖØ-Þ][\w'’-]*)+")
+# Capitalized words that start sentences rather than names
+LEADING_STOPWORDS = {
+    "l",
+    "la",
+    "le",
+    "les",
+    "un",
+    "une",
+    "des",
+    "du",
+    "de",
+    "ce",
+    "cette",
+    "ces",
+    "quand",
+    "pourquoi",
+    "comment",
+    "qui",
+    "avec",
+    "pour",
+    "selon",
+    "chez",
+    "sans",
+    "en",
+    "au",
+    "aux",
+    "et",
+    "exclu",
+    "exclusif",
+    "photos",
+    "vidéo",
+}
+# Elided articles glued to a common noun, e.g. "L'actrice"
+ELIDED_WORD = re.compile(r"^[LD]['’][a-zà-öø-ÿ]")
+MAX_ENTITY_WORDS = 4
+
+_suggest_index: "SuggestIndex | None" = None
+_suggest_index_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    # Accent and case insensitive: "Élodie" and "elodie" share a key
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def extract_entities(text: str) -> list[str]:
+    entities = []
+    for match in CAPITALIZED_RUN.finditer(text):
+        words = match.group().split()
+        while words and (normalize(words[0]) in LEADING_STOPWORDS or ELIDED_WORD.match(words[0])):
+            words = words[1:]
+        if 2 <= len(words) <= MAX_ENTITY_WORDS:
+            entities.append(" ".join(words))
+    return entities
+
+
+def word_keys(text: str) -> list[str]:
+    # One key per word start, so "pitt" finds "Brad Pitt" as well as "brad"
+    words = normalize(text).split()
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+# Prefix index over article titles and the names extracted from them, kept as sorted
+# key arrays searched with bisect
+class SuggestIndex:
+    def __init__(self, path: str | Path, articles: dict[str, dict[str, Any]] | None = None):
+        self.path = Path(path)
+        self.articles: dict[str, dict[str, Any]] = {}
+        # Entity names keep the spelling first seen, counted once per article
+        self.entity_names: dict[str, str] = {}
+        self.entity_counts: Counter[str] = Counter()
+        # Sorted (key, ref) pairs, ref is an entity key or an article URL
+        self._entity_keys: list[tuple[str, str]] = []
+        self._title_keys: list[tuple[str, str]] = []
+        # Articles are added from the ingestion worker threads
+        self._lock = threading.Lock()
+        # Version of the file this index was loaded from or last saved to
+        self.loaded_version: tuple[int, int] | None = None
+        # Bulk loads append every key and sort once, insort per key is quadratic
+        for url, entry in (articles or {}).items():
+            self._add(url, entry["title"], entry["entities"], bulk=True)
+        self._title_keys.sort()
+        self._entity_keys.sort()
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "SuggestIndex":
+        path = Path(path or os.getenv("SUGGEST_INDEX_PATH", DEFAULT_SUGGEST_INDEX_PATH))
+        version = file_version(path)
+        if version is None:
+            return cls(path)
+
+        try:
+            articles = json.loads(path.read_text())
+        except Exception as e:
+            logger.warning("Ignoring unreadable suggest index", path=str(path), error=str(e))
+            articles = {}
+
+        index = cls(path, articles)
+        index.loaded_version = version
+        return index
+
+    def is_stale(self) -> bool:
+        # Saved by another process since it was loaded, e.g. a `python -m src.embed` run
+        return file_version(self.path) not in (None, self.loaded_version)
+
+    def _remove(self, url: str) -> None:
+        previous = self.articles.pop(url)
+        for key in word_keys(previous["title"]):
+            idx = bisect_left(self._title_keys, (key, url))
+            if idx < len(self._title_keys) and self._title_keys[idx] == (key, url):
+                del self._title_keys[idx]
+        for name in previous["entities"]:
+            entity = normalize(name)
+            self.entity_counts[entity] -= 1
+            if self.entity_counts[entity] > 0:
+                continue
+            del self.entity_counts[entity]
+            del self.entity_names[entity]
+            for key in word_keys(name):
+                idx = bisect_left(self._entity_keys, (key, entity))
+                if idx < len(self._entity_keys) and self._entity_keys[idx] == (key, entity):
+                    del self._entity_keys[idx]
+
+    def _add(self, url: str, title: str, entities: list[str], bulk: bool = False) -> None:
+        insert = list.append if bulk else insort
+        if url in self.articles:
+            if self.articles[url]["title"] == title:
+                return
+            self._remove(url)
+
+        unique = list({normalize(name): name for name in entities}.values())
+        self.articles[url] = {"title": title, "entities": unique}
+        for key in word_keys(title):
+            insert(self._title_keys, (key, url))
+        for name in unique:
+            entity = normalize(name)
+            if entity not in self.entity_names:
+                self.entity_names[entity] = name
+                for key in word_keys(name):
+                    insert(self._entity_keys, (key, entity))
+            self.entity_counts[entity] += 1
+
+    def add_article(self, article: Article) -> None:
+        entities = extract_entities(article.title)
+        if article.description:
+            entities += extract_entities(article.description)
+        with self._lock:
+            self._add(article.url, article.title, entities)
+
+    @staticmethod
+    def _scan(keys: list[tuple[str, str]], prefix: str, limit: int) -> list[str]:
+        refs: list[str] = []
+        idx = bisect_left(keys, (prefix, ""))
+        while idx < len(keys) and len(refs) < limit and keys[idx][0].startswith(prefix):
+            if keys[idx][1] not in refs:
+                refs.append(keys[idx][1])
+            idx += 1
+        return refs
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict[str, Any]]:
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            # Names first, most covered first, then titles in key order
+            entities = sorted(
+                self._scan(self._entity_keys, prefix, SUGGEST_SCAN_LIMIT),
+                key=lambda entity: -self.entity_counts[entity],
+            )[:limit]
+            suggestions = [
+                {
+                    "text": self.entity_names[entity],
+                    "type": "entity",
+                    "count": self.entity_counts[entity],
+                }
+                for entity in entities
+            ]
+            for url in self._scan(self._title_keys, prefix, limit - len(suggestions)):
+                suggestions.append(
+                    {"text": self.articles[url]["title"], "type": "title", "url": url}
+                )
+            return suggestions
+
+    def top_entities(self, limit: int = 10) -> list[str]:
+        with self._lock:
+            return [
+                self.entity_names[entity] for entity, _ in self.entity_counts.most_common(limit)
+            ]
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(json.dumps(self.articles, ensure_ascii=False))
+            os.replace(tmp_path, self.path)
+            self.loaded_version = file_version(self.path)
+        logger.debug("Saved suggest index", path=str(self.path), article_count=len(self.articles))
+
+
+def get_suggest_index() -> SuggestIndex:
+    global _suggest_index
+    if _suggest_index is None or _suggest_index.is_stale():
+        with _suggest_index_lock:
+            if _suggest_index is None or _suggest_index.is_stale():
+                _suggest_index = SuggestIndex.load(
+                    _suggest_index.path if _suggest_index is not None else None
+                )
+    return _suggest_index
+
+
+def set_suggest_index(index: SuggestIndex | None) -> None:
+    global _suggest_index
+    _suggest_index = index
+
+
+def rebuild_suggest_index() -> SuggestIndex:
+    # One-off backfill for articles stored before the index existed, from the stored
+    # titles only since descriptions are not part of the chunk payload
+    articles: dict[str, dict[str, Any]] = {}
+    offset = None
+    while True:
+        points, offset = get_qdrant_client().scroll(
+            collection_name=COLLECTION_NAME,
+            limit=REBUILD_SCROLL_SIZE,
+            offset=offset,
+            with_payload=["article_url", "article_title"],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            url, title = payload.get("article_url"), payload.get("article_title")
+            if url and title and url not in articles:
+                articles[url] = {"title": title, "entities": extract_entities(title)}
+        if offset is None:
+            break
+
+    index = SuggestIndex(get_suggest_index().path, articles)
+    index.save()
+    set_suggest_index(index)
+    logger.info("Rebuilt suggest index", article_count=len(index.articles))
+    return index
+
+
+if __name__ == "__main__":
+    rebuild_suggest_index()
@@ -0,0 +1,124 @@
+import os
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import cache
+from typing import Any
+
+import structlog
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+TRACE_ID_HEADER = "X-Trace-Id"
+DEBUG_TIMING_HEADER = "X-Debug-Timing"
+SERVICE_NAME = "gossip-api"
+
+
+class Trace:
+    def __init__(self, trace_id: str, name: str):
+        self.trace_id = trace_id
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.duration_ms: float | None = None
+        self.spans: list[tuple[str, float]] = []
+
+    def record(self, name: str, duration_ms: float) -> None:
+        self.spans.append((name, duration_ms))
+
+    def elapsed_ms(self) -> float:
+        if self.duration_ms is not None:
+            return self.duration_ms
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def timings(self) -> dict[str, float]:
+        return {f"{name}_ms": round(duration_ms, 2) for name, duration_ms in self.spans}
+
+    def server_timing(self) -> str:
+        # Server-Timing format, shown per stage in browser dev tools
+        entries = [f"{name};dur={duration_ms:.1f}" for name, duration_ms in self.spans]
+        entries.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(entries)
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+@cache
+def get_otel_tracer() -> Any | None:
+    exporter_name = os.getenv("TRACING_EXPORTER", "none").lower()
+    if exporter_name in ("", "none"):
+        return None
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("opentelemetry-sdk is not installed, spans are not exported")
+        return None
+
+    if exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    elif exporter_name == "file":
+        path = os.getenv("TRACING_FILE", "traces.jsonl")
+        # The exporter owns the file for the lifetime of the process
+        exporter = ConsoleSpanExporter(
+            out=open(path, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        logger.warning("Unknown tracing exporter, spans are not exported", exporter=exporter_name)
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    logger.info("Exporting traces with OpenTelemetry", exporter=exporter_name)
+    return provider.get_tracer(__name__)
+
+
+def _otel_span(name: str, attributes: dict[str, Any]):
+    tracer = get_otel_tracer()
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    with _otel_span(name, attributes) as otel_span:
+        if otel_span is not None:
+            trace_id = format(otel_span.get_span_context().trace_id, "032x")
+        else:
+            trace_id = uuid.uuid4().hex
+
+        trace = Trace(trace_id, name)
+        token = current_trace.set(trace)
+        with structlog.contextvars.bound_contextvars(trace_id=trace_id):
+            try:
+                yield trace
+            finally:
+                trace.duration_ms = trace.elapsed_ms()
+                current_trace.reset(token)
+                logger.info(
+                    "Request trace",
+                    trace=name,
+                    duration_ms=round(trace.duration_ms, 2),
+                    **trace.timings(),
+                )
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    trace = current_trace.get()
+    start = time.perf_counter()
+    try:
+        with _otel_span(name, attributes):
+            yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if trace is not None:
+            trace.record(name, duration_ms)
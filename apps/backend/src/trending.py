@@ -0,0 +1,327 @@
+import os
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .article import Article
+from .index_cache import file_version
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TRENDING_STATE_PATH = "trending_clusters.npz"
+# Cosine similarity to a story centroid needed to join the story
+ASSIGN_THRESHOLD = float(os.getenv("TRENDING_ASSIGN_THRESHOLD", "0.7"))
+# Stories whose centroids drift this close together are merged after each run
+MERGE_THRESHOLD = float(os.getenv("TRENDING_MERGE_THRESHOLD", "0.8"))
+# Articles older than this are dropped, along with stories left empty
+RETENTION_HOURS = float(os.getenv("TRENDING_RETENTION_HOURS", "168"))
+# Rows of the centroid similarity matrix computed at once when merging
+MERGE_BLOCK_SIZE = 1024
+
+_story_clusters: "StoryClusters | None" = None
+_story_clusters_lock = threading.Lock()
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros((max(size, 2 * len(array), 64), *array.shape[1:]), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+# Online story clustering: each new article joins the closest story centroid or starts
+# a new story, stories that converge are merged between ingestion runs
+class StoryClusters:
+    def __init__(
+        self,
+        path: str | Path,
+        assign_threshold: float = ASSIGN_THRESHOLD,
+        merge_threshold: float = MERGE_THRESHOLD,
+        retention_hours: float = RETENTION_HOURS,
+    ):
+        self.path = Path(path)
+        self.assign_threshold = assign_threshold
+        self.merge_threshold = merge_threshold
+        self.retention_hours = retention_hours
+        # Article chunks are stored from the ingestion worker threads
+        self._lock = threading.Lock()
+        # Version of the file the state was loaded from or last saved to
+        self.loaded_version: tuple[int, int] | None = None
+
+        # Story rows: running vector sums and their normalized centroids
+        self.story_count = 0
+        self._sums = np.zeros((0, 0), dtype=np.float32)
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        # Article rows: story and publication timestamp, with their metadata
+        self.article_count = 0
+        self._article_story = np.zeros(0, dtype=np.int64)
+        self._article_time = np.zeros(0, dtype=np.float64)
+        self._article_meta: list[tuple[str, str, str]] = []
+        self._article_index: dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "StoryClusters":
+        clusters = cls(path or os.getenv("TRENDING_STATE_PATH", DEFAULT_TRENDING_STATE_PATH))
+        version = file_version(clusters.path)
+        if version is None:
+            return clusters
+
+        try:
+            with np.load(clusters.path) as state:
+                sums = state["sums"]
+                clusters._sums = sums.copy()
+                clusters._centroids = sums / np.maximum(
+                    np.linalg.norm(sums, axis=1, keepdims=True), 1e-12
+                )
+                clusters.story_count = len(sums)
+                clusters._article_story = state["article_story"].astype(np.int64)
+                clusters._article_time = state["article_time"].astype(np.float64)
+                clusters._article_meta = list(
+                    zip(
+                        state["article_url"].tolist(),
+                        state["article_title"].tolist(),
+                        state["article_source"].tolist(),
+                        strict=True,
+                    )
+                )
+                clusters.article_count = len(clusters._article_meta)
+                clusters._article_index = {
+                    url: idx for idx, (url, _, _) in enumerate(clusters._article_meta)
+                }
+        except Exception as e:
+            logger.warning(
+                "Ignoring unreadable trending state", path=str(clusters.path), error=str(e)
+            )
+            return cls(clusters.path)
+
+        clusters.loaded_version = version
+        return clusters
+
+    def is_stale(self) -> bool:
+        # Saved by another process since it was loaded, e.g. a `python -m src.embed` run
+        return file_version(self.path) not in (None, self.loaded_version)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._article_index
+
+    def add_article(self, article: Article, embeddings: list[list[float]]) -> int | None:
+        if not embeddings:
+            return None
+
+        vector = np.asarray(embeddings, dtype=np.float32).mean(axis=0)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            return None
+        vector /= norm
+        published = (
+            article.publication_date.timestamp() if article.publication_date else time.time()
+        )
+
+        with self._lock:
+            if article.url in self._article_index:
+                # Re-ingested articles keep their story
+                return int(self._article_story[self._article_index[article.url]])
+
+            if not self.story_count:
+                self._sums = np.zeros((0, len(vector)), dtype=np.float32)
+                self._centroids = np.zeros((0, len(vector)), dtype=np.float32)
+
+            story = -1
+            if self.story_count:
+                similarity = self._centroids[: self.story_count] @ vector
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.assign_threshold:
+                    story = best
+
+            if story < 0:
+                story = self.story_count
+                self.story_count += 1
+                self._sums = _grow(self._sums, self.story_count)
+                self._centroids = _grow(self._centroids, self.story_count)
+
+            self._sums[story] += vector
+            self._centroids[story] = self._sums[story] / np.linalg.norm(self._sums[story])
+
+            idx = self.article_count
+            self.article_count += 1
+            self._article_story = _grow(self._article_story, self.article_count)
+            self._article_time = _grow(self._article_time, self.article_count)
+            self._article_story[idx] = story
+            self._article_time[idx] = published
+            self._article_meta.append((article.url, article.title, article.source))
+            self._article_index[article.url] = idx
+            return story
+
+    def merge_similar(self) -> int:
+        with self._lock:
+            count = self.story_count
+            if count < 2:
+                return 0
+
+            centroids = self._centroids[:count]
+            # Union-find over story pairs above the merge threshold, computed blockwise
+            # so memory stays linear in the number of stories
+            parent = np.arange(count)
+
+            def find(story: int) -> int:
+                while parent[story] != story:
+                    parent[story] = parent[parent[story]]
+                    story = parent[story]
+                return story
+
+            for block_start in range(0, count, MERGE_BLOCK_SIZE):
+                block = centroids[block_start : block_start + MERGE_BLOCK_SIZE]
+                similarity = block @ centroids.T
+                rows, cols = np.nonzero(similarity >= self.merge_threshold)
+                rows += block_start
+                upper = rows < cols
+                for row, col in zip(rows[upper].tolist(), cols[upper].tolist(), strict=True):
+                    root_row, root_col = find(row), find(col)
+                    if root_row != root_col:
+                        parent[max(root_row, root_col)] = min(root_row, root_col)
+
+            roots = np.array([find(story) for story in range(count)])
+            merged = count - len(np.unique(roots))
+            if merged:
+                self._renumber(roots)
+            return merged
+
+    def prune(self, now: float | None = None) -> int:
+        cutoff = (now or time.time()) - self.retention_hours * 3600
+        with self._lock:
+            keep = self._article_time[: self.article_count] >= cutoff
+            dropped = int(self.article_count - keep.sum())
+            if not dropped:
+                return 0
+
+            kept = np.nonzero(keep)[0]
+            self._article_story = self._article_story[kept].copy()
+            self._article_time = self._article_time[kept].copy()
+            self._article_meta = [self._article_meta[idx] for idx in kept.tolist()]
+            self._article_index = {url: idx for idx, (url, _, _) in enumerate(self._article_meta)}
+            self.article_count = len(kept)
+            # Stories keep the sums of their dropped articles, they still describe the story
+            self._renumber(np.arange(self.story_count))
+            return dropped
+
+    def _renumber(self, roots: np.ndarray) -> None:
+        # Folds each story into its root, then drops stories without articles
+        sums = np.zeros((self.story_count, self._sums.shape[1]), dtype=np.float32)
+        np.add.at(sums, roots, self._sums[: self.story_count])
+        article_story = roots[self._article_story[: self.article_count]]
+
+        live = np.unique(article_story)
+        new_ids = np.full(self.story_count, -1, dtype=np.int64)
+        new_ids[live] = np.arange(len(live))
+
+        self._sums = sums[live]
+        self._centroids = self._sums / np.maximum(
+            np.linalg.norm(self._sums, axis=1, keepdims=True), 1e-12
+        )
+        self.story_count = len(live)
+        self._article_story = new_ids[article_story]
+
+    def trending(
+        self, window_hours: float = 24, limit: int = 10, now: float | None = None
+    ) -> list[dict[str, Any]]:
+        cutoff = (now or time.time()) - window_hours * 3600
+        with self._lock:
+            if not self.article_count:
+                return []
+            stories = self._article_story[: self.article_count]
+            times = self._article_time[: self.article_count]
+            recent = times >= cutoff
+            recent_counts = np.bincount(stories[recent], minlength=self.story_count)
+            totals = np.bincount(stories, minlength=self.story_count)
+            latest = np.full(self.story_count, -np.inf)
+            np.maximum.at(latest, stories, times)
+
+            # Most recent articles first, then total size, then freshness
+            order = np.lexsort((-latest, -totals, -recent_counts))
+            ranked = [story for story in order.tolist() if recent_counts[story]][:limit]
+
+            clusters = []
+            for story in ranked:
+                members = np.nonzero(stories == story)[0]
+                members = members[np.argsort(-times[members])]
+                articles = [
+                    {
+                        "title": self._article_meta[idx][1],
+                        "url": self._article_meta[idx][0],
+                        "source": self._article_meta[idx][2],
+                        "publication_date": datetime.fromtimestamp(times[idx], UTC).isoformat(),
+                    }
+                    for idx in members.tolist()
+                ]
+                clusters.append(
+                    {
+                        "id": story,
+                        "title": articles[0]["title"],
+                        "recent_articles": int(recent_counts[story]),
+                        "total_articles": int(totals[story]),
+                        "sources": sorted({article["source"] for article in articles}),
+                        "latest_publication_date": articles[0]["publication_date"],
+                        "articles": articles,
+                    }
+                )
+            return clusters
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            urls, titles, sources = (
+                zip(*self._article_meta, strict=True) if self._article_meta else ((), (), ())
+            )
+            with tmp_path.open("wb") as state_file:
+                np.savez(
+                    state_file,
+                    sums=self._sums[: self.story_count],
+                    article_story=self._article_story[: self.article_count],
+                    article_time=self._article_time[: self.article_count],
+                    article_url=np.array(urls, dtype=str),
+                    article_title=np.array(titles, dtype=str),
+                    article_source=np.array(sources, dtype=str),
+                )
+            os.replace(tmp_path, self.path)
+            self.loaded_version = file_version(self.path)
+        logger.debug(
+            "Saved trending state",
+            path=str(self.path),
+            stories=self.story_count,
+            articles=self.article_count,
+        )
+
+    def end_run(self) -> None:
+        merged = self.merge_similar()
+        pruned = self.prune()
+        self.save()
+        logger.info(
+            "Updated trending stories",
+            stories=self.story_count,
+            articles=self.article_count,
+            merged=merged,
+            pruned=pruned,
+        )
+
+
+def get_story_clusters() -> StoryClusters:
+    global _story_clusters
+    if _story_clusters is None or _story_clusters.is_stale():
+        with _story_clusters_lock:
+            if _story_clusters is None or _story_clusters.is_stale():
+                _story_clusters = StoryClusters.load(
+                    _story_clusters.path if _story_clusters is not None else None
+                )
+    return _story_clusters
+
+
+def set_story_clusters(clusters: StoryClusters | None) -> None:
+    global _story_clusters
+    _story_clusters = clusters
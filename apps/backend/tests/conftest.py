@@ -1,11 +1,19 @@
 # Test configuration and fixtures
-from datetime import datetime
+import asyncio
+from datetime import UTC, datetime
 from unittest.mock import MagicMock
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
+from src.admission import query_rate_limiter
 from src.article import Article
+from src.facets import set_facet_index
+from src.http_cache import response_cache
+from src.http_client import create_http_client, set_http_client
+from src.suggest import set_suggest_index
+from src.trending import set_story_clusters
 
 
 @pytest.fixture
@@ -23,6 +31,42 @@ def sample_article():
     )
 
 
+@pytest.fixture
+def make_article():
+    """Return a factory for articles of a source, identified by their URL path."""
+
+    def make(
+        url: str,
+        source: str = "public.fr",
+        *,
+        title: str | None = None,
+        description: str | None = None,
+        categories: list[str] | None = None,
+        publication_date: datetime | None = None,
+    ) -> Article:
+        return Article(
+            title=title or f"Title {url}",
+            url=f"https://{source}/{url}",
+            publication_date=publication_date or datetime(2024, 6, 1, tzinfo=UTC),
+            source=source,
+            content="content",
+            description=description,
+            categories=categories,
+        )
+
+    return make
+
+
+@pytest.fixture
+def ingest_article(mocker):
+    """Return process_article with embeddings and the Qdrant upsert stubbed out."""
+    from src.embed import process_article
+
+    mocker.patch("src.embed.embed_texts", side_effect=lambda texts: [[0.1] * 8 for _ in texts])
+    mocker.patch("src.embed.get_qdrant_client")
+    return process_article
+
+
 @pytest.fixture
 def sample_rss_xml():
     """Sample RSS feed XML for testing."""
@@ -109,6 +153,45 @@ def mock_linkup_client(mocker):
     return mock_client
 
 
+class FeedHTTPStub:
+    """In-process stand-in for the feed servers, served through the pooled HTTP client."""
+
+    def __init__(self):
+        self.responses: dict[str, httpx.Response] = {}
+        self.default: httpx.Response | None = None
+        self.requests: list[httpx.Request] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.responses.get(str(request.url), self.default)
+        if response is None:
+            return httpx.Response(404)
+        return response
+
+
+@pytest.fixture
+def feed_http_stub():
+    """Route direct feed fetches to a local stub instead of the network."""
+    stub = FeedHTTPStub()
+    set_http_client(create_http_client(transport=httpx.MockTransport(stub.handle)))
+    yield stub
+    set_http_client(None)
+
+
+@pytest.fixture
+def on_event_loop():
+    """Return a side effect reporting whether it was called on the event loop thread."""
+
+    def check(*args, **kwargs) -> list[bool]:
+        try:
+            asyncio.get_running_loop()
+            return [True]
+        except RuntimeError:
+            return [False]
+
+    return check
+
+
 @pytest.fixture
 def test_client():
     """Create a test client for the FastAPI app."""
@@ -119,8 +202,19 @@ def test_client():
 
 
 @pytest.fixture(autouse=True)
-def setup_env_vars(monkeypatch):
+def setup_env_vars(monkeypatch, tmp_path):
     """Set up environment variables for testing."""
     monkeypatch.setenv("OPENAI_API_KEY", "test-key")
     monkeypatch.setenv("LINKUP_API_KEY", "test-linkup-key")
     monkeypatch.setenv("QDRANT_URL", "http://localhost:6333")
+    monkeypatch.setenv("FEED_CACHE_PATH", str(tmp_path / "feed_cache.json"))
+    monkeypatch.setenv("INGESTION_JOURNAL_PATH", str(tmp_path / "ingestion_journal.jsonl"))
+    monkeypatch.setenv("TRENDING_STATE_PATH", str(tmp_path / "trending_clusters.npz"))
+    monkeypatch.setenv("FACET_INDEX_PATH", str(tmp_path / "facet_index.json"))
+    monkeypatch.setenv("SUGGEST_INDEX_PATH", str(tmp_path / "suggest_index.json"))
+    yield
+    set_story_clusters(None)
+    set_facet_index(None)
+    set_suggest_index(None)
+    response_cache.clear()
+    query_rate_limiter.clear()
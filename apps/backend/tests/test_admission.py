@@ -0,0 +1,177 @@
+"""Tests for admission control and per-client rate limiting on /query."""
+
+import threading
+
+import pytest
+
+from src.admission import ClientRateLimiter, QueryAdmission, query_admission
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestClientRateLimiter:
+    """Test the per-client token buckets."""
+
+    def test_burst_then_refill(self):
+        """Test that a client gets its burst, then one query per refill interval."""
+        clock = FakeClock()
+        limiter = ClientRateLimiter(rate_per_minute=60, burst=2, clock=clock)
+
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("a") == pytest.approx(1.0)
+
+        clock.now = 1.0
+        assert limiter.acquire("a") == 0
+
+    def test_cost_is_capped_at_burst(self):
+        """Test that a cost above the burst waits for a full bucket instead of never passing."""
+        clock = FakeClock()
+        limiter = ClientRateLimiter(rate_per_minute=60, burst=2, clock=clock)
+
+        assert limiter.acquire("a", cost=5) == 0
+        assert limiter.acquire("a", cost=5) == pytest.approx(2.0)
+
+        clock.now = 2.0
+        assert limiter.acquire("a", cost=5) == 0
+
+    def test_clients_are_limited_separately(self):
+        """Test that one client's burst does not use another's tokens."""
+        limiter = ClientRateLimiter(rate_per_minute=60, burst=1, clock=FakeClock())
+
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0
+
+    def test_least_recently_seen_clients_are_dropped(self):
+        """Test that the bucket table stays bounded."""
+        limiter = ClientRateLimiter(rate_per_minute=60, burst=1, max_clients=2, clock=FakeClock())
+
+        limiter.acquire("a")
+        limiter.acquire("b")
+        limiter.acquire("c")
+
+        # "a" was forgotten and starts again with a full bucket
+        assert limiter.acquire("a") == 0
+
+
+class TestQueryAdmission:
+    """Test the bounded in-flight and queued query limits."""
+
+    def test_rejects_past_in_flight_and_queue(self):
+        """Test that admission stops at max_in_flight + max_queue."""
+        admission = QueryAdmission(max_in_flight=1, max_queue=1)
+
+        assert admission.try_admit()
+        assert admission.try_admit()
+        assert not admission.try_admit()
+
+    async def test_slot_released_after_run(self):
+        """Test that a finished or failed query frees its slot."""
+        admission = QueryAdmission(max_in_flight=1, max_queue=0)
+
+        def fail():
+            raise ValueError("boom")
+
+        assert admission.try_admit()
+        assert await admission.run(lambda x: x * 2, 21) == 42
+        assert admission.try_admit()
+        with pytest.raises(ValueError):
+            await admission.run(fail)
+        assert admission.snapshot()["queued"] == 0
+        assert admission.try_admit()
+        admission.close()
+
+
+class TestQueryEndpointAdmission:
+    """Test admission control on the /query endpoint."""
+
+    def test_rate_limited_client_gets_429(self, test_client, mocker):
+        """Test that a client past its burst is rejected with Retry-After."""
+        mocker.patch("main.answer_query", return_value="answer")
+        mocker.patch("src.admission.query_rate_limiter.burst", 1)
+
+        first = test_client.post("/query", json={"query": "q"})
+        second = test_client.post("/query", json={"query": "q"})
+
+        assert first.json() == {"answer": "answer"}
+        assert second.status_code == 429
+        assert second.json()["status"] == "error"
+        assert int(second.headers["retry-after"]) >= 1
+
+    def test_saturated_server_returns_503(self, test_client, mocker):
+        """Test that queries past the in-flight and queue limits are rejected at once."""
+        mock_answer = mocker.patch("main.answer_query")
+        mocker.patch.object(query_admission, "try_admit", return_value=False)
+
+        response = test_client.post("/query", json={"query": "q"})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        mock_answer.assert_not_called()
+
+    def test_saturated_server_degrades_to_search(self, test_client, mocker, monkeypatch):
+        """Test that degrade mode answers with search results when saturated."""
+        monkeypatch.setenv("QUERY_DEGRADE_TO_SEARCH", "true")
+        mock_answer = mocker.patch("main.answer_query")
+        mock_search = mocker.patch("main.search_articles", return_value=[{"title": "t"}])
+        mocker.patch.object(query_admission, "try_admit", return_value=False)
+
+        response = test_client.post("/query", json={"query": "q", "top_k": 3})
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "degraded"
+        assert response.json()["results"] == [{"title": "t"}]
+        mock_search.assert_called_once_with("q", top_k=3, half_life_hours=None)
+        mock_answer.assert_not_called()
+
+    def test_queries_run_off_the_event_loop(self, test_client, mocker):
+        """Test that the answer is computed on a query worker thread."""
+        threads = []
+
+        def answer(query, top_k, half_life_hours):
+            threads.append(threading.current_thread().name)
+            return "answer"
+
+        mocker.patch("main.answer_query", side_effect=answer)
+
+        assert test_client.post("/query", json={"query": "q"}).json() == {"answer": "answer"}
+        assert threads[0].startswith("query")
+
+    def test_batch_answers_are_charged_per_query(self, test_client, mocker):
+        """Test that answered batch queries use the client's tokens and get a 429."""
+        mocker.patch("main.search_articles_batch", return_value=[[], []])
+        mocker.patch("main.answer_queries", return_value=["a", "b"])
+        mocker.patch("src.admission.query_rate_limiter.burst", 3)
+
+        first = test_client.post("/query/batch", json={"queries": ["q", "r"], "answer": True})
+        second = test_client.post("/query/batch", json={"queries": ["q", "r"], "answer": True})
+
+        assert [result["answer"] for result in first.json()["results"]] == ["a", "b"]
+        assert second.status_code == 429
+        assert second.json() == {
+            "status": "error",
+            "message": "Too many queries, slow down",
+            "results": [],
+        }
+        assert int(second.headers["retry-after"]) >= 1
+
+    def test_saturated_server_rejects_answered_batch(self, test_client, mocker):
+        """Test that an answered batch needs an admission slot, a search-only one does not."""
+        mock_answer = mocker.patch("main.answer_queries")
+        mocker.patch("main.search_articles_batch", return_value=[[]])
+        mocker.patch.object(query_admission, "try_admit", return_value=False)
+
+        answered = test_client.post("/query/batch", json={"queries": ["q"], "answer": True})
+        search_only = test_client.post("/query/batch", json={"queries": ["q"]})
+
+        assert answered.status_code == 503
+        assert answered.headers["retry-after"] == "1"
+        mock_answer.assert_not_called()
+        assert search_only.json()["status"] == "success"
@@ -1,27 +1,42 @@
 """Tests for FastAPI endpoints."""
 
+import threading
+
 
 class TestProcessArticlesEndpoint:
-    """Test the /process-articles endpoint."""
+    """Test the /process-articles background job endpoints."""
 
-    def test_process_articles_success(self, test_client, mocker):
-        """Test successful article processing."""
-        # Mock the process_all_articles function
-        mock_articles = [
-            mocker.MagicMock(
-                title="Test Article",
-                url="https://example.com/article",
-                source="example.com",
-            )
-        ]
-        mocker.patch("main.process_all_articles", return_value=mock_articles)
+    def wait_for_job(self, job_id):
+        from main import ingestion_jobs
+
+        return ingestion_jobs.wait(job_id, timeout=5)
+
+    def test_process_articles_success(self, test_client, mocker, sample_article):
+        """Test that ingestion runs as a job and reports compact summaries."""
+        mocker.patch("main.process_all_articles", return_value=[sample_article])
 
         response = test_client.post("/process-articles")
 
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "success"
-        assert "articles" in data
+        job_id = data["job_id"]
+
+        self.wait_for_job(job_id)
+        status = test_client.get(f"/process-articles/{job_id}").json()
+
+        assert status["status"] == "success"
+        job = status["job"]
+        assert job["status"] == "succeeded"
+        assert job["articles"] == [
+            {
+                "title": "Test Article",
+                "url": "https://example.com/article",
+                "source": "example.com",
+                "publication_date": "2024-01-01T12:00:00",
+            }
+        ]
+        assert "content" not in job["articles"][0]
 
     def test_process_articles_error(self, test_client, mocker):
         """Test error handling in article processing."""
@@ -30,9 +45,59 @@ class TestProcessArticlesEndpoint:
         response = test_client.post("/process-articles")
 
         assert response.status_code == 200
-        data = response.json()
+        job_id = response.json()["job_id"]
+        self.wait_for_job(job_id)
+
+        job = test_client.get(f"/process-articles/{job_id}").json()["job"]
+        assert job["status"] == "failed"
+        assert job["error"] == "Processing error"
+
+    def test_process_articles_reports_progress(self, test_client, mocker):
+        """Test that progress counters and throughput are exposed while running."""
+        release = threading.Event()
+
+        def run(progress):
+            progress.feeds_total = 10
+            progress.feeds_fetched = 4
+            progress.chunks_embedded = 12
+            release.wait(5)
+            return []
+
+        mocker.patch("main.process_all_articles", side_effect=run)
+
+        job_id = test_client.post("/process-articles").json()["job_id"]
+        job = test_client.get(f"/process-articles/{job_id}").json()["job"]
+
+        assert job["status"] == "running"
+        assert "chunks_per_second" in job
+
+        release.set()
+        self.wait_for_job(job_id)
+        job = test_client.get(f"/process-articles/{job_id}").json()["job"]
+        assert job["progress"]["feeds_fetched"] == 4
+        assert job["progress"]["chunks_embedded"] == 12
+
+    def test_only_one_job_runs_at_a_time(self, test_client, mocker):
+        """Test that a second POST is rejected while a job is running."""
+        release = threading.Event()
+        mocker.patch(
+            "main.process_all_articles", side_effect=lambda progress: release.wait(5) and []
+        )
+
+        first = test_client.post("/process-articles").json()
+        second = test_client.post("/process-articles").json()
+
+        assert second["status"] == "error"
+        assert second["job_id"] == first["job_id"]
+
+        release.set()
+        self.wait_for_job(first["job_id"])
+
+    def test_unknown_job(self, test_client):
+        """Test looking up a job id that does not exist."""
+        data = test_client.get("/process-articles/unknown").json()
+
         assert data["status"] == "error"
-        assert "message" in data
 
 
 class TestGetArticlesEndpoint:
@@ -111,7 +176,7 @@ class TestQueryEndpoint:
         response = test_client.post("/query", json={"query": "Test query"})
 
         assert response.status_code == 200
-        mock_answer_query.assert_called_once_with("Test query", top_k=8)
+        mock_answer_query.assert_called_once_with("Test query", top_k=8, half_life_hours=None)
 
     def test_query_custom_top_k(self, test_client, mocker):
         """Test query with custom top_k value."""
@@ -120,7 +185,26 @@ class TestQueryEndpoint:
         response = test_client.post("/query", json={"query": "Test query", "top_k": 15})
 
         assert response.status_code == 200
-        mock_answer_query.assert_called_once_with("Test query", top_k=15)
+        mock_answer_query.assert_called_once_with("Test query", top_k=15, half_life_hours=None)
+
+    def test_query_recency(self, test_client, mocker):
+        """Test that the recency toggle passes the half-life through."""
+        mock_answer_query = mocker.patch("main.answer_query", return_value="Answer")
+
+        response = test_client.post(
+            "/query", json={"query": "Test query", "recency": True, "half_life_hours": 24}
+        )
+
+        assert response.status_code == 200
+        mock_answer_query.assert_called_once_with("Test query", top_k=8, half_life_hours=24)
+
+    def test_query_invalid_half_life(self, test_client):
+        """Test that a non-positive half-life is rejected."""
+        response = test_client.post(
+            "/query", json={"query": "Test query", "recency": True, "half_life_hours": 0}
+        )
+
+        assert response.status_code == 422
 
     def test_query_missing_query_field(self, test_client, mocker):
         """Test query with missing query field."""
@@ -175,3 +259,252 @@ class TestHealthCheck:
         # Should get a valid response
         assert response.status_code == 200
         assert response.json() is not None
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus /metrics endpoint."""
+
+    def test_metrics_exposition(self, test_client, mocker):
+        """Test that request latency is exported under the route template."""
+        mocker.patch("main.get_recent_articles", return_value=[])
+        test_client.get("/articles")
+        test_client.get("/process-articles/unknown-job")
+
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'gossip_http_request_seconds_count{endpoint="/articles",method="GET"' in body
+        assert 'endpoint="/process-articles/{job_id}"' in body
+        assert "unknown-job" not in body
+
+    def test_record_tokens_ignores_missing_usage(self):
+        """Test that token counters only count reported usage."""
+        from src.metrics import OPENAI_TOKENS, record_tokens
+
+        counter = OPENAI_TOKENS.labels(endpoint="ingestion", model="test-model", kind="prompt")
+        before = counter._value.get()
+
+        record_tokens("test-model", "prompt", 12)
+        record_tokens("test-model", "prompt", None)
+
+        assert counter._value.get() == before + 12
+
+
+class TestSearchEndpoint:
+    """Test the /search endpoint."""
+
+    def test_search_success(self, test_client, mocker):
+        """Test that matching chunks are returned without generating an answer."""
+        chunks = [{"text": "chunk", "article_title": "Title", "score": 0.9}]
+        mock_search = mocker.patch("main.search_articles", return_value=chunks)
+
+        response = test_client.get("/search", params={"q": "Test query", "top_k": 3})
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "results": chunks}
+        mock_search.assert_called_once_with("Test query", top_k=3, half_life_hours=None)
+
+    def test_search_error(self, test_client, mocker):
+        """Test search error handling."""
+        mocker.patch("main.search_articles", side_effect=Exception("Search error"))
+
+        response = test_client.get("/search", params={"q": "Test query"})
+
+        data = response.json()
+        assert data["status"] == "error"
+        assert data["results"] == []
+
+    def test_search_runs_off_the_event_loop(self, test_client, mocker, on_event_loop):
+        """Test that the blocking search runs on a worker thread."""
+        mocker.patch("main.search_articles", side_effect=lambda *args, **kwargs: on_event_loop())
+
+        response = test_client.get("/search", params={"q": "Test query"})
+
+        assert response.json() == {"status": "success", "results": [False]}
+
+
+class TestBatchQueryEndpoint:
+    """Test the /query/batch endpoint."""
+
+    def test_batch_search_only(self, test_client, mocker):
+        """Test that results are returned per query without answers by default."""
+        results = [[{"text": "chunk", "score": 0.9}], []]
+        mock_search = mocker.patch("main.search_articles_batch", return_value=results)
+        mock_answer = mocker.patch("main.answer_queries")
+
+        response = test_client.post("/query/batch", json={"queries": ["First", "Second"]})
+
+        assert response.json() == {
+            "status": "success",
+            "results": [
+                {"query": "First", "results": results[0], "answer": None},
+                {"query": "Second", "results": [], "answer": None},
+            ],
+        }
+        mock_search.assert_called_once_with(["First", "Second"], top_k=8, half_life_hours=None)
+        mock_answer.assert_not_called()
+
+    def test_batch_uses_one_embedding_and_one_search_call(
+        self, test_client, mocker, mock_openai_client, mock_qdrant_client
+    ):
+        """Test that all queries share one embeddings request and one batched search."""
+        mock_openai_client.embeddings.create.return_value.data = [
+            mocker.MagicMock(embedding=[0.1] * 1536, index=0),
+            mocker.MagicMock(embedding=[0.2] * 1536, index=1),
+        ]
+        mock_qdrant_client.query_batch_points.return_value = [
+            mock_qdrant_client.query_points.return_value,
+            mocker.MagicMock(points=[]),
+        ]
+        mocker.patch("src.embed.get_openai_client", return_value=mock_openai_client)
+        mocker.patch("src.rag.get_openai_client", return_value=mock_openai_client)
+        mocker.patch("src.rag.get_qdrant_client", return_value=mock_qdrant_client)
+
+        response = test_client.post(
+            "/query/batch", json={"queries": ["First", "Second"], "top_k": 3, "answer": True}
+        )
+
+        results = response.json()["results"]
+        assert results[0]["results"][0]["article_title"] == "Test Article"
+        assert results[0]["answer"] == "This is a test response"
+        assert results[1]["results"] == []
+        assert (
+            results[1]["answer"] == "I couldn't find any relevant articles to answer your question."
+        )
+        mock_openai_client.embeddings.create.assert_called_once()
+        assert mock_openai_client.embeddings.create.call_args.kwargs["input"] == ["First", "Second"]
+        requests = mock_qdrant_client.query_batch_points.call_args.kwargs["requests"]
+        assert [request.limit for request in requests] == [3, 3]
+        mock_qdrant_client.query_points.assert_not_called()
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    def test_batch_runs_off_the_event_loop(self, test_client, mocker, on_event_loop):
+        """Test that the blocking search and answers run on worker threads."""
+        mocker.patch(
+            "main.search_articles_batch", side_effect=lambda queries, **kwargs: [on_event_loop()]
+        )
+        mocker.patch("main.answer_queries", side_effect=lambda queries, results: on_event_loop())
+
+        response = test_client.post("/query/batch", json={"queries": ["First"], "answer": True})
+
+        assert response.json()["results"] == [
+            {"query": "First", "results": [False], "answer": False}
+        ]
+
+    def test_answers_respect_concurrency_cap(self, mocker):
+        """Test that no more than max_concurrency answers are generated at once."""
+        from src.rag import answer_queries
+
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        def generate(messages):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            threading.Event().wait(0.02)
+            with lock:
+                in_flight -= 1
+            return messages[1]["content"].split("\n")[0]
+
+        mocker.patch("src.rag.generate_answer", side_effect=generate)
+        queries = [f"Query {idx}" for idx in range(6)]
+        chunks = [
+            {
+                "text": "chunk",
+                "article_title": "Title",
+                "article_url": "https://example.com/article",
+                "source": "example.com",
+                "score": 0.9,
+            }
+        ]
+
+        answers = answer_queries(queries, [chunks] * 6, max_concurrency=2)
+
+        assert answers == [f"Question: {query}" for query in queries]
+        assert peak == 2
+
+    def test_batch_size_is_limited(self, test_client):
+        """Test that empty and oversized batches are rejected."""
+        from src.rag import MAX_BATCH_QUERIES
+
+        assert test_client.post("/query/batch", json={"queries": []}).status_code == 422
+        response = test_client.post(
+            "/query/batch", json={"queries": ["query"] * (MAX_BATCH_QUERIES + 1)}
+        )
+        assert response.status_code == 422
+
+    def test_batch_error(self, test_client, mocker):
+        """Test batch query error handling."""
+        mocker.patch("main.search_articles_batch", side_effect=Exception("Search error"))
+
+        response = test_client.post("/query/batch", json={"queries": ["First"]})
+
+        data = response.json()
+        assert data["status"] == "error"
+        assert data["results"] == []
+
+
+class TestRequestTracing:
+    """Test trace headers on the query path."""
+
+    def test_trace_id_header(self, test_client, mocker):
+        """Test that traced endpoints return a trace id but no timings by default."""
+        mocker.patch("main.answer_query", return_value="Answer")
+
+        response = test_client.post("/query", json={"query": "Test query"})
+
+        assert len(response.headers["X-Trace-Id"]) == 32
+        assert "Server-Timing" not in response.headers
+
+    def test_debug_timing_header(self, test_client, mocker):
+        """Test that per-stage timings are returned when requested."""
+        mocker.patch("src.rag.embed_text", return_value=[0.1] * 1536)
+        mocker.patch("src.rag.search_similar_chunks", return_value=[])
+
+        response = test_client.get(
+            "/search", params={"q": "Test query"}, headers={"X-Debug-Timing": "1"}
+        )
+
+        timing = response.headers["Server-Timing"]
+        assert "embedding;dur=" in timing
+        assert "vector_search;dur=" in timing
+        assert "total;dur=" in timing
+
+    def test_untraced_endpoint(self, test_client, mocker):
+        """Test that other endpoints are not traced."""
+        mocker.patch("main.get_recent_articles", return_value=[])
+
+        response = test_client.get("/articles")
+
+        assert "X-Trace-Id" not in response.headers
+
+
+class TestLifespan:
+    """Test client management by the app lifespan."""
+
+    def test_clients_are_opened_and_closed(self, mocker):
+        """Test that the Qdrant store opens at startup and every client closes at shutdown."""
+        from fastapi.testclient import TestClient
+
+        from main import app
+
+        mock_get_qdrant = mocker.patch("main.get_qdrant_client")
+        mock_close_qdrant = mocker.patch("main.close_qdrant_client")
+        mock_close_openai = mocker.patch("main.close_openai_client")
+        mock_close_http = mocker.patch("main.close_http_client")
+        mock_close_pool = mocker.patch("main.close_process_pool")
+
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+            mock_get_qdrant.assert_called_once()
+            mock_close_qdrant.assert_not_called()
+
+        mock_close_qdrant.assert_called_once()
+        mock_close_openai.assert_called_once()
+        mock_close_http.assert_called_once()
+        mock_close_pool.assert_called_once()
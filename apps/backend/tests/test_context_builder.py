@@ -0,0 +1,128 @@
+"""Tests for the query context builder."""
+
+from src.context_builder import (
+    build_context,
+    join_overlapping,
+    merge_adjacent_chunks,
+    mmr_select,
+    pack_context,
+)
+from src.embed import split_text_into_chunks
+
+
+def make_chunk(url: str, chunk_index: int, text: str, vector=None, score: float = 0.5) -> dict:
+    chunk = {
+        "text": text,
+        "article_title": url,
+        "article_url": url,
+        "source": "example.com",
+        "chunk_index": chunk_index,
+        "score": score,
+    }
+    if vector is not None:
+        chunk["vector"] = vector
+    return chunk
+
+
+class TestMMRSelect:
+    """Test maximal marginal relevance selection."""
+
+    def test_prefers_diverse_candidates(self):
+        """Test that a near-duplicate of the best candidate is passed over."""
+        relevance = [0.99, 0.98, 0.7]
+        candidates = [[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7]]
+
+        assert mmr_select(relevance, candidates, k=2, lambda_=0.5) == [0, 2]
+
+    def test_lambda_one_keeps_relevance_order(self):
+        """Test that lambda 1 is the plain relevance ranking."""
+        relevance = [0.7, 1.0, 0.9]
+        candidates = [[0.5, 0.5], [1.0, 0.0], [0.9, 0.1]]
+
+        assert mmr_select(relevance, candidates, k=3, lambda_=1.0) == [1, 2, 0]
+
+
+class TestMergeAdjacentChunks:
+    """Test merging of consecutive chunks from one article."""
+
+    def test_overlap_is_removed(self):
+        """Test that merged chunks reproduce the article text without repeats."""
+        text = " ".join(f"word{idx}" for idx in range(400))
+        chunks = split_text_into_chunks(text, chunk_size=500, overlap=100)
+
+        assert join_overlapping(chunks[0]["text"], chunks[1]["text"], 100) == text[:900].strip()
+
+    def test_runs_are_merged_in_rank_order(self):
+        """Test that runs become one passage, ranked like their best chunk."""
+        chunks = [
+            make_chunk("b", 0, "other", score=0.9),
+            make_chunk("a", 3, "three four", score=0.8, vector=[1.0]),
+            make_chunk("a", 2, "two three", score=0.7),
+            make_chunk("a", 7, "seven", score=0.6),
+        ]
+
+        passages = merge_adjacent_chunks(chunks)
+
+        assert [passage["text"] for passage in passages] == ["other", "two three four", "seven"]
+        assert passages[1]["score"] == 0.8
+        assert "vector" not in passages[1]
+
+
+class TestPackContext:
+    """Test packing passages into the token budget."""
+
+    def test_budget_is_respected(self):
+        """Test that passages over the remaining budget are skipped."""
+        passages = [
+            make_chunk("a", 0, "x" * 400),
+            make_chunk("b", 0, "y" * 400),
+            make_chunk("c", 0, "z" * 40),
+        ]
+
+        packed = pack_context(passages, token_budget=120)
+
+        assert [passage["article_url"] for passage in packed] == ["a", "c"]
+
+    def test_best_passage_is_truncated_when_nothing_fits(self):
+        """Test that the best passage is cut to the budget instead of being dropped."""
+        packed = pack_context([make_chunk("a", 0, "x" * 1000)], token_budget=10)
+
+        assert len(packed) == 1
+        assert len(packed[0]["text"]) == 40
+
+
+class TestBuildContext:
+    """Test the full context building path."""
+
+    def test_diversifies_and_reports_savings(self, mocker):
+        """Test that over-fetched candidates are narrowed to top_k and savings logged."""
+        mock_logger = mocker.patch("src.context_builder.logger")
+        candidates = [
+            make_chunk("a", 0, "alpha " * 50, vector=[1.0, 0.0], score=1.0),
+            make_chunk("a", 0, "alpha " * 50, vector=[1.0, 0.0], score=1.0),
+            make_chunk("b", 0, "beta " * 50, vector=[0.6, 0.8], score=0.6),
+        ]
+
+        context = build_context(candidates, top_k=2, lambda_=0.3)
+
+        assert [passage["article_url"] for passage in context] == ["a", "b"]
+        kwargs = mock_logger.info.call_args.kwargs
+        assert kwargs["candidates"] == 3
+        assert kwargs["tokens_saved"] == kwargs["baseline_tokens"] - kwargs["context_tokens"]
+
+    def test_answer_query_over_fetches_with_vectors(self, mocker):
+        """Test that answer_query fetches extra candidates with their vectors."""
+        from src.rag import answer_query
+
+        mocker.patch("src.rag.embed_text", return_value=[1.0, 0.0])
+        mock_search = mocker.patch(
+            "src.rag.search_similar_chunks",
+            return_value=[make_chunk("a", 0, "alpha", vector=[1.0, 0.0])],
+        )
+        mock_generate = mocker.patch("src.rag.generate_answer", return_value="Answer")
+
+        assert answer_query("Query", top_k=4) == "Answer"
+        mock_search.assert_called_once_with(
+            [1.0, 0.0], limit=12, with_vectors=True, half_life_hours=None
+        )
+        assert "alpha" in mock_generate.call_args.args[0][1]["content"]
@@ -0,0 +1,128 @@
+"""Tests for chunking, embedding and storing articles."""
+
+import pytest
+
+from src.embed import (
+    EMBEDDING_BATCH_SIZE,
+    IngestionProgress,
+    embed_texts,
+    ingest_feed,
+    ingestion_lock,
+    process_article,
+    process_feed_results,
+)
+from src.rss_collector import FeedItem, FeedResult
+
+
+def embedding_response(mocker, inputs):
+    return mocker.MagicMock(
+        data=[mocker.MagicMock(index=i, embedding=[float(i)] * 3) for i in range(len(inputs))]
+    )
+
+
+class TestEmbedTexts:
+    """Test batched embedding requests."""
+
+    def test_batches_inputs(self, mocker):
+        """Test that chunks are embedded with one request per batch."""
+        mock_openai = mocker.patch("src.embed.get_openai_client").return_value
+        mock_openai.embeddings.create.side_effect = lambda input, model: embedding_response(
+            mocker, input
+        )
+
+        embeddings = embed_texts([f"chunk {i}" for i in range(EMBEDDING_BATCH_SIZE + 1)])
+
+        assert len(embeddings) == EMBEDDING_BATCH_SIZE + 1
+        assert mock_openai.embeddings.create.call_count == 2
+
+    def test_dimensions_only_sent_when_requested(self, mocker):
+        """Test that shortened embeddings are requested with dimensions."""
+        mock_openai = mocker.patch("src.embed.get_openai_client").return_value
+        mock_openai.embeddings.create.side_effect = lambda input, model, **kwargs: (
+            embedding_response(mocker, input)
+        )
+
+        embed_texts(["chunk"])
+        embed_texts(["chunk"], dimensions=256)
+
+        first, second = mock_openai.embeddings.create.call_args_list
+        assert "dimensions" not in first.kwargs
+        assert second.kwargs["dimensions"] == 256
+
+
+class TestProcessArticle:
+    """Test the process_article function."""
+
+    def test_stores_all_chunks(self, mocker, sample_article):
+        """Test that every chunk is embedded and upserted with a stable id."""
+        mock_openai = mocker.patch("src.embed.get_openai_client").return_value
+        mock_openai.embeddings.create.side_effect = lambda input, model: embedding_response(
+            mocker, input
+        )
+        mock_qdrant = mocker.patch("src.embed.get_qdrant_client").return_value
+
+        assert process_article(sample_article) == 1
+        first_points = mock_qdrant.upsert.call_args.kwargs["points"]
+        process_article(sample_article)
+        second_points = mock_qdrant.upsert.call_args.kwargs["points"]
+
+        assert [p.id for p in first_points] == [p.id for p in second_points]
+
+    def test_embedding_failure_fails_article(self, mocker, sample_article):
+        """Test that an embedding error fails the article instead of dropping chunks."""
+        mock_openai = mocker.patch("src.embed.get_openai_client").return_value
+        mock_openai.embeddings.create.side_effect = ValueError("bad request")
+        mock_qdrant = mocker.patch("src.embed.get_qdrant_client").return_value
+
+        with pytest.raises(ValueError):
+            process_article(sample_article)
+        mock_qdrant.upsert.assert_not_called()
+
+
+class TestProcessFeedResults:
+    """Test ingestion of the collected feeds."""
+
+    def test_article_in_several_feeds_is_embedded_once(self, mocker, make_article):
+        """Test that an item listed by two feeds is embedded and counted once."""
+        shared, other = (
+            make_article("https://public.fr/shared"),
+            make_article("https://public.fr/b"),
+        )
+        feed_results = [
+            FeedResult(
+                feed_url=f"https://public.fr/{name}.xml",
+                source="public.fr",
+                items=[FeedItem(guid=article.url, article=article) for article in articles],
+            )
+            for name, articles in [("people", [shared]), ("tv", [shared, other])]
+        ]
+        mock_process = mocker.patch("src.embed.process_article", return_value=1)
+        progress = IngestionProgress()
+        for result in feed_results:
+            progress.record_feed(result)
+
+        stats = process_feed_results(feed_results, mocker.MagicMock(), progress)
+
+        assert sorted(call.args[0].url for call in mock_process.call_args_list) == [
+            other.url,
+            shared.url,
+        ]
+        assert stats["total_articles"] == stats["articles_processed"] == 2
+        assert stats["duplicate_articles"] == 1
+        assert progress.articles_total == progress.articles_embedded == 2
+
+
+class TestIngestFeed:
+    """Test ingestion of a single scheduled feed."""
+
+    def test_skips_while_another_run_holds_the_lock(self, mocker):
+        """Test that a poll returns at once instead of waiting for a running ingestion."""
+        mocker.patch("src.embed.ensure_collection_exists")
+        mock_collect = mocker.patch("src.embed.collect_feed")
+
+        with ingestion_lock:
+            stats = ingest_feed("https://public.fr/feed.xml", "public.fr")
+
+        assert stats == {"skipped": True}
+        mock_collect.assert_not_called()
+        assert not ingestion_lock.locked()
@@ -0,0 +1,95 @@
+"""Tests for the precomputed source and category facets."""
+
+from src.facets import FacetIndex, get_facet_index, set_facet_index
+
+
+class TestFacetIndex:
+    """Test incremental facet counting and persistence."""
+
+    def test_counts_articles_per_source_and_category(self, tmp_path, make_article):
+        """Test that each article counts once per source and per distinct category."""
+        index = FacetIndex(tmp_path / "facets.json")
+        index.add_article(make_article("a", "public.fr", categories=["People", "Cinéma", "People"]))
+        index.add_article(make_article("b", "public.fr", categories=["People"]))
+        index.add_article(make_article("c", "vsd.fr"))
+
+        assert index.facets() == {
+            "total_articles": 3,
+            "sources": {"public.fr": 2, "vsd.fr": 1},
+            "categories": {"People": 2, "Cinéma": 1},
+        }
+
+    def test_reingested_article_replaces_its_facets(self, tmp_path, make_article):
+        """Test that the same URL is counted once, with its latest categories."""
+        index = FacetIndex(tmp_path / "facets.json")
+        index.add_article(make_article("a", categories=["People"]))
+        index.facets()
+        index.add_article(make_article("a", categories=["Mode"]))
+
+        assert index.facets() == {
+            "total_articles": 1,
+            "sources": {"public.fr": 1},
+            "categories": {"Mode": 1},
+        }
+
+    def test_save_and_load_round_trip(self, tmp_path, make_article):
+        """Test that counts survive a restart."""
+        index = FacetIndex(tmp_path / "facets.json")
+        index.add_article(make_article("a", categories=["People"]))
+        index.add_article(make_article("b", "vsd.fr", categories=["Politique"]))
+        index.save()
+
+        assert FacetIndex.load(tmp_path / "facets.json").facets() == index.facets()
+
+    def test_unreadable_index_starts_empty(self, tmp_path):
+        """Test that a corrupt file is ignored."""
+        path = tmp_path / "facets.json"
+        path.write_text("not json")
+
+        assert FacetIndex.load(path).facets()["total_articles"] == 0
+
+    def test_reloaded_when_saved_by_another_process(self, make_article):
+        """Test that the shared index picks up a save made by a separate ingestion run."""
+        served = get_facet_index()
+        ingestion = FacetIndex.load(served.path)
+        ingestion.add_article(make_article("a"))
+        ingestion.save()
+
+        assert get_facet_index() is not served
+        assert get_facet_index().facets()["total_articles"] == 1
+
+    def test_own_save_does_not_reload(self, make_article):
+        """Test that saving the shared index keeps the same instance."""
+        index = get_facet_index()
+        index.add_article(make_article("a"))
+        index.save()
+
+        assert get_facet_index() is index
+
+
+class TestFacetsEndpoint:
+    """Test the /facets endpoint."""
+
+    def test_facets_served_from_index(self, test_client, tmp_path, make_article):
+        """Test that the endpoint returns the precomputed counts."""
+        index = FacetIndex(tmp_path / "facets.json")
+        index.add_article(make_article("a", categories=["People"]))
+        set_facet_index(index)
+
+        response = test_client.get("/facets")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "success",
+            "total_articles": 1,
+            "sources": {"public.fr": 1},
+            "categories": {"People": 1},
+        }
+
+    def test_facets_updated_by_ingestion(self, ingest_article, sample_article):
+        """Test that processing an article adds it to the facet index."""
+        ingest_article(sample_article)
+
+        facets = get_facet_index().facets()
+        assert facets["total_articles"] == 1
+        assert facets["sources"] == {sample_article.source: 1}
@@ -0,0 +1,47 @@
+"""Tests for the feed cache."""
+
+from src.feed_cache import MAX_GUIDS_PER_FEED, FeedCache, FeedCacheEntry
+
+
+class TestFeedCache:
+    """Test loading and saving the feed cache."""
+
+    def test_load_missing_file(self, tmp_path):
+        """Test that a missing cache file yields an empty cache."""
+        cache = FeedCache.load(tmp_path / "missing.json")
+        assert cache.entries == {}
+
+    def test_load_uses_env_path(self, tmp_path, monkeypatch):
+        """Test that FEED_CACHE_PATH selects the cache file."""
+        monkeypatch.setenv("FEED_CACHE_PATH", str(tmp_path / "env_cache.json"))
+        cache = FeedCache.load()
+        assert cache.path == tmp_path / "env_cache.json"
+
+    def test_save_and_reload(self, tmp_path):
+        """Test that entries survive a save/load round trip."""
+        cache = FeedCache(tmp_path / "cache.json")
+        cache.update(
+            "https://example.com/feed",
+            FeedCacheEntry(etag='"abc"', last_build_date="Mon, 01 Jan 2024", item_guids=["1"]),
+        )
+        cache.save()
+
+        reloaded = FeedCache.load(tmp_path / "cache.json")
+        entry = reloaded.get("https://example.com/feed")
+        assert entry is not None
+        assert entry.etag == '"abc"'
+        assert entry.item_guids == ["1"]
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        """Test that an unreadable cache file does not break ingestion."""
+        path = tmp_path / "cache.json"
+        path.write_text("not json")
+        assert FeedCache.load(path).entries == {}
+
+    def test_guids_are_capped(self, tmp_path):
+        """Test that only the most recent GUIDs are kept."""
+        cache = FeedCache(tmp_path / "cache.json")
+        guids = [str(i) for i in range(MAX_GUIDS_PER_FEED + 10)]
+        cache.update("https://example.com/feed", FeedCacheEntry(item_guids=guids))
+
+        assert cache.get("https://example.com/feed").item_guids == guids[-MAX_GUIDS_PER_FEED:]
@@ -0,0 +1,82 @@
+"""Tests for HTML-to-text extraction."""
+
+import pytest
+
+from src import html_text
+from src.html_text import PARALLEL_MIN_ITEMS, close_process_pool, extract_text, extract_texts
+
+
+class TestExtractText:
+    """Test the extract_text function."""
+
+    def test_extract_simple_text(self):
+        """Test extracting text from a single paragraph."""
+        assert extract_text("<p>Hello World</p>") == "Hello World"
+
+    def test_empty_and_none(self):
+        """Test that empty input yields an empty string."""
+        assert extract_text("") == ""
+        assert extract_text(None) == ""
+
+    def test_skips_non_content_elements(self):
+        """Test that scripts, styles and figure captions are dropped."""
+        html = (
+            "<p>Kept</p>"
+            '<script async src="//www.instagram.com/embed.js"></script>'
+            "<style>.a{color:red}</style>"
+            '<figure><img src="a.jpg" /><figcaption>Photo credit</figcaption></figure>'
+            "<noscript>Enable JS</noscript>"
+        )
+        assert extract_text(html) == "Kept"
+
+    def test_preserves_paragraph_boundaries(self):
+        """Test that block elements become paragraph separators."""
+        html = "<h2>Title</h2><p>First paragraph.</p><ul><li>One</li><li>Two</li></ul>"
+        assert extract_text(html) == "Title\n\nFirst paragraph.\n\nOne\n\nTwo"
+
+    def test_line_breaks_inside_paragraph(self):
+        """Test that <br> keeps a single line break."""
+        assert extract_text("<p>Line one<br />Line two</p>") == "Line one\nLine two"
+
+    def test_normalizes_whitespace(self):
+        """Test that runs of whitespace, including nbsp, collapse to one space."""
+        html = "<p>  Hello \n\t  big&nbsp;&nbsp;world  </p>"
+        assert extract_text(html) == "Hello big world"
+
+    def test_inline_tags_do_not_split_words(self):
+        """Test that inline markup does not insert spaces."""
+        assert extract_text("<p>Jean-<strong>Marc</strong> est l&agrave;</p>") == (
+            "Jean-Marc est là"
+        )
+
+    def test_drops_comments(self):
+        """Test that HTML comments are removed."""
+        assert extract_text("<p>Visible<!-- hidden --></p>") == "Visible"
+
+
+class TestExtractTexts:
+    """Test the batch extract_texts function."""
+
+    def test_inline_batch(self):
+        """Test batch extraction without a process pool."""
+        assert extract_texts(["<p>A</p>", None, "<p>B</p>"]) == ["A", "", "B"]
+
+    def test_process_pool_matches_inline(self):
+        """Test that the process pool returns the same results in order."""
+        html_contents = [f"<p>Item {i}</p><script>x()</script>" for i in range(PARALLEL_MIN_ITEMS)]
+
+        assert extract_texts(html_contents, max_workers=2) == extract_texts(html_contents)
+
+    def test_close_process_pool(self):
+        """Test that closing the pool shuts it down and the next batch starts a new one."""
+        html_contents = ["<p>Item</p>"] * PARALLEL_MIN_ITEMS
+        extract_texts(html_contents, max_workers=2)
+        pool = html_text._process_pool
+
+        close_process_pool()
+
+        assert html_text._process_pool is None
+        with pytest.raises(RuntimeError):
+            pool.submit(extract_text, "<p>Item</p>")
+        assert extract_texts(html_contents, max_workers=2) == ["Item"] * PARALLEL_MIN_ITEMS
+        close_process_pool()
@@ -0,0 +1,144 @@
+"""Tests for cached, compressed read responses."""
+
+import gzip
+
+from src.index_cache import index_version
+
+
+def make_articles(count: int) -> list[dict]:
+    return [
+        {
+            "title": f"Article {i}",
+            "url": f"https://example.com/{i}",
+            "source": "example.com",
+            "description": "Une description assez longue pour que la liste dépasse le seuil.",
+        }
+        for i in range(count)
+    ]
+
+
+class TestArticlesCache:
+    """Test response caching for /articles."""
+
+    def test_articles_served_from_cache_until_ingestion(self, test_client, mocker):
+        """Test that Qdrant is only scanned again after the index version changes."""
+        mock_get_recent = mocker.patch("main.get_recent_articles", return_value=make_articles(2))
+
+        first = test_client.get("/articles")
+        second = test_client.get("/articles")
+        index_version.bump()
+        third = test_client.get("/articles")
+
+        assert first.json() == second.json() == third.json()
+        assert mock_get_recent.call_count == 2
+
+    def test_errors_are_not_cached(self, test_client, mocker):
+        """Test that a failed scan is retried on the next request."""
+        mock_get_recent = mocker.patch(
+            "main.get_recent_articles", side_effect=[Exception("down"), make_articles(1)]
+        )
+
+        assert test_client.get("/articles").json()["status"] == "error"
+        assert test_client.get("/articles").json()["status"] == "success"
+        assert mock_get_recent.call_count == 2
+
+    def test_qdrant_failure_is_not_cached(self, test_client, mocker):
+        """Test that a failed Qdrant scroll is reported rather than cached as an empty list."""
+        mock_client = mocker.MagicMock()
+        mock_client.scroll.side_effect = [Exception("down"), ([], None)]
+        mocker.patch("src.embed.get_qdrant_client", return_value=mock_client)
+
+        first = test_client.get("/articles").json()
+        second = test_client.get("/articles").json()
+
+        assert first["status"] == "error"
+        assert second == {"status": "success", "articles": []}
+        assert mock_client.scroll.call_count == 2
+
+    def test_matching_etag_returns_not_modified(self, test_client, mocker):
+        """Test that a conditional request with the current ETag gets a 304."""
+        mocker.patch("main.get_recent_articles", return_value=make_articles(1))
+
+        etag = test_client.get("/articles").headers["etag"]
+        response = test_client.get("/articles", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_stale_etag_returns_new_body(self, test_client, mocker):
+        """Test that an ETag from before ingestion no longer matches."""
+        mocker.patch("main.get_recent_articles", return_value=make_articles(1))
+        etag = test_client.get("/articles").headers["etag"]
+        mocker.patch("main.get_recent_articles", return_value=make_articles(2))
+        index_version.bump()
+
+        response = test_client.get("/articles", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert len(response.json()["articles"]) == 2
+        assert response.headers["etag"] != etag
+
+
+class TestCompression:
+    """Test content negotiation for read responses."""
+
+    def test_large_responses_are_gzipped(self, test_client, mocker):
+        """Test that a large body is gzip encoded when the client accepts it."""
+        mocker.patch("main.get_recent_articles", return_value=make_articles(50))
+
+        response = test_client.get("/articles", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.headers["etag"].endswith('-gzip"')
+        assert len(response.json()["articles"]) == 50
+
+    def test_refused_encoding_is_not_used(self, test_client, mocker):
+        """Test that q=0 disables an encoding."""
+        mocker.patch("main.get_recent_articles", return_value=make_articles(50))
+
+        response = test_client.get("/articles", headers={"Accept-Encoding": "gzip;q=0"})
+
+        assert "content-encoding" not in response.headers
+        assert len(response.json()["articles"]) == 50
+
+    def test_small_responses_are_not_compressed(self, test_client, mocker):
+        """Test that bodies under the threshold are sent as is."""
+        mocker.patch("main.get_recent_articles", return_value=[])
+
+        response = test_client.get("/articles", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_gzip_body_decodes_to_json(self):
+        """Test that the stored gzip variant decodes to the serialized body."""
+        from src.http_cache import EncodedResponse
+
+        encoded = EncodedResponse({"status": "success", "articles": make_articles(3)})
+
+        assert gzip.decompress(encoded.encoded("gzip")) == encoded.body
+
+
+class TestSearchCache:
+    """Test response caching for /search."""
+
+    def test_repeated_search_is_cached(self, test_client, mocker):
+        """Test that the same query is only searched once per index version."""
+        mock_search = mocker.patch("main.search_articles", return_value=[])
+
+        test_client.get("/search", params={"q": "brad pitt"})
+        test_client.get("/search", params={"q": "brad pitt"})
+        test_client.get("/search", params={"q": "brad pitt", "top_k": 3})
+
+        assert mock_search.call_count == 2
+
+    def test_recency_searches_are_not_cached(self, test_client, mocker):
+        """Test that recency-weighted results are recomputed every time."""
+        mock_search = mocker.patch("main.search_articles", return_value=[])
+
+        test_client.get("/search", params={"q": "brad pitt", "recency": True})
+        response = test_client.get("/search", params={"q": "brad pitt", "recency": True})
+
+        assert mock_search.call_count == 2
+        assert "etag" in response.headers
@@ -0,0 +1,215 @@
+"""Tests for the Linkup search fan-out collector."""
+
+import threading
+import time
+from datetime import UTC, date, datetime
+from unittest.mock import MagicMock
+
+from src.article import Article
+from src.linkup_collector import (
+    LinkupQuery,
+    build_fanout_queries,
+    collect_articles_from_fanout,
+    merge_articles,
+)
+
+
+def make_article(url: str, content: str = "content") -> Article:
+    return Article(
+        title=f"Title {url}",
+        url=url,
+        publication_date=datetime(2024, 6, 1, tzinfo=UTC),
+        source="public.fr",
+        content=content,
+    )
+
+
+def make_query(label: str) -> LinkupQuery:
+    return LinkupQuery(label=label, query=label, include_domains=["public.fr"])
+
+
+def search_response(articles: list[Article]) -> MagicMock:
+    response = MagicMock()
+    response.data.results = articles
+    return response
+
+
+class TestBuildFanoutQueries:
+    """Test the generated narrow queries."""
+
+    def test_queries_per_celebrity_section_and_day(self):
+        """Test that each dimension gets its own query with matching filters."""
+        queries = build_fanout_queries(
+            celebrities=["Brad Pitt"], days=2, max_queries=100, today=date(2024, 6, 10)
+        )
+        labels = [query.label for query in queries]
+
+        assert labels[0] == "celebrity:Brad Pitt"
+        assert "Brad Pitt" in queries[0].query
+        assert "section:public.fr/people" in labels
+        assert labels[-2:] == ["date:2024-06-10", "date:2024-06-09"]
+        assert queries[-1].from_date == queries[-1].to_date == date(2024, 6, 9)
+        section = queries[labels.index("section:vsd.fr/people")]
+        assert section.include_domains == ["vsd.fr"]
+        assert section.from_date == date(2024, 6, 8)
+
+    def test_query_count_is_capped(self):
+        """Test that no more than max_queries searches are generated."""
+        assert len(build_fanout_queries(celebrities=["A B"] * 50, max_queries=5)) == 5
+
+    def test_celebrities_default_to_top_suggest_entities(self, mocker):
+        """Test that the most covered names are searched when none are given."""
+        mocker.patch(
+            "src.linkup_collector.get_suggest_index"
+        ).return_value.top_entities.return_value = ["Léa Seydoux"]
+
+        queries = build_fanout_queries(days=0)
+
+        assert queries[0].label == "celebrity:Léa Seydoux"
+
+
+class TestMergeArticles:
+    """Test deduplication across query results."""
+
+    def test_dedups_by_normalized_url(self):
+        """Test that URL variants of one article are merged, keeping the fuller copy."""
+        articles, new_counts = merge_articles(
+            [
+                [make_article("https://public.fr/a"), make_article("https://public.fr/b")],
+                [
+                    make_article("https://PUBLIC.fr/a/#comments", content="much longer content"),
+                    make_article("https://public.fr/c"),
+                ],
+            ]
+        )
+
+        assert [article.url for article in articles] == [
+            "https://PUBLIC.fr/a/#comments",
+            "https://public.fr/b",
+            "https://public.fr/c",
+        ]
+        assert new_counts == [2, 1]
+
+
+class TestCollectArticlesFromFanout:
+    """Test the concurrent fan-out."""
+
+    def test_merges_results_and_reports_per_query(self, mocker):
+        """Test that results are merged and each query's counts are reported."""
+        responses = {
+            "first": [make_article("https://public.fr/a"), make_article("https://public.fr/b")],
+            "second": [make_article("https://public.fr/b")],
+        }
+        mock_linkup = mocker.patch("src.linkup_collector.get_linkup_client").return_value
+        mock_linkup.search.side_effect = lambda query, **kwargs: search_response(responses[query])
+
+        articles, report = collect_articles_from_fanout([make_query("first"), make_query("second")])
+
+        assert len(articles) == 2
+        assert report["unique_articles"] == 2
+        assert report["total_results"] == 3
+        assert [(q["label"], q["articles"], q["new_articles"]) for q in report["queries"]] == [
+            ("first", 2, 2),
+            ("second", 1, 0),
+        ]
+        assert report["wall_time_ms"] >= 0
+
+    def test_failed_query_does_not_fail_the_fanout(self, mocker):
+        """Test that one failing search is reported and the others are kept."""
+
+        def search(query, **kwargs):
+            if query == "broken":
+                raise RuntimeError("quota")
+            return search_response([make_article("https://public.fr/a")])
+
+        mocker.patch(
+            "src.linkup_collector.get_linkup_client"
+        ).return_value.search.side_effect = search
+
+        articles, report = collect_articles_from_fanout([make_query("broken"), make_query("ok")])
+
+        assert len(articles) == 1
+        assert report["failed_queries"] == 1
+        assert report["queries"][0]["error"] == "quota"
+
+    def test_concurrency_is_capped(self, mocker):
+        """Test that no more than max_concurrency searches run at once."""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def search(query, **kwargs):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return search_response([])
+
+        mocker.patch(
+            "src.linkup_collector.get_linkup_client"
+        ).return_value.search.side_effect = search
+
+        collect_articles_from_fanout([make_query(str(i)) for i in range(8)], max_concurrency=3)
+
+        assert 1 < peak <= 3
+
+
+class TestIngestLinkupFanout:
+    """Test ingestion of the fan-out results."""
+
+    def test_only_new_articles_are_embedded(self, mocker):
+        """Test that articles already in the collection are skipped before embedding."""
+        from src.embed import ingest_linkup_fanout
+
+        fresh, stored = make_article("https://public.fr/new"), make_article("https://public.fr/old")
+        mocker.patch("src.embed.ensure_collection_exists")
+        mocker.patch(
+            "src.embed.collect_articles_from_fanout",
+            return_value=(
+                [fresh, stored],
+                {"queries": [], "unique_articles": 2, "wall_time_ms": 5.0},
+            ),
+        )
+        mocker.patch("src.embed.stored_article_urls", return_value={stored.url})
+        mock_process = mocker.patch("src.embed.process_article", return_value=1)
+
+        stats = ingest_linkup_fanout()
+
+        mock_process.assert_called_once_with(fresh)
+        assert stats["articles_processed"] == 1
+        assert stats["already_stored"] == 1
+        assert stats["search_wall_time_ms"] == 5.0
+
+    def test_urls_are_compared_and_stored_normalized(self, mocker):
+        """Test that a stored article is recognized under another spelling of its URL."""
+        from src.embed import ingest_linkup_fanout
+
+        fresh = make_article("https://Public.fr/new/#comments")
+        stored = make_article("https://public.fr/old/")
+        mocker.patch("src.embed.ensure_collection_exists")
+        mocker.patch(
+            "src.embed.collect_articles_from_fanout",
+            return_value=(
+                [fresh, stored],
+                {"queries": [], "unique_articles": 2, "wall_time_ms": 5.0},
+            ),
+        )
+        mock_stored = mocker.patch(
+            "src.embed.stored_article_urls", return_value={"https://public.fr/old/"}
+        )
+        mock_process = mocker.patch("src.embed.process_article", return_value=1)
+
+        stats = ingest_linkup_fanout()
+
+        assert set(mock_stored.call_args.args[0]) == {
+            "https://Public.fr/new/#comments",
+            "https://public.fr/new",
+            "https://public.fr/old/",
+            "https://public.fr/old",
+        }
+        mock_process.assert_called_once()
+        assert mock_process.call_args.args[0].url == "https://public.fr/new"
+        assert stats["already_stored"] == 1
@@ -0,0 +1,100 @@
+"""Tests for logging configuration."""
+
+import io
+import json
+import logging
+
+import pytest
+import structlog
+
+from src.logger import EventRateLimiter, get_logger, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def json_logs():
+    stream = io.StringIO()
+    shutdown_logging()
+    setup_logging(log_level="DEBUG", log_format="json", stream=stream)
+    yield stream
+    shutdown_logging()
+    setup_logging()
+
+
+def read_lines(stream):
+    # Flushes the writer thread
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestEventRateLimiter:
+    """Test sampling of noisy debug events."""
+
+    def test_debug_events_are_capped_per_second(self):
+        """Test that debug events over the cap are dropped and counted."""
+        now = [0.0]
+        limiter = EventRateLimiter(max_per_second=2, clock=lambda: now[0])
+
+        for _ in range(2):
+            limiter(None, "debug", {"event": "Split article into chunks"})
+        with pytest.raises(structlog.DropEvent):
+            limiter(None, "debug", {"event": "Split article into chunks"})
+
+        now[0] = 1.0
+        event_dict = limiter(None, "debug", {"event": "Split article into chunks"})
+
+        assert event_dict["suppressed"] == 1
+
+    def test_other_levels_and_events_pass(self):
+        """Test that info events and distinct debug events are not sampled."""
+        limiter = EventRateLimiter(max_per_second=1, clock=lambda: 0.0)
+
+        limiter(None, "debug", {"event": "Found items in RSS feed"})
+        limiter(None, "debug", {"event": "Split article into chunks"})
+        for _ in range(5):
+            limiter(None, "info", {"event": "Stored article chunks in Qdrant"})
+
+
+class TestJSONLogging:
+    """Test the production JSON logging mode."""
+
+    def test_events_are_rendered_as_json_lines(self, json_logs):
+        """Test that events, context and exceptions are rendered as JSON."""
+        logger = get_logger("tests.logger")
+        with structlog.contextvars.bound_contextvars(trace_id="abc"):
+            logger.info("Stored article chunks in Qdrant", chunks_stored=3)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.error("Error storing chunks in Qdrant", exc_info=True)
+
+        stored, failed = read_lines(json_logs)
+
+        assert stored["event"] == "Stored article chunks in Qdrant"
+        assert stored["chunks_stored"] == 3
+        assert stored["trace_id"] == "abc"
+        assert stored["level"] == "info"
+        assert stored["logger"] == "tests.logger"
+        assert failed["exception"][0]["exc_type"] == "ValueError"
+        assert "locals" not in failed["exception"][0]["frames"][0]
+
+    def test_stdlib_logs_share_the_writer(self, json_logs):
+        """Test that third-party stdlib logs are rendered as JSON too."""
+        logging.getLogger("httpx").warning("HTTP Request failed")
+
+        (line,) = read_lines(json_logs)
+        assert line["event"] == "HTTP Request failed"
+        assert line["logger"] == "httpx"
+
+    def test_setup_is_idempotent(self, json_logs):
+        """Test that repeated setup with the same settings keeps the writer."""
+        import src.logger
+
+        writer = src.logger._writer
+        setup_logging(log_level="DEBUG", log_format="json", stream=json_logs)
+
+        assert src.logger._writer is writer
+
+    def test_unknown_format(self):
+        """Test that an unknown log format is rejected."""
+        with pytest.raises(ValueError):
+            setup_logging(log_format="xml")
@@ -0,0 +1,26 @@
+"""Tests for the shared OpenAI client provider."""
+
+from src.openai_client import close_openai_client, get_openai_client, set_openai_client
+
+
+class TestOpenAIClientProvider:
+    """Test lazy construction of the shared OpenAI client."""
+
+    def test_client_is_built_once(self):
+        """Test that embeddings and chat share one lazily built client."""
+        close_openai_client()
+
+        client = get_openai_client()
+
+        assert get_openai_client() is client
+        assert client.max_retries == 0
+        close_openai_client()
+
+    def test_set_client_closes_previous(self, mocker):
+        """Test that replacing the client closes the one it replaces."""
+        previous = mocker.MagicMock()
+        set_openai_client(previous)
+
+        set_openai_client(None)
+
+        previous.close.assert_called_once()
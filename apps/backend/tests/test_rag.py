@@ -0,0 +1,76 @@
+"""Tests for retrieval scoring."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from qdrant_client import QdrantClient
+from src.qdrant_client import set_qdrant_client
+from src.rag import search_similar_chunks, search_similar_chunks_batch
+
+COLLECTION = "test_recency"
+
+
+@pytest.fixture
+def dated_collection():
+    """In-memory collection with an old close match, a recent weaker one and an undated one."""
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=VectorParams(size=2, distance=Distance.COSINE),
+    )
+    now = datetime.now(UTC)
+    client.upsert(
+        collection_name=COLLECTION,
+        points=[
+            PointStruct(
+                id=1,
+                vector=[1.0, 0.0],
+                payload={
+                    "article_url": "old",
+                    "publication_date": (now - timedelta(days=30)).isoformat(),
+                },
+            ),
+            PointStruct(
+                id=2,
+                vector=[0.9, 0.3],
+                payload={
+                    "article_url": "recent",
+                    "publication_date": (now - timedelta(hours=2)).isoformat(),
+                },
+            ),
+            PointStruct(id=3, vector=[0.95, 0.1], payload={"article_url": "undated"}),
+        ],
+    )
+    set_qdrant_client(client)
+    yield
+    set_qdrant_client(None)
+
+
+class TestRecencyScoring:
+    """Test time-decayed scoring inside the vector query."""
+
+    def test_without_recency_ranks_by_similarity(self, dated_collection):
+        """Test that the plain query keeps cosine order."""
+        chunks = search_similar_chunks([1.0, 0.0], limit=3, collection_name=COLLECTION)
+
+        assert [chunk["article_url"] for chunk in chunks] == ["old", "undated", "recent"]
+
+    def test_recency_favors_recent_articles(self, dated_collection):
+        """Test that old and undated articles lose weight with a short half-life."""
+        chunks = search_similar_chunks(
+            [1.0, 0.0], limit=3, collection_name=COLLECTION, half_life_hours=24
+        )
+
+        assert [chunk["article_url"] for chunk in chunks][0] == "recent"
+        # Only the decaying half of the score is lost, whatever the age
+        assert chunks[-1]["score"] == pytest.approx(0.5, abs=0.01)
+
+    def test_batch_search_applies_recency(self, dated_collection):
+        """Test that batched queries use the same scoring."""
+        results = search_similar_chunks_batch(
+            [[1.0, 0.0]], limit=1, collection_name=COLLECTION, half_life_hours=24
+        )
+
+        assert [chunk["article_url"] for chunk in results[0]] == ["recent"]
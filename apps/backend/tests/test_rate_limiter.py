@@ -0,0 +1,135 @@
+"""Tests for the OpenAI rate limit controller."""
+
+import httpx
+import openai
+import pytest
+
+from src.rate_limiter import RateLimitController, parse_retry_after
+
+
+def rate_limit_error(headers=None, code=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    body = {"code": code} if code else None
+    return openai.RateLimitError("Rate limit reached", response=response, body=body)
+
+
+def make_controller(**kwargs):
+    return RateLimitController(
+        name="test",
+        requests_per_minute=kwargs.pop("requests_per_minute", 1000),
+        tokens_per_minute=kwargs.pop("tokens_per_minute", 1_000_000),
+        max_concurrency=kwargs.pop("max_concurrency", 4),
+        **kwargs,
+    )
+
+
+class TestParseRetryAfter:
+    """Test extracting retry hints from OpenAI response headers."""
+
+    def test_retry_after_ms(self):
+        """Test the millisecond retry-after header."""
+        assert parse_retry_after(httpx.Headers({"retry-after-ms": "250"})) == 0.25
+
+    def test_retry_after_seconds(self):
+        """Test the standard retry-after header."""
+        assert parse_retry_after(httpx.Headers({"retry-after": "2"})) == 2.0
+
+    def test_ratelimit_reset_durations(self):
+        """Test OpenAI's x-ratelimit-reset-* durations, taking the longest."""
+        headers = httpx.Headers(
+            {"x-ratelimit-reset-requests": "120ms", "x-ratelimit-reset-tokens": "1m6s"}
+        )
+        assert parse_retry_after(headers) == pytest.approx(66.0)
+
+    def test_no_hint(self):
+        """Test that missing headers yield no hint."""
+        assert parse_retry_after(httpx.Headers({})) is None
+
+
+class TestRateLimitController:
+    """Test AIMD concurrency and retry behaviour."""
+
+    def test_additive_increase_up_to_max(self):
+        """Test that concurrency grows by one per window of successes."""
+        controller = make_controller(max_concurrency=3)
+
+        for _ in range(20):
+            controller.call(lambda: "ok")
+
+        assert controller.concurrency_limit == 3
+
+    def test_retries_on_rate_limit_and_halves_concurrency(self, mocker):
+        """Test that a 429 is retried after the hinted delay and concurrency is halved."""
+        controller = make_controller(max_concurrency=8)
+        controller.concurrency_limit = 8
+        on_rate_limited = mocker.spy(controller, "on_rate_limited")
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise rate_limit_error({"retry-after-ms": "10"})
+            return "ok"
+
+        assert controller.call(flaky) == "ok"
+        assert len(calls) == 2
+        assert controller.rate_limited_count == 1
+        assert controller.concurrency_limit == 4
+        assert on_rate_limited.call_args.args[0] == pytest.approx(0.01)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that the error surfaces once retries are exhausted."""
+        controller = make_controller(max_retries=1)
+
+        def always_limited():
+            raise rate_limit_error({"retry-after-ms": "1"})
+
+        with pytest.raises(openai.RateLimitError):
+            controller.call(always_limited)
+        assert controller.in_flight == 0
+
+    def test_insufficient_quota_is_not_retried(self):
+        """Test that an exhausted billing quota fails immediately."""
+        controller = make_controller()
+        calls = []
+
+        def no_quota():
+            calls.append(1)
+            raise rate_limit_error(code="insufficient_quota")
+
+        with pytest.raises(openai.RateLimitError):
+            controller.call(no_quota)
+        assert len(calls) == 1
+
+    def test_other_errors_propagate(self):
+        """Test that non-retryable errors are raised and the slot is released."""
+        controller = make_controller()
+
+        with pytest.raises(ValueError):
+            controller.call(lambda: (_ for _ in ()).throw(ValueError("bad input")))
+        assert controller.in_flight == 0
+
+    def test_window_blocks_over_quota(self):
+        """Test that requests wait once the per-minute budget is spent."""
+        now = [0.0]
+        controller = make_controller(requests_per_minute=2, clock=lambda: now[0])
+        controller.concurrency_limit = 4
+
+        controller.acquire(1)
+        controller.acquire(1)
+
+        assert controller._wait_time(1, now[0]) == pytest.approx(60.0)
+        now[0] = 61.0
+        controller._evict(now[0])
+        assert controller._wait_time(1, now[0]) == 0.0
+
+    def test_token_budget(self):
+        """Test that the TPM budget is enforced alongside RPM."""
+        controller = make_controller(tokens_per_minute=100, clock=lambda: 0.0)
+        controller.concurrency_limit = 4
+
+        controller.acquire(80)
+
+        assert controller._wait_time(10, 0.0) == 0.0
+        assert controller._wait_time(30, 0.0) == pytest.approx(60.0)
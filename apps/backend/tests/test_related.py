@@ -0,0 +1,159 @@
+"""Tests for related articles."""
+
+import numpy as np
+import pytest
+
+from qdrant_client import QdrantClient
+from src.article import Article
+from src.embed import build_points
+from src.index_cache import VersionedCache, index_version
+from src.qdrant_client import (
+    COLLECTION_NAME,
+    EMBEDDING_DIM,
+    ensure_collection_exists,
+    get_qdrant_client,
+    set_qdrant_client,
+)
+from src.related import ArticleNotFoundError, find_related_articles, related_cache
+
+
+def vector(*weights: float) -> list[float]:
+    values = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    values[: len(weights)] = weights
+    return values.tolist()
+
+
+def store_article(url: str, vectors: list[list[float]]) -> None:
+    article = Article(
+        title=url,
+        url=f"https://example.com/{url}",
+        publication_date=None,
+        source="example.com",
+        content=url,
+    )
+    chunks = [{"id": f"chunk_{idx}", "text": f"{url} {idx}"} for idx in range(len(vectors))]
+    get_qdrant_client().upsert(
+        collection_name=COLLECTION_NAME, points=build_points(article, chunks, vectors)
+    )
+
+
+@pytest.fixture
+def related_index():
+    """In-memory index with a source article, two close articles and a distant one."""
+    set_qdrant_client(QdrantClient(":memory:"))
+    ensure_collection_exists()
+    related_cache.clear()
+    store_article("source", [vector(1, 0, 0), vector(1, 0.2, 0)])
+    store_article("close", [vector(1, 0.3, 0), vector(0, 0, 1)])
+    store_article("closer", [vector(1, 0.1, 0)])
+    store_article("far", [vector(0, 1, 0)])
+    yield
+    set_qdrant_client(None)
+
+
+class TestFindRelatedArticles:
+    """Test the recommend query over stored chunk vectors."""
+
+    def test_groups_by_article_and_excludes_source(self, related_index):
+        """Test that each related article appears once, best first, without the source."""
+        articles = find_related_articles(url="https://example.com/source", limit=5)
+
+        urls = [article["url"] for article in articles]
+        assert urls == [
+            "https://example.com/closer",
+            "https://example.com/close",
+            "https://example.com/far",
+        ]
+
+    def test_lookup_by_point_id(self, related_index):
+        """Test that any chunk id of the article identifies it."""
+        point_id = get_qdrant_client().scroll(
+            collection_name=COLLECTION_NAME, limit=1, with_payload=True
+        )[0][0]
+        articles = find_related_articles(point_id=str(point_id.id), limit=1)
+
+        assert articles[0]["url"] != point_id.payload["article_url"]
+
+    def test_unknown_article(self, related_index):
+        """Test that an article with no stored chunks is reported as not found."""
+        with pytest.raises(ArticleNotFoundError):
+            find_related_articles(url="https://example.com/missing")
+
+    def test_results_are_cached_until_the_index_changes(self, related_index, mocker):
+        """Test that ingestion invalidates cached results."""
+        first = find_related_articles(url="https://example.com/source")
+        spy = mocker.spy(get_qdrant_client(), "query_points_groups")
+
+        assert find_related_articles(url="https://example.com/source") == first
+        spy.assert_not_called()
+
+        index_version.bump()
+        find_related_articles(url="https://example.com/source")
+        spy.assert_called_once()
+
+
+class TestVersionedCache:
+    """Test the index-versioned LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the cache keeps at most maxsize entries."""
+        cache = VersionedCache(maxsize=2)
+        version = cache.version.value
+        cache.set("a", 1, version)
+        cache.set("b", 2, version)
+        cache.get("a")
+        cache.set("c", 3, version)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_stale_version_is_a_miss(self):
+        """Test that a value computed before an index change is not served."""
+        cache = VersionedCache(maxsize=2)
+        version = cache.version.value
+        index_version.bump()
+        cache.set("a", 1, version)
+
+        assert cache.get("a") is None
+
+
+class TestRelatedArticlesEndpoint:
+    """Test the /articles/related endpoint."""
+
+    def test_related_success(self, test_client, mocker):
+        """Test that related articles are returned for a URL."""
+        articles = [{"url": "https://example.com/other", "score": 0.8}]
+        mock_find = mocker.patch("main.find_related_articles", return_value=articles)
+
+        response = test_client.get(
+            "/articles/related", params={"url": "https://example.com/a", "limit": 3}
+        )
+
+        assert response.json() == {"status": "success", "articles": articles}
+        mock_find.assert_called_once_with(url="https://example.com/a", point_id=None, limit=3)
+
+    def test_related_requires_url_or_id(self, test_client):
+        """Test that a request without url or id is rejected."""
+        data = test_client.get("/articles/related").json()
+
+        assert data["status"] == "error"
+        assert data["articles"] == []
+
+    def test_related_not_found(self, test_client, mocker):
+        """Test that an unknown article is reported."""
+        mocker.patch(
+            "main.find_related_articles", side_effect=ArticleNotFoundError("Article x not found")
+        )
+
+        data = test_client.get("/articles/related", params={"id": "x"}).json()
+
+        assert data == {"status": "error", "message": "Article x not found", "articles": []}
+
+    def test_related_runs_off_the_event_loop(self, test_client, mocker, on_event_loop):
+        """Test that the blocking Qdrant lookups run on a worker thread."""
+        mocker.patch("main.find_related_articles", side_effect=on_event_loop)
+
+        data = test_client.get("/articles/related", params={"id": "x"}).json()
+
+        assert data == {"status": "success", "articles": [False]}
@@ -0,0 +1,105 @@
+"""Tests for the cross-encoder rerank stage."""
+
+import threading
+
+import pytest
+
+from src.reranker import rerank_chunks
+
+
+class FakeCrossEncoder:
+    """Scores documents by the number of query words they contain."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.batches: list[int] = []
+
+    def rerank(self, query, documents, batch_size=8):
+        self.batches.append(len(documents))
+        if self.delay:
+            threading.Event().wait(self.delay)
+        if self.error:
+            raise self.error
+        words = set(query.lower().split())
+        return [float(len(words & set(document.lower().split()))) for document in documents]
+
+
+def make_chunks(texts: list[str]) -> list[dict]:
+    return [
+        {"text": text, "article_url": f"https://example.com/{idx}"}
+        for idx, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def use_cross_encoder(mocker):
+    def install(model):
+        mocker.patch("src.reranker.get_cross_encoder", return_value=model)
+        return model
+
+    return install
+
+
+class TestRerankChunks:
+    """Test reranking and its fallbacks."""
+
+    def test_reorders_top_candidates(self, use_cross_encoder, mocker):
+        """Test that candidates are sorted by cross-encoder score in batches."""
+        model = use_cross_encoder(FakeCrossEncoder())
+        mocker.patch("src.reranker.RERANK_BATCH_SIZE", 2)
+        chunks = make_chunks(["nothing", "a wedding", "royal wedding news", "tail"])
+
+        reranked, applied = rerank_chunks("royal wedding", chunks, top_n=3)
+
+        assert applied
+        assert [chunk["text"] for chunk in reranked] == [
+            "royal wedding news",
+            "a wedding",
+            "nothing",
+            "tail",
+        ]
+        assert reranked[0]["rerank_score"] == 2.0
+        assert "rerank_score" not in reranked[3]
+        assert sorted(model.batches) == [1, 2]
+
+    def test_timeout_falls_back_to_vector_order(self, use_cross_encoder):
+        """Test that the original order is kept when the budget runs out."""
+        use_cross_encoder(FakeCrossEncoder(delay=0.2))
+        chunks = make_chunks(["nothing", "royal wedding"])
+
+        reranked, applied = rerank_chunks("royal wedding", chunks, timeout_ms=10)
+
+        assert not applied
+        assert reranked is chunks
+
+    def test_error_falls_back_to_vector_order(self, use_cross_encoder):
+        """Test that a failing model does not fail the request."""
+        use_cross_encoder(FakeCrossEncoder(error=RuntimeError("model error")))
+        chunks = make_chunks(["nothing", "royal wedding"])
+
+        assert rerank_chunks("royal wedding", chunks) == (chunks, False)
+
+    def test_missing_model_keeps_order(self, use_cross_encoder):
+        """Test that results pass through when no cross-encoder is available."""
+        use_cross_encoder(None)
+        chunks = make_chunks(["nothing", "royal wedding"])
+
+        assert rerank_chunks("royal wedding", chunks) == (chunks, False)
+
+    def test_search_articles_reranks_when_enabled(self, use_cross_encoder, mocker, monkeypatch):
+        """Test that /search over-fetches and returns the reranked top_k."""
+        from src.rag import search_articles
+
+        monkeypatch.setenv("RERANK_ENABLED", "true")
+        use_cross_encoder(FakeCrossEncoder())
+        mocker.patch("src.rag.embed_text", return_value=[0.1] * 1536)
+        mock_search = mocker.patch(
+            "src.rag.search_similar_chunks",
+            return_value=make_chunks(["nothing", "a wedding", "royal wedding"]),
+        )
+
+        results = search_articles("royal wedding", top_k=2)
+
+        assert [chunk["text"] for chunk in results] == ["royal wedding", "a wedding"]
+        mock_search.assert_called_once_with([0.1] * 1536, limit=20, half_life_hours=None)
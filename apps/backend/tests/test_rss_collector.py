@@ -1,39 +1,34 @@
 """Tests for RSS collector functionality."""
 
+import httpx
+
+from src.feed_cache import FeedCache, FeedCacheEntry
 from src.rss_collector import (
-    HTMLTextExtractor,
     collect_articles_from_feeds,
+    collect_feed,
     parse_rss_feed,
     strip_html_tags,
+    update_feed_cache,
 )
 
+FEED_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+    <channel>
+        <lastBuildDate>{build_date}</lastBuildDate>
+        {items}
+    </channel>
+</rss>"""
 
-class TestHTMLTextExtractor:
-    """Test the HTML text extraction functionality."""
-
-    def test_extract_simple_text(self):
-        """Test extracting text from simple HTML."""
-        extractor = HTMLTextExtractor()
-        extractor.feed("<p>Hello World</p>")
-        assert extractor.get_text() == "Hello World"
-
-    def test_extract_nested_html(self):
-        """Test extracting text from nested HTML."""
-        extractor = HTMLTextExtractor()
-        extractor.feed("<div><p>Hello</p><p>World</p></div>")
-        assert extractor.get_text() == "Hello World"
+FEED_ITEM_XML = """<item>
+    <title>Article {guid}</title>
+    <link>https://example.com/{guid}</link>
+    <guid isPermaLink="false">https://example.com/?p={guid}</guid>
+</item>"""
 
-    def test_extract_with_attributes(self):
-        """Test extracting text ignoring HTML attributes."""
-        extractor = HTMLTextExtractor()
-        extractor.feed('<p class="test" id="para">Content</p>')
-        assert extractor.get_text() == "Content"
 
-    def test_empty_html(self):
-        """Test extracting from empty HTML."""
-        extractor = HTMLTextExtractor()
-        extractor.feed("")
-        assert extractor.get_text() == ""
+def build_feed(guids, build_date="Mon, 01 Jan 2024 12:00:00 +0000"):
+    items = "".join(FEED_ITEM_XML.format(guid=guid) for guid in guids)
+    return FEED_XML.format(build_date=build_date, items=items)
 
 
 class TestStripHTMLTags:
@@ -72,13 +67,13 @@ class TestParseRSSFeed:
 
     def test_parse_valid_rss_feed(self, mocker, sample_rss_xml):
         """Test parsing a valid RSS feed."""
-        # Mock the LinkupClient
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
+        # Mock the shared LinkupClient
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
         mock_response = mocker.MagicMock()
         mock_response.raw_html = sample_rss_xml
         mock_linkup.fetch.return_value = mock_response
 
-        articles = parse_rss_feed("https://example.com/feed", "example.com")
+        articles = parse_rss_feed("https://example.com/feed", "example.com", fetcher="linkup")
 
         assert len(articles) > 0
         article = articles[0]
@@ -90,22 +85,22 @@ class TestParseRSSFeed:
 
     def test_parse_empty_feed(self, mocker):
         """Test parsing an empty RSS feed."""
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
         mock_response = mocker.MagicMock()
         mock_response.raw_html = ""
         mock_linkup.fetch.return_value = mock_response
 
-        articles = parse_rss_feed("https://example.com/feed", "example.com")
+        articles = parse_rss_feed("https://example.com/feed", "example.com", fetcher="linkup")
         assert len(articles) == 0
 
     def test_parse_invalid_xml(self, mocker):
         """Test parsing invalid XML."""
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
         mock_response = mocker.MagicMock()
         mock_response.raw_html = "This is not valid XML"
         mock_linkup.fetch.return_value = mock_response
 
-        articles = parse_rss_feed("https://example.com/feed", "example.com")
+        articles = parse_rss_feed("https://example.com/feed", "example.com", fetcher="linkup")
         assert len(articles) == 0
 
     def test_parse_feed_with_missing_fields(self, mocker):
@@ -120,12 +115,12 @@ class TestParseRSSFeed:
     </channel>
 </rss>"""
 
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
         mock_response = mocker.MagicMock()
         mock_response.raw_html = rss_xml
         mock_linkup.fetch.return_value = mock_response
 
-        articles = parse_rss_feed("https://example.com/feed", "example.com")
+        articles = parse_rss_feed("https://example.com/feed", "example.com", fetcher="linkup")
 
         assert len(articles) == 1
         article = articles[0]
@@ -147,12 +142,12 @@ class TestParseRSSFeed:
     </channel>
 </rss>"""
 
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
         mock_response = mocker.MagicMock()
         mock_response.raw_html = rss_xml
         mock_linkup.fetch.return_value = mock_response
 
-        articles = parse_rss_feed("https://example.com/feed", "example.com")
+        articles = parse_rss_feed("https://example.com/feed", "example.com", fetcher="linkup")
 
         assert len(articles) == 1
         assert articles[0].publication_date is None
@@ -161,12 +156,9 @@ class TestParseRSSFeed:
 class TestCollectArticlesFromFeeds:
     """Test the collect_articles_from_feeds function."""
 
-    def test_collect_articles_success(self, mocker, sample_rss_xml):
+    def test_collect_articles_success(self, feed_http_stub, sample_rss_xml):
         """Test successful article collection from feeds."""
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
-        mock_response = mocker.MagicMock()
-        mock_response.raw_html = sample_rss_xml
-        mock_linkup.fetch.return_value = mock_response
+        feed_http_stub.default = httpx.Response(200, text=sample_rss_xml)
 
         articles = collect_articles_from_feeds()
 
@@ -175,14 +167,13 @@ class TestCollectArticlesFromFeeds:
         # We have 2 sources with 5 feeds each = 10 feeds total
         # Each feed returns 1 article from our mock
         assert len(articles) == 10
+        assert len(feed_http_stub.requests) == 10
 
-    def test_collect_articles_handles_errors(self, mocker):
+    def test_collect_articles_handles_errors(self, mocker, feed_http_stub):
         """Test that collection continues even if some feeds fail."""
-        mock_linkup = mocker.patch("src.rss_collector.linkup_client")
-
-        # First call succeeds, second fails, third succeeds
-        mock_response_success = mocker.MagicMock()
-        mock_response_success.raw_html = """<?xml version="1.0"?>
+        feed_http_stub.default = httpx.Response(
+            200,
+            text="""<?xml version="1.0"?>
 <rss version="2.0">
     <channel>
         <item>
@@ -190,14 +181,158 @@ class TestCollectArticlesFromFeeds:
             <link>https://example.com/test</link>
         </item>
     </channel>
-</rss>"""
-
-        mock_linkup.fetch.side_effect = [
-            mock_response_success,
-            Exception("Network error"),
-            mock_response_success,
-        ]
+</rss>""",
+        )
+        feed_http_stub.responses["https://www.public.fr/people/feed"] = httpx.Response(500)
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
+        mock_linkup.fetch.side_effect = Exception("Network error")
 
         # Should not raise exception, just log and continue
         articles = collect_articles_from_feeds()
         assert isinstance(articles, list)
+        assert len(articles) == 9
+
+
+class TestFetchFeed:
+    """Test the direct HTTP fetch backend and its Linkup fallback."""
+
+    def test_http_fetch_does_not_call_linkup(self, mocker, feed_http_stub, sample_rss_xml):
+        """Test that public XML feeds are fetched directly."""
+        feed_http_stub.default = httpx.Response(200, text=sample_rss_xml)
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
+
+        articles = parse_rss_feed("https://example.com/feed", "example.com")
+
+        assert len(articles) == 1
+        mock_linkup.fetch.assert_not_called()
+
+    def test_http_error_falls_back_to_linkup(self, mocker, feed_http_stub, sample_rss_xml):
+        """Test that Linkup is used when the direct fetch is refused."""
+        feed_http_stub.default = httpx.Response(403)
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
+        mock_response = mocker.MagicMock()
+        mock_response.raw_html = sample_rss_xml
+        mock_linkup.fetch.return_value = mock_response
+
+        articles = parse_rss_feed("https://example.com/feed", "example.com")
+
+        assert len(articles) == 1
+        mock_linkup.fetch.assert_called_once()
+
+    def test_conditional_request_headers(self, feed_http_stub):
+        """Test that cached validators are sent and a 304 marks the feed unchanged."""
+        feed_http_stub.default = httpx.Response(304, headers={"ETag": '"v1"'})
+        cache_entry = FeedCacheEntry(etag='"v1"', last_modified="Mon, 01 Jan 2024 12:00:00 GMT")
+
+        result = collect_feed("https://example.com/feed", "example.com", cache_entry)
+
+        request = feed_http_stub.requests[0]
+        assert request.headers["If-None-Match"] == '"v1"'
+        assert request.headers["If-Modified-Since"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+        assert result.unchanged
+        assert result.articles == []
+
+    def test_response_validators_are_cached(self, feed_http_stub, tmp_path):
+        """Test that ETag and Last-Modified are stored after a full fetch."""
+        feed_http_stub.default = httpx.Response(
+            200,
+            text=build_feed(["1"]),
+            headers={"ETag": '"v2"', "Last-Modified": "Tue, 02 Jan 2024 12:00:00 GMT"},
+        )
+        feed_cache = FeedCache(tmp_path / "cache.json")
+
+        result = collect_feed("https://example.com/feed", "example.com")
+        update_feed_cache(feed_cache, result)
+
+        entry = feed_cache.get("https://example.com/feed")
+        assert entry.etag == '"v2"'
+        assert entry.last_modified == "Tue, 02 Jan 2024 12:00:00 GMT"
+
+    def test_linkup_fetcher_skips_http(self, mocker, feed_http_stub, sample_rss_xml):
+        """Test that feeds configured for Linkup never hit the HTTP client."""
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
+        mock_response = mocker.MagicMock()
+        mock_response.raw_html = sample_rss_xml
+        mock_linkup.fetch.return_value = mock_response
+
+        articles = parse_rss_feed("https://example.com/feed", "example.com", fetcher="linkup")
+
+        assert len(articles) == 1
+        assert feed_http_stub.requests == []
+
+
+class TestCollectFeed:
+    """Test incremental feed collection against the feed cache."""
+
+    def mock_feed(self, feed_http_stub, xml):
+        feed_http_stub.default = httpx.Response(200, text=xml)
+
+    def test_first_fetch_returns_all_items(self, feed_http_stub):
+        """Test that a feed without cache entry returns every item as new."""
+        self.mock_feed(feed_http_stub, build_feed(["1", "2"]))
+        result = collect_feed("https://example.com/feed", "example.com")
+
+        assert result.new_items == 2
+        assert result.total_items == 2
+        assert not result.unchanged
+        assert result.items[0].guid == "https://example.com/?p=1"
+
+    def test_unchanged_build_date_skips_feed(self, feed_http_stub):
+        """Test that an identical lastBuildDate short-circuits item processing."""
+        self.mock_feed(feed_http_stub, build_feed(["1", "2"]))
+        cache_entry = FeedCacheEntry(last_build_date="Mon, 01 Jan 2024 12:00:00 +0000")
+
+        result = collect_feed("https://example.com/feed", "example.com", cache_entry)
+
+        assert result.unchanged
+        assert result.new_items == 0
+
+    def test_only_new_guids_are_returned(self, feed_http_stub):
+        """Test that already processed GUIDs are filtered out."""
+        self.mock_feed(feed_http_stub, build_feed(["1", "2", "3"], build_date="Tue, 02 Jan 2024"))
+        cache_entry = FeedCacheEntry(
+            last_build_date="Mon, 01 Jan 2024",
+            item_guids=["https://example.com/?p=1", "https://example.com/?p=2"],
+        )
+
+        result = collect_feed("https://example.com/feed", "example.com", cache_entry)
+
+        assert not result.unchanged
+        assert [article.url for article in result.articles] == ["https://example.com/3"]
+
+    def test_fetch_error_marks_feed_failed(self, mocker):
+        """Test that fetch errors are reported on the result."""
+        mock_linkup = mocker.patch("src.rss_collector.get_linkup_client").return_value
+        mock_linkup.fetch.side_effect = Exception("Network error")
+
+        result = collect_feed("https://example.com/feed", "example.com", fetcher="linkup")
+
+        assert result.failed
+        assert result.articles == []
+
+    def test_update_feed_cache_records_processed_items(self, feed_http_stub, tmp_path):
+        """Test that processed GUIDs and lastBuildDate are recorded."""
+        self.mock_feed(feed_http_stub, build_feed(["1", "2"]))
+        feed_cache = FeedCache(tmp_path / "cache.json")
+
+        result = collect_feed("https://example.com/feed", "example.com")
+        update_feed_cache(feed_cache, result)
+
+        entry = feed_cache.get("https://example.com/feed")
+        assert entry.last_build_date == "Mon, 01 Jan 2024 12:00:00 +0000"
+        assert len(entry.item_guids) == 2
+
+    def test_update_feed_cache_keeps_failed_items_pending(self, feed_http_stub, tmp_path):
+        """Test that failed articles are retried on the next run."""
+        self.mock_feed(feed_http_stub, build_feed(["1", "2"]))
+        feed_cache = FeedCache(tmp_path / "cache.json")
+
+        result = collect_feed("https://example.com/feed", "example.com")
+        update_feed_cache(feed_cache, result, failed_urls={"https://example.com/2"})
+
+        entry = feed_cache.get("https://example.com/feed")
+        assert entry.last_build_date is None
+        assert entry.item_guids == ["https://example.com/?p=1"]
+
+        retry = collect_feed("https://example.com/feed", "example.com", entry)
+        assert [article.url for article in retry.articles] == ["https://example.com/2"]
@@ -0,0 +1,198 @@
+"""Tests for the checkpointed ingestion run journal."""
+
+import httpx
+import pytest
+
+from src.embed import IngestionProgress, process_all_articles
+from src.rss_collector import FeedResult, feed_sources
+from src.run_journal import RunJournal
+
+FEED_URLS = [url for config in feed_sources.values() for url in config["sources"]]
+
+
+def feed_xml(feed_index):
+    return f"""<?xml version="1.0"?>
+<rss version="2.0">
+    <channel>
+        <item>
+            <title>Article {feed_index}</title>
+            <link>https://example.com/{feed_index}</link>
+            <description>Description {feed_index}</description>
+        </item>
+    </channel>
+</rss>"""
+
+
+class Interrupted(BaseException):
+    """Simulates the process being killed mid-run."""
+
+
+@pytest.fixture
+def feed_server(feed_http_stub):
+    for index, feed_url in enumerate(FEED_URLS):
+        feed_http_stub.responses[feed_url] = httpx.Response(200, text=feed_xml(index))
+    return feed_http_stub
+
+
+class TestRunJournal:
+    """Test recording and replaying the run journal."""
+
+    def test_fresh_journal_starts_new_run(self, tmp_path):
+        """Test that a missing journal starts a new run."""
+        journal = RunJournal.load(tmp_path / "journal.jsonl")
+        journal.start()
+
+        assert not journal.resumed
+        assert journal.run_id is not None
+
+    def test_completed_run_is_not_resumed(self, tmp_path):
+        """Test that a completed run leaves nothing to resume."""
+        journal = RunJournal.load(tmp_path / "journal.jsonl")
+        journal.start()
+        journal.article_stored("https://example.com/1", 2)
+        journal.complete()
+
+        reloaded = RunJournal.load(tmp_path / "journal.jsonl")
+        reloaded.start()
+
+        assert not reloaded.resumed
+        assert reloaded.stored == {}
+
+    def test_interrupted_run_is_replayed(self, tmp_path):
+        """Test that fetched feeds and stored articles survive an interruption."""
+        journal = RunJournal.load(tmp_path / "journal.jsonl")
+        journal.start()
+        journal.record_feed(FeedResult(feed_url="https://example.com/feed", source="example.com"))
+        journal.article_started("https://example.com/1")
+        journal.article_stored("https://example.com/1", 3)
+        journal.article_started("https://example.com/2")
+
+        reloaded = RunJournal.load(tmp_path / "journal.jsonl")
+        reloaded.start()
+
+        assert reloaded.resumed
+        assert reloaded.run_id == journal.run_id
+        assert reloaded.stored == {"https://example.com/1": 3}
+        assert "https://example.com/feed" in reloaded.feeds
+        assert reloaded.summary()["articles_redone"] == 1
+
+    def test_truncated_last_line_is_ignored(self, tmp_path):
+        """Test that a half-written entry does not prevent resuming."""
+        path = tmp_path / "journal.jsonl"
+        journal = RunJournal.load(path)
+        journal.start()
+        journal.article_stored("https://example.com/1", 1)
+        with path.open("a") as journal_file:
+            journal_file.write('{"event": "article_sto')
+
+        reloaded = RunJournal.load(path)
+
+        assert reloaded.stored == {"https://example.com/1": 1}
+
+
+class TestResumableIngestion:
+    """Test that process_all_articles resumes from the last checkpoint."""
+
+    def test_resume_after_interruption(self, mocker, feed_server):
+        """Test that a killed run is resumed without re-embedding stored articles."""
+        mocker.patch("src.embed.ensure_collection_exists")
+        processed = []
+
+        def crash_on_fourth(article):
+            if len(processed) == 3:
+                raise Interrupted()
+            processed.append(article.url)
+            return 1
+
+        mocker.patch("src.embed.process_article", side_effect=crash_on_fourth)
+        with pytest.raises(Interrupted):
+            process_all_articles()
+
+        requests_before_resume = len(feed_server.requests)
+        resumed = []
+        mocker.patch(
+            "src.embed.process_article",
+            side_effect=lambda article: resumed.append(article.url) or 1,
+        )
+        progress = IngestionProgress()
+        articles = process_all_articles(progress)
+
+        assert len(articles) == len(FEED_URLS)
+        assert len(feed_server.requests) == requests_before_resume
+        assert not set(processed) & set(resumed)
+        assert len(resumed) == len(FEED_URLS) - len(processed)
+        assert progress.articles_resumed == len(processed)
+        assert progress.articles_redone >= 1
+
+    def test_resumed_articles_are_restored_to_indexes(self, mocker, feed_server):
+        """Test that articles stored before a crash are counted once the run completes."""
+        from src.facets import get_facet_index, set_facet_index
+        from src.suggest import get_suggest_index, set_suggest_index
+        from src.trending import get_story_clusters, set_story_clusters
+
+        mocker.patch("src.embed.ensure_collection_exists")
+        # Chunk vectors stored in the collection for every article of the run
+        mocker.patch("src.embed.get_qdrant_client").return_value.scroll.return_value = (
+            [
+                mocker.MagicMock(payload={"article_url": f"https://example.com/{i}"}, vector=[1.0])
+                for i in range(len(FEED_URLS))
+            ],
+            None,
+        )
+        processed = []
+
+        def index_article(article):
+            get_facet_index().add_article(article)
+            get_suggest_index().add_article(article)
+            get_story_clusters().add_article(article, [[1.0]])
+            return 1
+
+        def crash_on_fourth(article):
+            if len(processed) == 3:
+                raise Interrupted()
+            processed.append(article.url)
+            return index_article(article)
+
+        mocker.patch("src.embed.process_article", side_effect=crash_on_fourth)
+        with pytest.raises(Interrupted):
+            process_all_articles()
+
+        # A new process starts from the indexes saved by the last completed run
+        set_facet_index(None)
+        set_suggest_index(None)
+        set_story_clusters(None)
+        mocker.patch("src.embed.process_article", side_effect=index_article)
+        process_all_articles()
+        set_facet_index(None)
+        set_suggest_index(None)
+        set_story_clusters(None)
+
+        assert get_facet_index().facets()["total_articles"] == len(FEED_URLS)
+        assert len(get_suggest_index().articles) == len(FEED_URLS)
+        assert get_story_clusters().article_count == len(FEED_URLS)
+
+    def test_next_run_after_completion_starts_fresh(self, mocker, feed_server):
+        """Test that a completed run does not leak into the next one."""
+        mocker.patch("src.embed.ensure_collection_exists")
+        mocker.patch("src.embed.process_article", return_value=1)
+
+        process_all_articles()
+        progress = IngestionProgress()
+        articles = process_all_articles(progress)
+
+        # The feed cache already holds every item, so nothing is new
+        assert articles == []
+        assert progress.articles_resumed == 0
+        assert len(feed_server.requests) == 2 * len(FEED_URLS)
+
+    def test_articles_without_text_are_skipped_not_failed(self, mocker, feed_server):
+        """Test that an article with nothing to embed is marked seen and not retried."""
+        mocker.patch("src.embed.ensure_collection_exists")
+        mocker.patch("src.embed.process_article", return_value=0)
+
+        progress = IngestionProgress()
+        process_all_articles(progress)
+
+        assert progress.articles_skipped == len(FEED_URLS)
+        assert progress.articles_failed == 0
+        assert process_all_articles() == []
@@ -0,0 +1,140 @@
+"""Tests for the adaptive feed polling scheduler."""
+
+import asyncio
+import random
+
+import pytest
+
+from src.rss_collector import feed_sources
+from src.scheduler import QUIET_BACKOFF, FeedSchedule, FeedScheduler
+
+
+def make_scheduler(poll_fn=None, **kwargs):
+    schedule = FeedSchedule(feed_url="https://example.com/feed", source="example.com", interval=600)
+    scheduler = FeedScheduler(
+        [schedule],
+        poll_fn=poll_fn or (lambda *args: {"new_items": 0, "feeds_failed": 0}),
+        min_interval=kwargs.pop("min_interval", 60),
+        max_interval=kwargs.pop("max_interval", 3600),
+        jitter_ratio=kwargs.pop("jitter_ratio", 0.0),
+        rng=random.Random(0),
+        **kwargs,
+    )
+    return scheduler, schedule
+
+
+class TestFeedScheduler:
+    """Test interval adaptation, backoff and the polling loop."""
+
+    def test_from_feed_sources_covers_every_feed(self):
+        """Test that every configured feed URL gets its own schedule."""
+        scheduler = FeedScheduler.from_feed_sources(poll_fn=lambda *args: {})
+
+        expected = {url for config in feed_sources.values() for url in config["sources"]}
+        assert {schedule.feed_url for schedule in scheduler.feeds} == expected
+
+    def test_first_poll_keeps_interval(self):
+        """Test that the backlog drained by the first poll does not shrink the interval."""
+        scheduler, schedule = make_scheduler()
+
+        scheduler.record_success(schedule, new_items=40, now=1000)
+
+        assert schedule.interval == 600
+        assert schedule.next_poll_at == 1600
+
+    def test_busy_feed_polls_faster(self):
+        """Test that frequent new items shorten the interval."""
+        scheduler, schedule = make_scheduler()
+        scheduler.record_success(schedule, new_items=0, now=0)
+
+        scheduler.record_success(schedule, new_items=6, now=600)
+
+        # Observed one item every 100s, averaged with the previous 600s interval
+        assert schedule.interval == pytest.approx(350)
+
+    def test_quiet_feed_backs_off_up_to_max(self):
+        """Test that feeds without new items are polled less and less often."""
+        scheduler, schedule = make_scheduler(max_interval=1000)
+        scheduler.record_success(schedule, new_items=0, now=0)
+
+        scheduler.record_success(schedule, new_items=0, now=600)
+        assert schedule.interval == 600 * QUIET_BACKOFF
+
+        scheduler.record_success(schedule, new_items=0, now=1500)
+        assert schedule.interval == 1000
+
+    def test_interval_never_below_min(self):
+        """Test that bursts cannot push the interval under the minimum."""
+        scheduler, schedule = make_scheduler(min_interval=400)
+        scheduler.record_success(schedule, new_items=0, now=0)
+
+        scheduler.record_success(schedule, new_items=500, now=600)
+
+        assert schedule.interval == 400
+
+    def test_errors_back_off_exponentially(self):
+        """Test that consecutive errors double the delay without changing the interval."""
+        scheduler, schedule = make_scheduler()
+
+        scheduler.record_error(schedule, now=0)
+        assert schedule.next_poll_at == 1200
+        scheduler.record_error(schedule, now=0)
+        assert schedule.next_poll_at == 2400
+        assert schedule.interval == 600
+
+        scheduler.record_success(schedule, new_items=1, now=0)
+        assert schedule.consecutive_errors == 0
+
+    def test_jitter_stays_within_ratio(self):
+        """Test that jitter spreads polls by at most the configured ratio."""
+        scheduler, schedule = make_scheduler(jitter_ratio=0.1)
+
+        for _ in range(50):
+            scheduler.record_success(schedule, new_items=0, now=0)
+            assert 540 <= schedule.next_poll_at <= 660
+            schedule.last_poll_at = None
+
+    async def test_run_polls_due_feeds_until_stopped(self):
+        """Test that the loop polls due feeds and stops cleanly."""
+        polled = asyncio.Event()
+        calls = []
+
+        def poll_fn(feed_url, source, fetcher):
+            calls.append(feed_url)
+            polled.set()
+            return {"new_items": 2, "feeds_failed": 0}
+
+        scheduler, schedule = make_scheduler(poll_fn=poll_fn, min_interval=0.01)
+        schedule.next_poll_at = 0
+
+        scheduler.start()
+        await asyncio.wait_for(polled.wait(), timeout=5)
+        await scheduler.stop()
+
+        assert calls[0] == "https://example.com/feed"
+        assert schedule.last_poll_at is not None
+
+    async def test_failed_poll_counts_as_error(self):
+        """Test that exceptions from the poll function trigger backoff."""
+
+        def poll_fn(feed_url, source, fetcher):
+            raise RuntimeError("boom")
+
+        scheduler, schedule = make_scheduler(poll_fn=poll_fn)
+
+        await scheduler.poll(schedule)
+
+        assert schedule.consecutive_errors == 1
+
+    async def test_skipped_poll_retries_without_changing_interval(self):
+        """Test that a poll skipped during another ingestion run is retried after min_interval."""
+        scheduler, schedule = make_scheduler(
+            poll_fn=lambda *args: {"skipped": True}, clock=lambda: 1000.0
+        )
+
+        await scheduler.poll(schedule)
+
+        assert schedule.interval == 600
+        assert schedule.last_poll_at is None
+        assert schedule.consecutive_errors == 0
+        assert schedule.next_poll_at == 1060.0
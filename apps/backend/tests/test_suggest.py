@@ -0,0 +1,148 @@
+"""Tests for the title and entity autocomplete index."""
+
+from src.suggest import SuggestIndex, extract_entities, get_suggest_index, set_suggest_index
+
+
+class TestExtractEntities:
+    """Test name extraction from titles."""
+
+    def test_extracts_capitalized_names(self):
+        """Test that names are kept and sentence-initial words dropped."""
+        entities = extract_entities("L'actrice Léa Seydoux et Brad Pitt : Le Prince Harry parle")
+
+        assert entities == ["Léa Seydoux", "Brad Pitt", "Prince Harry"]
+
+    def test_ignores_single_capitalized_words(self):
+        """Test that a lone capitalized word is not taken for a name."""
+        assert extract_entities("Cannes accueille le festival") == []
+
+
+class TestSuggestIndex:
+    """Test prefix lookups, ranking and persistence."""
+
+    def test_accent_and_case_insensitive_prefix(self, tmp_path, make_article):
+        """Test that an unaccented lowercase prefix finds accented names."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(make_article("a", title="Élodie Frégé se confie"))
+
+        suggestions = index.suggest("elodie fr")
+
+        assert suggestions[0] == {"text": "Élodie Frégé", "type": "entity", "count": 1}
+        assert suggestions[1]["type"] == "title"
+
+    def test_matches_later_words(self, tmp_path, make_article):
+        """Test that a last name prefix finds the full name and title."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(make_article("a", title="Brad Pitt en vacances"))
+
+        assert [s["text"] for s in index.suggest("pit")] == ["Brad Pitt", "Brad Pitt en vacances"]
+
+    def test_entities_ranked_by_article_count(self, tmp_path, make_article):
+        """Test that names covered by more articles come first."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(make_article("a", title="Marie Curie honorée"))
+        index.add_article(make_article("b", title="Marion Cotillard au festival"))
+        index.add_article(make_article("c", title="Marion Cotillard répond"))
+
+        suggestions = index.suggest("mari", limit=2)
+
+        assert suggestions == [
+            {"text": "Marion Cotillard", "type": "entity", "count": 2},
+            {"text": "Marie Curie", "type": "entity", "count": 1},
+        ]
+
+    def test_top_entities(self, tmp_path, make_article):
+        """Test that the most covered names are listed first."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(make_article("a", title="Marie Curie honorée"))
+        index.add_article(make_article("b", title="Marion Cotillard au festival"))
+        index.add_article(make_article("c", title="Marion Cotillard répond"))
+
+        assert index.top_entities(1) == ["Marion Cotillard"]
+
+    def test_changed_title_replaces_previous_entries(self, tmp_path, make_article):
+        """Test that re-ingesting an article with a new title drops the old one."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(make_article("a", title="Brad Pitt en vacances"))
+        index.add_article(make_article("a", title="Angelina Jolie en vacances"))
+
+        assert index.suggest("brad") == []
+        assert len(index.suggest("angelina")) == 2
+
+    def test_save_and_load_round_trip(self, tmp_path, make_article):
+        """Test that suggestions survive a restart."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(
+            make_article("a", title="Brad Pitt en vacances", description="Avec Angelina Jolie")
+        )
+        index.save()
+
+        loaded = SuggestIndex.load(tmp_path / "suggest.json")
+
+        assert loaded.suggest("an") == index.suggest("an")
+        assert loaded.suggest("an")[0]["text"] == "Angelina Jolie"
+
+    def test_bulk_load_matches_incremental_adds(self, tmp_path, make_article):
+        """Test that loading saved articles builds the same sorted keys as adding them."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        for name in ["Zoé Sagan", "Brad Pitt", "Angelina Jolie", "Brad Pitt et Zoé Sagan"]:
+            index.add_article(make_article(name, title=f"{name} en vacances"))
+
+        loaded = SuggestIndex(tmp_path / "suggest.json", index.articles)
+
+        assert loaded._title_keys == index._title_keys
+        assert loaded._entity_keys == index._entity_keys
+        assert loaded.entity_counts == index.entity_counts
+
+    def test_rebuild_from_collection(self, mocker):
+        """Test that the backfill indexes every stored article once."""
+        from src.suggest import rebuild_suggest_index
+
+        payloads = [
+            {"article_url": "https://public.fr/b", "article_title": "Brad Pitt en vacances"},
+            {"article_url": "https://public.fr/b", "article_title": "Brad Pitt en vacances"},
+            {"article_url": "https://public.fr/a", "article_title": "Angelina Jolie au festival"},
+        ]
+        mock_qdrant = mocker.patch("src.suggest.get_qdrant_client").return_value
+        mock_qdrant.scroll.return_value = ([mocker.MagicMock(payload=p) for p in payloads], None)
+
+        index = rebuild_suggest_index()
+
+        assert index.entity_counts == {"brad pitt": 1, "angelina jolie": 1}
+        assert [s["text"] for s in get_suggest_index().suggest("b")] == [
+            "Brad Pitt",
+            "Brad Pitt en vacances",
+        ]
+
+
+class TestSuggestEndpoint:
+    """Test the /suggest endpoint."""
+
+    def test_suggest_served_from_index(self, test_client, tmp_path, make_article):
+        """Test that the endpoint returns suggestions for the prefix."""
+        index = SuggestIndex(tmp_path / "suggest.json")
+        index.add_article(make_article("a", title="Brad Pitt en vacances"))
+        set_suggest_index(index)
+
+        response = test_client.get("/suggest", params={"q": "Brad", "limit": 1})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "success",
+            "suggestions": [{"text": "Brad Pitt", "type": "entity", "count": 1}],
+        }
+
+    def test_empty_query_returns_nothing(self, test_client):
+        """Test that a blank prefix returns no suggestions."""
+        response = test_client.get("/suggest", params={"q": " "})
+
+        assert response.json() == {"status": "success", "suggestions": []}
+
+    def test_index_updated_by_ingestion(self, ingest_article, sample_article):
+        """Test that processing an article adds its title to the index."""
+        ingest_article(sample_article)
+
+        suggestions = get_suggest_index().suggest(sample_article.title)
+        assert {"text": sample_article.title, "type": "title", "url": sample_article.url} in (
+            suggestions
+        )
@@ -0,0 +1,57 @@
+"""Tests for request tracing spans."""
+
+import structlog
+
+from src.tracing import current_trace, span, start_trace
+
+
+class TestTracing:
+    """Test trace and span recording."""
+
+    def test_spans_are_recorded_on_the_current_trace(self):
+        """Test that child spans are timed in order on the active trace."""
+        with start_trace("/query") as trace:
+            with span("embedding"):
+                pass
+            with span("vector_search", top_k=8):
+                pass
+
+        assert [name for name, _ in trace.spans] == ["embedding", "vector_search"]
+        assert set(trace.timings()) == {"embedding_ms", "vector_search_ms"}
+        assert trace.duration_ms is not None
+        assert current_trace.get() is None
+
+    def test_trace_id_is_bound_to_log_context(self):
+        """Test that logs emitted during a trace carry its trace id."""
+        with start_trace("/search") as trace:
+            context = structlog.contextvars.get_contextvars()
+
+        assert context["trace_id"] == trace.trace_id
+        assert len(trace.trace_id) == 32
+        assert "trace_id" not in structlog.contextvars.get_contextvars()
+
+    def test_span_without_trace(self):
+        """Test that spans outside a request trace are no-ops."""
+        with span("embedding"):
+            pass
+
+        assert current_trace.get() is None
+
+    def test_span_recorded_when_stage_fails(self):
+        """Test that a failing stage still reports its duration."""
+        with start_trace("/query") as trace:
+            try:
+                with span("generation"):
+                    raise ValueError("boom")
+            except ValueError:
+                pass
+
+        assert [name for name, _ in trace.spans] == ["generation"]
+
+    def test_server_timing_header(self):
+        """Test the Server-Timing rendering of stage durations."""
+        with start_trace("/query") as trace:
+            trace.record("embedding", 12.345)
+
+        header = trace.server_timing()
+        assert header.startswith("embedding;dur=12.3, total;dur=")
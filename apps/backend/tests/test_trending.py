@@ -0,0 +1,150 @@
+"""Tests for incremental trending story clustering."""
+
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.trending import StoryClusters, get_story_clusters
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=UTC)
+
+
+def hours_ago(hours: float) -> datetime:
+    return NOW - timedelta(hours=hours)
+
+
+def direction(*weights: float, noise: float = 0.0) -> list[list[float]]:
+    vector = np.zeros(8, dtype=np.float32)
+    vector[: len(weights)] = weights
+    vector[7] = noise
+    return [vector.tolist()]
+
+
+@pytest.fixture
+def clusters(tmp_path):
+    return StoryClusters(tmp_path / "trending.npz", assign_threshold=0.9, merge_threshold=0.95)
+
+
+class TestStoryClusters:
+    """Test online assignment, merging and ranking."""
+
+    def test_articles_about_one_story_share_a_cluster(self, clusters, make_article):
+        """Test that close articles from both sources join the same story."""
+        first = clusters.add_article(make_article("a", "public.fr"), direction(1, 0, noise=0.1))
+        second = clusters.add_article(make_article("b", "vsd.fr"), direction(1, 0, noise=-0.1))
+        other = clusters.add_article(make_article("c"), direction(0, 1))
+
+        assert first == second
+        assert other != first
+        assert clusters.story_count == 2
+
+    def test_reingested_article_is_not_counted_twice(self, clusters, make_article):
+        """Test that the same URL is only assigned once."""
+        clusters.add_article(make_article("a"), direction(1, 0))
+        clusters.add_article(make_article("a"), direction(1, 0))
+
+        assert clusters.article_count == 1
+
+    def test_converging_stories_are_merged(self, clusters, make_article):
+        """Test that stories whose centroids end up close are merged."""
+        clusters.add_article(make_article("a"), direction(1, 0))
+        clusters.add_article(make_article("b"), direction(0.7, 0.7))
+        clusters.assign_threshold = 0.99
+        clusters.add_article(make_article("c"), direction(1, 0.2))
+        assert clusters.story_count == 3
+
+        clusters.merge_threshold = 0.97
+        assert clusters.merge_similar() == 1
+        assert clusters.story_count == 2
+        assert clusters.article_count == 3
+
+    def test_trending_ranks_by_recent_volume(self, clusters, make_article):
+        """Test that stories with the most recent articles come first."""
+        for url, source, hours, vector in [
+            ("old-1", "public.fr", 50, direction(1, 0)),
+            ("old-2", "public.fr", 60, direction(1, 0)),
+            ("old-3", "public.fr", 2, direction(1, 0)),
+            ("hot-1", "vsd.fr", 1, direction(0, 1)),
+            ("hot-2", "public.fr", 3, direction(0, 1)),
+            ("stale", "public.fr", 100, direction(0, 0, 1)),
+        ]:
+            clusters.add_article(
+                make_article(url, source, publication_date=hours_ago(hours)), vector
+            )
+
+        ranked = clusters.trending(window_hours=24, now=NOW.timestamp())
+
+        assert [cluster["recent_articles"] for cluster in ranked] == [2, 1]
+        assert ranked[0]["sources"] == ["public.fr", "vsd.fr"]
+        assert ranked[0]["articles"][0]["url"] == "https://vsd.fr/hot-1"
+        assert ranked[1]["total_articles"] == 3
+
+    def test_prune_drops_old_articles_and_empty_stories(self, clusters, make_article):
+        """Test that retention bounds the state."""
+        clusters.retention_hours = 24
+        clusters.add_article(make_article("old", publication_date=hours_ago(48)), direction(1, 0))
+        clusters.add_article(make_article("new", publication_date=hours_ago(1)), direction(0, 1))
+
+        assert clusters.prune(now=NOW.timestamp()) == 1
+        assert clusters.story_count == 1
+        assert clusters.trending(now=NOW.timestamp())[0]["articles"][0]["url"].endswith("new")
+
+    def test_state_survives_a_restart(self, clusters, make_article):
+        """Test that saved clusters are updated incrementally after reloading."""
+        story = clusters.add_article(make_article("a"), direction(1, 0))
+        clusters.save()
+
+        reloaded = StoryClusters.load(clusters.path)
+        reloaded.assign_threshold = clusters.assign_threshold
+
+        assert reloaded.add_article(make_article("b"), direction(1, 0.1)) == story
+        assert reloaded.article_count == 2
+
+    def test_reloaded_when_saved_by_another_process(self, make_article):
+        """Test that the shared state picks up a save made by a separate ingestion run."""
+        served = get_story_clusters()
+        ingestion = StoryClusters.load(served.path)
+        ingestion.add_article(make_article("a"), direction(1, 0))
+        ingestion.save()
+
+        assert get_story_clusters().article_count == 1
+        assert get_story_clusters() is get_story_clusters()
+
+    def test_ingestion_updates_the_shared_index(self, ingest_article, sample_article):
+        """Test that process_article clusters stored articles."""
+        ingest_article(sample_article)
+
+        assert get_story_clusters().article_count == 1
+
+
+class TestTrendingEndpoint:
+    """Test the /trending endpoint."""
+
+    def test_trending_success(self, test_client, mocker):
+        """Test that ranked clusters are returned."""
+        mock_clusters = mocker.patch("main.get_story_clusters").return_value
+        mock_clusters.trending.return_value = [{"id": 0, "recent_articles": 2}]
+
+        response = test_client.get("/trending", params={"window_hours": 6, "limit": 3})
+
+        assert response.json() == {
+            "status": "success",
+            "clusters": [{"id": 0, "recent_articles": 2}],
+        }
+        mock_clusters.trending.assert_called_once_with(window_hours=6, limit=3)
+
+    def test_trending_runs_off_the_event_loop(self, test_client, mocker, on_event_loop):
+        """Test that loading and ranking the clusters runs on a worker thread."""
+        mocker.patch("main.get_story_clusters").return_value.trending.side_effect = on_event_loop
+
+        assert test_client.get("/trending").json()["clusters"] == [False]
+
+    def test_trending_validates_parameters(self, test_client, mocker):
+        """Test that a non-positive window or an out of range limit is rejected."""
+        mock_clusters = mocker.patch("main.get_story_clusters").return_value
+
+        assert test_client.get("/trending", params={"window_hours": 0}).status_code == 422
+        assert test_client.get("/trending", params={"limit": 0}).status_code == 422
+        assert test_client.get("/trending", params={"limit": 51}).status_code == 422
+        mock_clusters.trending.assert_not_called()